@@ -0,0 +1,277 @@
+"""
+Retrieval benchmark for the Q&A over Documents service
+
+Builds (or loads) a corpus of chunks with labeled question -> chunk pairs,
+runs each retriever offline and reports recall@k, MRR, index build time,
+index size and per-query p50/p99 latency as JSON, so results can be
+compared between versions.
+
+Usage:
+    python benchmark_retrieval.py [--chunks 2000] [--questions 500] [--k 5]
+                                  [--retrievers keyword,bm25,hashing-int8]
+                                  [--corpus corpus.json] [--output results.json]
+
+A corpus file is JSON of the form
+    {"chunks": [{"id": "...", "text": "..."}],
+     "questions": [{"question": "...", "relevant": ["<chunk id>", ...]}]}
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain.docstore.document import Document
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from services.common.embeddings import EMBEDDING_BACKENDS, create_embeddings
+from services.common.text_ranking import bm25_scores, tokenize
+from services.common.vector_store import QuantizedVectorStore
+
+DEFAULT_RETRIEVERS = [
+    "keyword", "bm25",
+    "hashing-float32", "hashing-int8",
+    "huggingface-float32", "huggingface-int8",
+    "chroma",
+]
+
+SYLLABLES = ["ka", "lo", "mi", "ren", "to", "vel", "sa", "dor", "qui", "pen", "zar", "ul", "bri", "na", "tek"]
+KINDS = ["protocol", "reactor", "library", "compiler", "satellite", "vaccine", "turbine", "database"]
+FACTS = [
+    ("maximum operating temperature", "How hot can the {entity} run?", "{n} degrees Celsius"),
+    ("release year", "When was the {entity} first released?", "the year {year}"),
+    ("lead engineer", "Who led the engineering of the {entity}?", "{person}"),
+    ("primary material", "What is the {entity} mainly made of?", "{material}"),
+    ("energy consumption", "How much energy does the {entity} use?", "{n} kilowatt hours per day"),
+    ("headquarters city", "Where is the {entity} based?", "{city}"),
+]
+PEOPLE = ["Ada Moreno", "Ravi Kulkarni", "Lena Fischer", "Tomas Oyelaran", "Mei Tanaka", "Ines Duarte"]
+MATERIALS = ["titanium alloy", "carbon fibre", "ceramic composite", "recycled steel", "graphene foam"]
+CITIES = ["Lisbon", "Nairobi", "Osaka", "Montreal", "Tallinn", "Valparaiso"]
+FILLER = [
+    "Independent reviews have praised its reliability in demanding conditions.",
+    "Maintenance schedules are published quarterly by the operating team.",
+    "Several competing designs were evaluated before this one was chosen.",
+    "Documentation is available in multiple languages for field technicians.",
+    "Its safety record has been audited by an external certification body.",
+]
+
+def load_qa_module():
+    """Load the QA service module the same way main.py does"""
+    root = os.path.dirname(os.path.abspath(__file__))
+    spec = importlib.util.spec_from_file_location("qa_api", os.path.join(root, "services", "qa-documents", "api.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def synthetic_corpus(num_chunks: int, num_questions: int, seed: int = 0) -> Tuple[List[Document], List[Dict]]:
+    """
+    Generate chunks describing made-up entities, and questions that each
+    target one fact in one chunk. Every fact type appears across many
+    chunks, so a retriever has to match the entity as well as the topic.
+    """
+    rng = random.Random(seed)
+    chunks, facts_by_chunk = [], []
+    names = set()
+    while len(chunks) < num_chunks:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+        if name in names:
+            continue
+        names.add(name)
+        entity = f"{name} {rng.choice(KINDS)}"
+        chosen = rng.sample(FACTS, 3)
+        sentences = []
+        for attribute, _, value in chosen:
+            value = value.format(
+                n=rng.randint(10, 900), year=rng.randint(1950, 2024), person=rng.choice(PEOPLE),
+                material=rng.choice(MATERIALS), city=rng.choice(CITIES)
+            )
+            sentences.append(f"The {attribute} of the {entity} is {value}.")
+        sentences.extend(rng.sample(FILLER, 2))
+        rng.shuffle(sentences)
+        chunk_id = f"chunk-{len(chunks)}"
+        chunks.append(Document(page_content=" ".join(sentences), metadata={"chunk_id": chunk_id}))
+        facts_by_chunk.append((chunk_id, entity, chosen))
+    
+    questions = []
+    for _ in range(num_questions):
+        chunk_id, entity, chosen = rng.choice(facts_by_chunk)
+        attribute, paraphrase, _ = rng.choice(chosen)
+        # Half the questions reuse the chunk's wording, half paraphrase it
+        if rng.random() < 0.5:
+            question = f"What is the {attribute} of the {entity}?"
+        else:
+            question = paraphrase.format(entity=entity)
+        questions.append({"question": question, "relevant": [chunk_id]})
+    return chunks, questions
+
+def load_corpus(path: str) -> Tuple[List[Document], List[Dict]]:
+    """Load a labeled corpus from a JSON file"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    chunks = [Document(page_content=chunk["text"], metadata={"chunk_id": str(chunk["id"])}) for chunk in data["chunks"]]
+    questions = [{"question": q["question"], "relevant": [str(id_) for id_ in q["relevant"]]} for q in data["questions"]]
+    return chunks, questions
+
+def directory_size(path: str) -> int:
+    """Total size of the files under a directory"""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            total += os.path.getsize(os.path.join(dirpath, filename))
+    return total
+
+def build_retriever(name: str, chunks: List[Document], qa_module, workdir: str) -> Tuple[Callable[[str, int], List[Document]], int]:
+    """
+    Build a retriever over the chunks, returning its search function and
+    the size of its index in bytes
+    """
+    if name == "keyword":
+        # The service's fallback path: chunks kept as a plain list
+        size = sum(len(chunk.page_content.encode("utf-8")) for chunk in chunks)
+        return (lambda question, k: qa_module.retrieve_documents(chunks, question, k)), size
+    
+    if name == "bm25":
+        tokenized = [tokenize(chunk.page_content) for chunk in chunks]
+        size = sum(len(token) for doc in tokenized for token in doc)
+        
+        def search(question: str, k: int) -> List[Document]:
+            scores = np.asarray(bm25_scores(tokenize(question), tokenized))
+            top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+            return [chunks[i] for i in top[np.argsort(-scores[top])]]
+        return search, size
+    
+    if name == "chroma":
+        from langchain.vectorstores import Chroma
+        embeddings = qa_module.get_embeddings()
+        if embeddings is None:
+            raise RuntimeError("no embedding backend available")
+        directory = os.path.join(workdir, "chroma")
+        store = Chroma.from_documents(chunks, embeddings, persist_directory=directory)
+        return (lambda question, k: store.similarity_search(question, k=k)), directory_size(directory)
+    
+    backend, _, precision = name.rpartition("-")
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"unknown retriever '{name}'")
+    store = QuantizedVectorStore(
+        create_embeddings(backend), precision=precision,
+        persist_directory=os.path.join(workdir, name)
+    )
+    batch_size = qa_module.EMBED_BATCH_SIZE
+    for start in range(0, len(chunks), batch_size):
+        batch = chunks[start:start + batch_size]
+        store.add_texts([chunk.page_content for chunk in batch], [chunk.metadata for chunk in batch])
+    return (lambda question, k: store.similarity_search(question, k=k)), store.memory_bytes()
+
+def evaluate(search: Callable[[str, int], List[Document]], questions: List[Dict], k: int) -> Dict:
+    """Recall@k, MRR@k and per-query latency of a retriever"""
+    recall_total, reciprocal_rank_total = 0.0, 0.0
+    latencies = []
+    for item in questions:
+        start = time.perf_counter()
+        results = search(item["question"], k)
+        latencies.append(time.perf_counter() - start)
+        
+        relevant = set(item["relevant"])
+        ranked = [doc.metadata.get("chunk_id") for doc in results[:k]]
+        recall_total += len(relevant.intersection(ranked)) / len(relevant)
+        for rank, chunk_id in enumerate(ranked, start=1):
+            if chunk_id in relevant:
+                reciprocal_rank_total += 1.0 / rank
+                break
+    
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        f"recall@{k}": round(recall_total / len(questions), 4),
+        "mrr": round(reciprocal_rank_total / len(questions), 4),
+        "latency_p50_ms": round(float(np.percentile(latencies_ms, 50)), 3),
+        "latency_p99_ms": round(float(np.percentile(latencies_ms, 99)), 3),
+    }
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except Exception:
+        return None
+
+def run_benchmark(chunks: List[Document], questions: List[Dict], retrievers: List[str], k: int) -> Dict:
+    """Run every retriever over the corpus and collect the results"""
+    qa_module = load_qa_module()
+    results, skipped = [], []
+    workdir = tempfile.mkdtemp(prefix="qa_benchmark_")
+    try:
+        for name in retrievers:
+            print(f"Benchmarking {name}...", file=sys.stderr)
+            try:
+                start = time.perf_counter()
+                search, index_bytes = build_retriever(name, chunks, qa_module, workdir)
+                build_seconds = time.perf_counter() - start
+            except Exception as e:
+                # Missing optional dependency or model download not possible
+                skipped.append({"retriever": name, "reason": str(e)})
+                continue
+            result = {"retriever": name, "build_seconds": round(build_seconds, 3), "index_bytes": index_bytes}
+            result.update(evaluate(search, questions, k))
+            results.append(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    return {
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "k": k,
+        "corpus": {"chunks": len(chunks), "questions": len(questions)},
+        "results": results,
+        "skipped": skipped,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark QA service retrieval quality and latency")
+    parser.add_argument("--corpus", help="Labeled corpus JSON file (default: generate a synthetic one)")
+    parser.add_argument("--chunks", type=int, default=2000, help="Synthetic corpus size in chunks")
+    parser.add_argument("--questions", type=int, default=500, help="Number of synthetic questions")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic corpus random seed")
+    parser.add_argument("--k", type=int, default=5, help="Number of chunks retrieved per question")
+    parser.add_argument("--retrievers", default=",".join(DEFAULT_RETRIEVERS), help="Comma-separated retrievers to run")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+    
+    if args.corpus:
+        chunks, questions = load_corpus(args.corpus)
+    else:
+        chunks, questions = synthetic_corpus(args.chunks, args.questions, args.seed)
+    
+    report = run_benchmark(chunks, questions, [name.strip() for name in args.retrievers.split(",") if name.strip()], args.k)
+    report["corpus"]["source"] = args.corpus or f"synthetic(seed={args.seed})"
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    
+    for result in report["results"]:
+        print(
+            f"{result['retriever']:<22} recall@{args.k}={result[f'recall@{args.k}']:.3f} "
+            f"mrr={result['mrr']:.3f} build={result['build_seconds']:.2f}s "
+            f"size={result['index_bytes']}B p50={result['latency_p50_ms']:.2f}ms p99={result['latency_p99_ms']:.2f}ms",
+            file=sys.stderr
+        )
+    for item in report["skipped"]:
+        print(f"{item['retriever']:<22} skipped: {item['reason']}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -62,7 +62,7 @@ export const aiAPI = {
   }),
   
   // Q&A Documents
-  uploadDocument: (formData) => api.post('/qa/upload', formData, {
+  uploadDocument: (formData) => api.post('/qa/upload?wait=true', formData, {
     headers: {
       'Content-Type': 'multipart/form-data',
     },
@@ -72,6 +72,8 @@ export const aiAPI = {
   
   getDocuments: () => api.get('/qa/documents'),
   
+  getDocumentStatus: (documentId) => api.get(`/qa/documents/${documentId}/status`),
+  
   deleteDocument: (documentId) => api.delete(`/qa/documents/${documentId}`),
   
   // Learning Path
@@ -0,0 +1,36 @@
+"""
+Grant or revoke the administrator role
+
+The role is stored on the user's row, so it follows the account through
+username and email changes. Administrators can use /auth/users/bulk.
+
+Usage:
+    python -m services.auth.admin grant user@example.com
+    python -m services.auth.admin revoke user@example.com
+"""
+from typing import List, Optional
+import argparse
+import sys
+from . import crud
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Grant or revoke the administrator role")
+    parser.add_argument("action", choices=["grant", "revoke"])
+    parser.add_argument("email", help="Email of the user's account")
+    args = parser.parse_args(argv)
+    
+    from .database import SessionLocal, create_tables
+    create_tables()
+    db = SessionLocal()
+    try:
+        user = crud.set_admin(db, args.email, args.action == "grant")
+    finally:
+        db.close()
+    if user is None:
+        print(f"No user with email {args.email}")
+        return 1
+    print(f"{'Granted' if user.is_admin else 'Revoked'} administrator role for {user.username} ({user.email})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
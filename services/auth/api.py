@@ -1,66 +1,114 @@
 """
 Authentication API endpoints
 """
-from datetime import timedelta
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime, timedelta
+from typing import Annotated, List, Optional
+import secrets
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from . import crud, schemas, auth_utils
-from .database import get_db, create_tables
+from . import crud, schemas, auth_utils, provisioning
+from .database import SessionLocal, create_tables, get_request_db, run_db
+from .sessions import revocations
+from .user_cache import token_cache, user_cache
 
-# Create tables on startup
+# Create tables on startup, load the revocation list before serving and
+# keep it current from a background poller
 create_tables()
+revocations.refresh()
+revocations.start()
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    db: Session = Depends(get_db)
-):
-    """
-    Get current authenticated user
-    """
-    credentials_exception = HTTPException(
+def password_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many authentication requests, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+async def get_current_session(token: Annotated[str, Depends(oauth2_scheme)]) -> schemas.TokenData:
+    """
+    Decode the access token and reject it if its session was revoked
+    """
+    token_data = auth_utils.verify_token(token)
+    # Tokens without a session id predate server-side sessions and can't be revoked
+    if token_data is None or token_data.session_id is None or revocations.is_revoked(token_data.session_id):
+        raise credentials_exception()
+    return token_data
+
+async def get_current_user(
+    token_data: schemas.TokenData = Depends(get_current_session),
+    db=Depends(get_request_db)
+) -> schemas.UserResponse:
+    """
+    Get current authenticated user (from the user cache when possible)
+    """
+    username = token_data.username
+    user = user_cache.get(username)
+    if user is not None:
+        return user
     
-    username = auth_utils.verify_token(token)
-    if username is None:
-        raise credentials_exception
-    
-    user = crud.get_user_by_username(db, username=username)
-    if user is None:
-        raise credentials_exception
+    db_user = await run_db(db, crud.get_user_by_username, username)
+    if db_user is None:
+        raise credentials_exception()
     
+    user = schemas.UserResponse.from_orm(db_user)
+    user_cache.set(username, user)
     return user
 
+async def issue_token(db, user) -> schemas.Token:
+    """
+    Start a server-side session for the user and return its access token
+    """
+    access_token_expires = timedelta(minutes=auth_utils.ACCESS_TOKEN_EXPIRE_MINUTES)
+    session_id = secrets.token_urlsafe(16)
+    await run_db(db, crud.create_session, user.id, session_id, datetime.utcnow() + access_token_expires)
+    access_token = auth_utils.create_access_token(
+        data={"sub": user.username, "sid": session_id}, expires_delta=access_token_expires
+    )
+    
+    return schemas.Token(
+        access_token=access_token,
+        token_type="bearer",
+        expires_in=auth_utils.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        user=schemas.UserResponse.from_orm(user)
+    )
+
 @router.post("/register", response_model=schemas.APIResponse)
-async def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user: schemas.UserCreate, db=Depends(get_request_db)):
     """
     Register a new user
     """
-    # Check if user already exists
-    db_user = crud.get_user_by_email(db, email=user.email)
-    if db_user:
+    # Check if user already exists (email and username in one query)
+    taken_emails, taken_usernames = await run_db(db, crud.get_existing_identities, [user.email], [user.username])
+    if user.email in taken_emails:
         raise HTTPException(
             status_code=400,
             detail="Email already registered"
         )
     
-    db_user = crud.get_user_by_username(db, username=user.username)
-    if db_user:
+    if user.username in taken_usernames:
         raise HTTPException(
             status_code=400,
             detail="Username already taken"
         )
     
-    # Create new user
-    db_user = crud.create_user(db=db, user=user)
+    # Create new user, hashing off the event loop
+    try:
+        hashed_password = await auth_utils.get_password_hash_async(user.password)
+    except auth_utils.PasswordPoolBusy:
+        raise password_pool_busy()
+    db_user = await run_db(db, crud.create_user, user, hashed_password)
     return schemas.APIResponse(
         success=True,
         message="User created successfully",
@@ -70,12 +118,15 @@ async def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
 @router.post("/login", response_model=schemas.Token)
 async def login(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    db: Session = Depends(get_db)
+    db=Depends(get_request_db)
 ):
     """
     Login user and return access token
     """
-    user = crud.authenticate_user(db, form_data.username, form_data.password)
+    try:
+        user = await crud.authenticate_user_async(db, form_data.username, form_data.password)
+    except auth_utils.PasswordPoolBusy:
+        raise password_pool_busy()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -83,44 +134,27 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token_expires = timedelta(minutes=auth_utils.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth_utils.create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
-    
-    return schemas.Token(
-        access_token=access_token,
-        token_type="bearer",
-        expires_in=auth_utils.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-        user=schemas.UserResponse.from_orm(user)
-    )
+    return await issue_token(db, user)
 
 @router.post("/login-json", response_model=schemas.Token)
 async def login_json(
     user_login: schemas.UserLogin,
-    db: Session = Depends(get_db)
+    db=Depends(get_request_db)
 ):
     """
     Login user with JSON payload and return access token
     """
-    user = crud.authenticate_user(db, user_login.username, user_login.password)
+    try:
+        user = await crud.authenticate_user_async(db, user_login.username, user_login.password)
+    except auth_utils.PasswordPoolBusy:
+        raise password_pool_busy()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
     
-    access_token_expires = timedelta(minutes=auth_utils.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = auth_utils.create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
-    )
-    
-    return schemas.Token(
-        access_token=access_token,
-        token_type="bearer",
-        expires_in=auth_utils.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
-        user=schemas.UserResponse.from_orm(user)
-    )
+    return await issue_token(db, user)
 
 @router.get("/me", response_model=schemas.UserResponse)
 async def read_users_me(current_user: schemas.UserResponse = Depends(get_current_user)):
@@ -133,15 +167,27 @@ async def read_users_me(current_user: schemas.UserResponse = Depends(get_current
 async def update_user_me(
     user_update: schemas.UserUpdate,
     current_user: schemas.UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    token_data: schemas.TokenData = Depends(get_current_session),
+    db=Depends(get_request_db)
 ):
     """
     Update current user profile
     """
-    updated_user = crud.update_user(db, current_user.id, user_update)
+    hashed_password = None
+    if user_update.password is not None:
+        try:
+            hashed_password = await auth_utils.get_password_hash_async(user_update.password)
+        except auth_utils.PasswordPoolBusy:
+            raise password_pool_busy()
+    
+    updated_user = await run_db(db, crud.update_user, current_user.id, user_update, hashed_password)
     if not updated_user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    # A new password signs out every other session
+    if hashed_password is not None:
+        await run_db(db, crud.revoke_user_sessions, current_user.id, keep_session_id=token_data.session_id)
+    
     return schemas.APIResponse(
         success=True,
         message="User updated successfully",
@@ -149,18 +195,128 @@ async def update_user_me(
     )
 
 @router.post("/logout", response_model=schemas.APIResponse)
-async def logout(current_user: schemas.UserResponse = Depends(get_current_user)):
+async def logout(
+    current_user: schemas.UserResponse = Depends(get_current_user),
+    token_data: schemas.TokenData = Depends(get_current_session),
+    db=Depends(get_request_db)
+):
     """
-    Logout user (token invalidation would be handled on client side)
+    Logout user: revoke the current session so its token stops working
     """
+    await run_db(db, crud.revoke_session, current_user.id, token_data.session_id)
     return schemas.APIResponse(
         success=True,
         message="Logged out successfully"
     )
 
+@router.post("/logout-all", response_model=schemas.APIResponse)
+async def logout_all(
+    current_user: schemas.UserResponse = Depends(get_current_user),
+    db=Depends(get_request_db)
+):
+    """
+    Sign out every session of the current user
+    """
+    revoked = await run_db(db, crud.revoke_user_sessions, current_user.id)
+    return schemas.APIResponse(
+        success=True,
+        message="Logged out of all sessions",
+        data={"revoked_sessions": revoked}
+    )
+
+@router.get("/sessions", response_model=List[schemas.SessionResponse])
+async def list_sessions(
+    current_user: schemas.UserResponse = Depends(get_current_user),
+    token_data: schemas.TokenData = Depends(get_current_session),
+    db=Depends(get_request_db)
+):
+    """
+    List the current user's active sessions
+    """
+    sessions = await run_db(db, crud.get_active_sessions, current_user.id)
+    return [
+        schemas.SessionResponse(
+            id=session.id,
+            created_at=session.created_at,
+            expires_at=session.expires_at,
+            is_active=session.is_active,
+            current=session.token == token_data.session_id
+        )
+        for session in sessions
+    ]
+
+@router.delete("/sessions/{session_pk}", response_model=schemas.APIResponse)
+async def revoke_session(
+    session_pk: int,
+    current_user: schemas.UserResponse = Depends(get_current_user),
+    db=Depends(get_request_db)
+):
+    """
+    Sign out one of the current user's sessions
+    """
+    sessions = await run_db(db, crud.get_active_sessions, current_user.id)
+    sessions = [session for session in sessions if session.id == session_pk]
+    if not sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    await run_db(db, crud.revoke_sessions, sessions)
+    return schemas.APIResponse(
+        success=True,
+        message="Session revoked"
+    )
+
+def run_provisioning(text: str, file_format: str) -> dict:
+    db = SessionLocal()
+    try:
+        return provisioning.provision_users(db, text, file_format)
+    finally:
+        db.close()
+
+@router.post("/users/bulk", response_model=schemas.APIResponse)
+async def provision_users(
+    file: UploadFile = File(...),
+    file_format: Optional[str] = None,
+    current_user: schemas.UserResponse = Depends(get_current_user)
+):
+    """
+    Create users in bulk from a CSV or JSONL upload, with a per-row error report
+    """
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Bulk provisioning is restricted to administrators")
+    if file_format not in (None, "csv", "jsonl"):
+        raise HTTPException(status_code=400, detail="file_format must be csv or jsonl")
+    
+    content = await file.read(provisioning.MAX_PROVISION_BYTES + 1)
+    if len(content) > provisioning.MAX_PROVISION_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum is {provisioning.MAX_PROVISION_BYTES} bytes."
+        )
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    
+    try:
+        report = await run_in_threadpool(run_provisioning, text, file_format or provisioning.detect_format(file.filename))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return schemas.APIResponse(
+        success=report["failed"] == 0,
+        message=f"Created {report['created']} of {report['total_rows']} users",
+        data=report
+    )
+
 @router.get("/health")
 async def health_check():
     """
     Health check endpoint
     """
-    return {"status": "healthy", "service": "authentication"}
\ No newline at end of file
+    return {
+        "status": "healthy",
+        "service": "authentication",
+        "password_pool": auth_utils.password_pool.stats(),
+        "user_cache": user_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "revocations": revocations.stats()
+    }
\ No newline at end of file
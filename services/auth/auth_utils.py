@@ -1,12 +1,19 @@
 """
 Authentication utilities for password hashing and JWT tokens
 """
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+import asyncio
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from .schemas import TokenData
+from .user_cache import token_cache
 
 load_dotenv()
 
@@ -30,6 +37,130 @@ def get_password_hash(password: str) -> str:
     """
     return pwd_context.hash(password)
 
+# bcrypt runs off the event loop on a bounded pool. The bcrypt library
+# releases the GIL, so threads scale with cores. Calls beyond the queue
+# limit (running + waiting) are rejected rather than piling up.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", "256"))
+
+class PasswordPoolBusy(Exception):
+    """Raised when too many password operations are already queued"""
+    pass
+
+class PasswordHashPool:
+    """Bounded thread pool for password hashing and verification, with timing metrics"""
+    
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = max(1, workers)
+        self.queue_limit = max(1, queue_limit)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._slot_freed = threading.Condition(self._lock)
+        self.pending = 0
+        self.rejected = 0
+        self._metrics: Dict[str, Dict[str, float]] = {}
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        return self._executor
+    
+    def _record(self, operation: str, wait: float, duration: float):
+        with self._lock:
+            metrics = self._metrics.setdefault(operation, {
+                "count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "total_wait_seconds": 0.0, "max_wait_seconds": 0.0
+            })
+            metrics["count"] += 1
+            metrics["total_seconds"] += duration
+            metrics["max_seconds"] = max(metrics["max_seconds"], duration)
+            metrics["total_wait_seconds"] += wait
+            metrics["max_wait_seconds"] = max(metrics["max_wait_seconds"], wait)
+    
+    def _submit(self, operation: str, func: Callable[..., Any], *args) -> Future:
+        """Submit func(*args) for a caller that has already taken a queue slot"""
+        submitted = time.perf_counter()
+        
+        def timed():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                self._record(operation, started - submitted, finished - started)
+        
+        def done(_):
+            # The slot is held until the work finishes, even if the caller gave up
+            with self._lock:
+                self.pending -= 1
+                self._slot_freed.notify()
+        
+        future = self._get_executor().submit(timed)
+        future.add_done_callback(done)
+        return future
+    
+    async def run(self, operation: str, func: Callable[..., Any], *args) -> Any:
+        """Run func(*args) on the pool; raises PasswordPoolBusy when the queue is full"""
+        with self._lock:
+            if self.pending >= self.queue_limit:
+                self.rejected += 1
+                raise PasswordPoolBusy(f"{self.pending} password operations already queued")
+            self.pending += 1
+        return await asyncio.wrap_future(self._submit(operation, func, *args))
+    
+    def map(self, operation: str, func: Callable[[Any], Any], items: Iterable, window: int) -> Iterator:
+        """
+        Results of func(item) for a batch job, in order, computed on the pool
+        with at most window items in flight. A full queue makes the batch wait
+        for a slot instead of failing, and interactive calls still get in.
+        """
+        futures: deque = deque()
+        for item in items:
+            if len(futures) >= max(1, window):
+                yield futures.popleft().result()
+            with self._slot_freed:
+                while self.pending >= self.queue_limit:
+                    self._slot_freed.wait()
+                self.pending += 1
+            futures.append(self._submit(operation, func, item))
+        while futures:
+            yield futures.popleft().result()
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            operations = {
+                operation: {
+                    "count": int(metrics["count"]),
+                    "avg_ms": round(1000 * metrics["total_seconds"] / metrics["count"], 2),
+                    "max_ms": round(1000 * metrics["max_seconds"], 2),
+                    "avg_wait_ms": round(1000 * metrics["total_wait_seconds"] / metrics["count"], 2),
+                    "max_wait_ms": round(1000 * metrics["max_wait_seconds"], 2)
+                }
+                for operation, metrics in self._metrics.items()
+            }
+            return {
+                "workers": self.workers,
+                "queue_limit": self.queue_limit,
+                "pending": self.pending,
+                "rejected": self.rejected,
+                "operations": operations
+            }
+
+password_pool = PasswordHashPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password on the password pool
+    """
+    return await password_pool.run("verify", verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password on the password pool
+    """
+    return await password_pool.run("hash", get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """
     Create a JWT access token
@@ -44,15 +175,21 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(token: str) -> Optional[str]:
+def verify_token(token: str) -> Optional[TokenData]:
     """
-    Verify and decode a JWT token
+    Verify and decode a JWT token into its username and session id (valid
+    tokens are cached until they expire)
     """
+    token_data = token_cache.get(token)
+    if token_data is not None:
+        return token_data
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             return None
-        return username
+        token_data = TokenData(username=username, session_id=payload.get("sid"))
+        token_cache.set(token, token_data, expires_at=payload.get("exp"))
+        return token_data
     except JWTError:
         return None
\ No newline at end of file
@@ -1,9 +1,14 @@
 """
 CRUD operations for authentication service
 """
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from typing import Optional
+from datetime import datetime
+from typing import Iterable, List, Optional, Set, Tuple
 from . import models, schemas, auth_utils
+from .database import run_db
+from .sessions import revocations
+from .user_cache import invalidate_user
 
 def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
     """
@@ -23,11 +28,35 @@ def get_user_by_id(db: Session, user_id: int) -> Optional[models.User]:
     """
     return db.query(models.User).filter(models.User.id == user_id).first()
 
-def create_user(db: Session, user: schemas.UserCreate) -> models.User:
+# Values per IN (...) list, well under SQLite's bound-parameter limit
+CONFLICT_QUERY_CHUNK = 500
+
+def get_existing_identities(db: Session, emails: Iterable[str], usernames: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+    """
+    Which of the given emails and usernames are already taken, with one
+    set-based query per chunk instead of a lookup per user
+    """
+    emails, usernames = list(dict.fromkeys(emails)), list(dict.fromkeys(usernames))
+    taken_emails: Set[str] = set()
+    taken_usernames: Set[str] = set()
+    for start in range(0, max(len(emails), len(usernames)), CONFLICT_QUERY_CHUNK):
+        email_chunk = emails[start:start + CONFLICT_QUERY_CHUNK]
+        username_chunk = usernames[start:start + CONFLICT_QUERY_CHUNK]
+        rows = db.query(models.User.email, models.User.username).filter(or_(
+            models.User.email.in_(email_chunk),
+            models.User.username.in_(username_chunk)
+        )).all()
+        for email, username in rows:
+            taken_emails.add(email)
+            taken_usernames.add(username)
+    return taken_emails, taken_usernames
+
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: Optional[str] = None) -> models.User:
     """
-    Create a new user
+    Create a new user (hashing the password here unless it was hashed already)
     """
-    hashed_password = auth_utils.get_password_hash(user.password)
+    if hashed_password is None:
+        hashed_password = auth_utils.get_password_hash(user.password)
     db_user = models.User(
         email=user.email,
         username=user.username,
@@ -37,16 +66,23 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    invalidate_user(db_user.username)
     return db_user
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[models.User]:
+def get_login_user(db: Session, username: str) -> Optional[models.User]:
     """
-    Authenticate user with username and password
+    Find the user logging in by username or email
     """
     user = get_user_by_username(db, username)
     if not user:
         user = get_user_by_email(db, username)  # Allow login with email
-    
+    return user
+
+def authenticate_user(db: Session, username: str, password: str) -> Optional[models.User]:
+    """
+    Authenticate user with username and password
+    """
+    user = get_login_user(db, username)
     if not user:
         return None
     
@@ -55,9 +91,25 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[mod
     
     return user
 
-def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate) -> Optional[models.User]:
+async def authenticate_user_async(db: Session, username: str, password: str) -> Optional[models.User]:
+    """
+    Authenticate user with username and password, verifying on the password
+    pool (db is a request session, see database.get_request_db)
+    """
+    user = await run_db(db, get_login_user, username)
+    if not user:
+        return None
+    
+    if not await auth_utils.verify_password_async(password, user.hashed_password):
+        return None
+    
+    return user
+
+def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate,
+                hashed_password: Optional[str] = None) -> Optional[models.User]:
     """
-    Update user information
+    Update user information (a new password is hashed here unless
+    hashed_password is given)
     """
     db_user = get_user_by_id(db, user_id)
     if not db_user:
@@ -65,15 +117,18 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate) -> O
     
     update_data = user_update.dict(exclude_unset=True)
     if "password" in update_data:
-        hashed_password = auth_utils.get_password_hash(update_data["password"])
+        if hashed_password is None:
+            hashed_password = auth_utils.get_password_hash(update_data["password"])
         update_data["hashed_password"] = hashed_password
         del update_data["password"]
     
+    old_username = db_user.username
     for field, value in update_data.items():
         setattr(db_user, field, value)
     
     db.commit()
     db.refresh(db_user)
+    invalidate_user(old_username, db_user.username)
     return db_user
 
 def delete_user(db: Session, user_id: int) -> bool:
@@ -86,4 +141,82 @@ def delete_user(db: Session, user_id: int) -> bool:
     
     db_user.is_active = False
     db.commit()
-    return True
\ No newline at end of file
+    invalidate_user(db_user.username)
+    revoke_user_sessions(db, user_id)
+    return True
+
+def set_admin(db: Session, email: str, is_admin: bool) -> Optional[models.User]:
+    """
+    Grant or revoke the administrator role of the user with an email
+    """
+    db_user = get_user_by_email(db, email)
+    if not db_user:
+        return None
+    
+    db_user.is_admin = is_admin
+    db.commit()
+    invalidate_user(db_user.username)
+    return db_user
+
+def create_session(db: Session, user_id: int, session_id: str, expires_at: datetime) -> models.UserSession:
+    """
+    Record a session for a newly issued access token
+    """
+    db_session = models.UserSession(user_id=user_id, token=session_id, expires_at=expires_at)
+    db.add(db_session)
+    db.commit()
+    db.refresh(db_session)
+    return db_session
+
+def get_active_sessions(db: Session, user_id: int) -> List[models.UserSession]:
+    """
+    Get a user's active, unexpired sessions, newest first
+    """
+    return db.query(models.UserSession).filter(
+        models.UserSession.user_id == user_id,
+        models.UserSession.is_active == True,
+        models.UserSession.expires_at > datetime.utcnow()
+    ).order_by(models.UserSession.id.desc()).all()
+
+def revoke_sessions(db: Session, sessions: List[models.UserSession]) -> int:
+    """
+    Revoke sessions: mark them inactive, log the revocations for other
+    processes and apply them to this process's revocation list at once
+    """
+    revoked = []
+    for session in sessions:
+        if not session.is_active:
+            continue
+        session.is_active = False
+        db.add(models.SessionRevocation(
+            session_token=session.token,
+            user_id=session.user_id,
+            expires_at=session.expires_at
+        ))
+        revoked.append((session.token, session.expires_at))
+    db.commit()
+    for session_id, expires_at in revoked:
+        revocations.add(session_id, expires_at)
+    return len(revoked)
+
+def revoke_session(db: Session, user_id: int, session_id: str) -> bool:
+    """
+    Revoke one of a user's sessions by its session id
+    """
+    db_session = db.query(models.UserSession).filter(
+        models.UserSession.user_id == user_id,
+        models.UserSession.token == session_id
+    ).first()
+    if not db_session or not db_session.is_active:
+        return False
+    return revoke_sessions(db, [db_session]) == 1
+
+def revoke_user_sessions(db: Session, user_id: int, keep_session_id: Optional[str] = None) -> int:
+    """
+    Sign a user out everywhere (except keep_session_id, if given)
+    """
+    sessions = [
+        session for session in get_active_sessions(db, user_id)
+        if session.token != keep_session_id
+    ]
+    return revoke_sessions(db, sessions)
\ No newline at end of file
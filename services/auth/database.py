@@ -1,8 +1,11 @@
 """
 Database configuration and connection management
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from typing import Any, Callable, Dict
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 import os
 from dotenv import load_dotenv
@@ -12,15 +15,95 @@ load_dotenv()
 # Database URL
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./ai_microservices.db")
 
+# Serve requests through an async engine (aiosqlite / asyncpg). The sync
+# engine is still used for table creation and scripts.
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "false").lower() == "true"
+
+# Connection pool for server databases (PostgreSQL, MySQL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# SQLite tuning: page cache per connection, how long a writer waits for the
+# lock, and the per-connection prepared statement cache
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHED_STATEMENTS = int(os.getenv("SQLITE_CACHED_STATEMENTS", "256"))
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+def to_async_url(url: str) -> str:
+    """The URL with its backend's async driver, unless one is already given"""
+    parsed = make_url(url)
+    if "+" in parsed.drivername:
+        return url
+    driver = ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        raise ValueError(f"No async driver known for {parsed.drivername} databases")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """create_engine arguments tuned for the database behind url"""
+    if is_sqlite(url):
+        return {"connect_args": {"check_same_thread": False, "cached_statements": SQLITE_CACHED_STATEMENTS}}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+def configure_sqlite(engine):
+    """
+    Per-connection pragmas: WAL so readers never wait for the writer,
+    NORMAL sync (durable at checkpoints, safe with WAL), a larger page
+    cache, in-memory temp tables and a busy timeout so concurrent writers
+    queue instead of failing with "database is locked"
+    """
+    in_memory = make_url(str(engine.url)).database in (None, "", ":memory:")
+    
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.close()
+
 # Create engine
-engine = create_engine(
-    DATABASE_URL, 
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+if is_sqlite(DATABASE_URL):
+    configure_sqlite(engine)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Request sessions keep loaded attributes after commit, so handlers can read
+# them without another round trip (or, with async sessions, any implicit IO)
+RequestSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+AsyncSessionLocal = None
+if DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+    if is_sqlite(ASYNC_DATABASE_URL):
+        configure_sqlite(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Create Base class
 Base = declarative_base()
 
@@ -34,9 +117,40 @@ def get_db():
     finally:
         db.close()
 
+async def get_request_db():
+    """
+    Dependency for async handlers: an AsyncSession with DATABASE_ASYNC,
+    otherwise a sync Session used from the threadpool. Use it through
+    run_db so the event loop never waits on the database.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as session:
+            yield session
+    else:
+        db = RequestSessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+
+async def run_db(db, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Call a sync CRUD function func(session, *args) without blocking the
+    event loop: on the async connection via run_sync, or in the threadpool
+    """
+    if isinstance(db, Session):
+        return await run_in_threadpool(func, db, *args, **kwargs)
+    return await db.run_sync(func, *args, **kwargs)
+
 def create_tables():
     """
-    Create all tables
+    Create all tables, and add columns introduced since an existing
+    database was created
     """
     from .models import Base
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    
+    columns = {column["name"] for column in inspect(engine).get_columns("users")}
+    if "is_admin" not in columns:
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE users ADD COLUMN is_admin BOOLEAN NOT NULL DEFAULT FALSE"))
@@ -0,0 +1,197 @@
+"""
+Bulk user provisioning from CSV or JSONL
+
+Rows are validated with schemas.UserCreate, checked for duplicates within
+the file and against the database with set-based queries, hashed on the
+shared password pool (auth_utils.password_pool, so logins keep their
+share of it) and inserted in batched transactions. Every rejected row is reported with its line
+number and reason; a batch that hits a conflict at insert time (e.g. a
+concurrent registration) is retried row by row so only the offending rows
+fail.
+
+Usage:
+    python -m services.auth.provisioning users.csv [--format csv|jsonl] [--batch-size 1000] [--workers 4]
+
+CSV files need a header with email, username, full_name and password;
+JSONL files hold one object with those fields per line.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import sys
+import time
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from . import auth_utils, crud, models, schemas
+from .user_cache import invalidate_user
+
+PROVISION_BATCH_SIZE = int(os.getenv("PROVISION_BATCH_SIZE", "1000"))
+# Hashes a provisioning run keeps in flight on the shared password pool; half
+# its workers by default so logins and registrations are not starved
+PROVISION_HASH_WORKERS = int(os.getenv("PROVISION_HASH_WORKERS", str(max(1, auth_utils.PASSWORD_HASH_WORKERS // 2))))
+MAX_PROVISION_ROWS = int(os.getenv("MAX_PROVISION_ROWS", "100000"))
+# Largest upload accepted by the bulk provisioning endpoint
+MAX_PROVISION_BYTES = int(os.getenv("MAX_PROVISION_BYTES", str(20 * 1024 * 1024)))
+
+USER_FIELDS = ("email", "username", "full_name", "password")
+
+def detect_format(filename: Optional[str]) -> str:
+    """csv or jsonl, from a file name (CSV when unknown)"""
+    name = (filename or "").lower()
+    return "jsonl" if name.endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+def parse_rows(text: str, file_format: str) -> Iterator[Tuple[int, Any]]:
+    """(line number, record) pairs; unparseable JSONL lines yield their error text"""
+    if file_format == "jsonl":
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, f"Invalid JSON: {e.msg}"
+    elif file_format == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        missing = [field for field in USER_FIELDS if field not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV header is missing: {', '.join(missing)}")
+        for record in reader:
+            yield reader.line_num, record
+    else:
+        raise ValueError(f"Unsupported format: {file_format}")
+
+def validate_rows(rows: Iterable[Tuple[int, Any]]) -> Tuple[List[Tuple[int, schemas.UserCreate]], List[Dict[str, Any]]]:
+    """Valid users, and errors for invalid rows and duplicates within the file"""
+    users: List[Tuple[int, schemas.UserCreate]] = []
+    errors: List[Dict[str, Any]] = []
+    seen_emails, seen_usernames = set(), set()
+    for line_number, record in rows:
+        if not isinstance(record, dict):
+            errors.append({"row": line_number, "error": record if isinstance(record, str) else "Expected an object"})
+            continue
+        try:
+            user = schemas.UserCreate(**{field: record.get(field) for field in USER_FIELDS})
+        except ValidationError as e:
+            problems = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+            errors.append({"row": line_number, "email": record.get("email"), "username": record.get("username"), "error": problems})
+            continue
+        if user.email in seen_emails or user.username in seen_usernames:
+            errors.append({"row": line_number, "email": user.email, "username": user.username, "error": "Duplicate in file"})
+            continue
+        seen_emails.add(user.email)
+        seen_usernames.add(user.username)
+        users.append((line_number, user))
+    return users, errors
+
+def _user_values(user: schemas.UserCreate, hashed_password: str) -> Dict[str, Any]:
+    return {
+        "email": user.email,
+        "username": user.username,
+        "full_name": user.full_name,
+        "hashed_password": hashed_password,
+        "is_active": True
+    }
+
+def insert_batch(db: Session, batch: List[Tuple[int, schemas.UserCreate, str]]) -> List[Dict[str, Any]]:
+    """
+    Insert a batch in one transaction; on a conflict, retry its rows one by
+    one (each in a savepoint) and return the rows that failed
+    """
+    try:
+        db.execute(insert(models.User), [_user_values(user, hashed) for _, user, hashed in batch])
+        db.commit()
+        return []
+    except IntegrityError:
+        db.rollback()
+    
+    errors = []
+    for line_number, user, hashed in batch:
+        try:
+            with db.begin_nested():
+                db.execute(insert(models.User), [_user_values(user, hashed)])
+        except IntegrityError:
+            errors.append({"row": line_number, "email": user.email, "username": user.username,
+                           "error": "Email or username already exists"})
+    db.commit()
+    return errors
+
+def provision_users(
+    db: Session,
+    text: str,
+    file_format: str = "csv",
+    batch_size: int = PROVISION_BATCH_SIZE,
+    workers: int = PROVISION_HASH_WORKERS
+) -> Dict[str, Any]:
+    """Create the users in a CSV or JSONL document and report per-row errors"""
+    started = time.perf_counter()
+    # Parsing stops one row past the limit, before anything is validated
+    rows = list(itertools.islice(parse_rows(text, file_format), MAX_PROVISION_ROWS + 1))
+    if len(rows) > MAX_PROVISION_ROWS:
+        raise ValueError(f"Too many rows. Maximum is {MAX_PROVISION_ROWS}.")
+    users, errors = validate_rows(rows)
+    total = len(rows)
+    
+    taken_emails, taken_usernames = crud.get_existing_identities(
+        db, [user.email for _, user in users], [user.username for _, user in users]
+    )
+    pending = []
+    for line_number, user in users:
+        if user.email in taken_emails:
+            errors.append({"row": line_number, "email": user.email, "username": user.username, "error": "Email already registered"})
+        elif user.username in taken_usernames:
+            errors.append({"row": line_number, "email": user.email, "username": user.username, "error": "Username already taken"})
+        else:
+            pending.append((line_number, user))
+    
+    # Only rows that passed validation and the duplicate checks get hashed.
+    # Hashes run on the shared pool with a bounded number in flight, and each
+    # batch is inserted as soon as its hashes are done
+    created = 0
+    hashes = auth_utils.password_pool.map(
+        "provision", auth_utils.get_password_hash, (user.password for _, user in pending), workers
+    )
+    for start in range(0, len(pending), batch_size):
+        chunk = pending[start:start + batch_size]
+        batch = [(line_number, user, next(hashes)) for line_number, user in chunk]
+        batch_errors = insert_batch(db, batch)
+        errors.extend(batch_errors)
+        created += len(batch) - len(batch_errors)
+        invalidate_user(*(user.username for _, user in chunk))
+    
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "total_rows": total,
+        "created": created,
+        "failed": len(errors),
+        "errors": errors,
+        "seconds": round(time.perf_counter() - started, 2)
+    }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Create users in bulk from a CSV or JSONL file")
+    parser.add_argument("path", help="CSV or JSONL file of users")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="File format (default: from the extension)")
+    parser.add_argument("--batch-size", type=int, default=PROVISION_BATCH_SIZE, help="Users per insert transaction")
+    parser.add_argument("--workers", type=int, default=PROVISION_HASH_WORKERS, help="Password hashes in flight on the shared pool")
+    args = parser.parse_args(argv)
+    
+    from .database import SessionLocal, create_tables
+    create_tables()
+    with open(args.path, "r", encoding="utf-8-sig") as f:
+        text = f.read()
+    db = SessionLocal()
+    try:
+        report = provision_users(db, text, args.format or detect_format(args.path), args.batch_size, args.workers)
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2))
+    return 0 if report["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
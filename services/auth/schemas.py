@@ -22,6 +22,7 @@ class UserUpdate(BaseModel):
 class UserResponse(UserBase):
     id: int
     is_active: bool
+    is_admin: bool = False
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -40,6 +41,17 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    session_id: Optional[str] = None
+
+class SessionResponse(BaseModel):
+    id: int
+    created_at: Optional[datetime] = None
+    expires_at: datetime
+    is_active: bool
+    current: bool = False
+    
+    class Config:
+        from_attributes = True
 
 class APIResponse(BaseModel):
     success: bool
@@ -0,0 +1,141 @@
+"""
+In-memory revocation list for server-side sessions
+
+Each access token carries a session id ("sid") backed by a UserSession
+row. Revoking a session marks the row inactive and appends it to the
+session_revocations log. Every process keeps the revoked ids in a dict
+(id -> token expiry), so the check on each request is one lookup; the dict
+is updated immediately for revocations made in this process and picks up
+other processes' revocations by reading the log past the last id seen, at
+most every REVOCATION_REFRESH_SECONDS. Reads happen on one long-lived
+background thread, never on the request path. The same thread deletes
+session rows and log entries of expired tokens every
+SESSION_PRUNE_SECONDS, since an expired token is rejected anyway.
+"""
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+import os
+import threading
+import time
+from sqlalchemy.sql import func
+from . import models
+from .database import SessionLocal
+
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", "1"))
+SESSION_PRUNE_SECONDS = float(os.getenv("SESSION_PRUNE_SECONDS", "3600"))
+
+def epoch_seconds(value: datetime) -> float:
+    """Epoch seconds for a datetime, taking naive values (as SQLite returns them) as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+class RevocationList:
+    """Revoked session ids, refreshed incrementally from the revocation log"""
+    
+    def __init__(self, session_factory: Callable, refresh_seconds: float, prune_seconds: float = SESSION_PRUNE_SECONDS):
+        self.session_factory = session_factory
+        self.refresh_seconds = refresh_seconds
+        self.prune_seconds = prune_seconds
+        self._revoked: Dict[str, float] = {}
+        self._last_id = 0
+        self._loaded = False
+        self._poller: Optional[threading.Thread] = None
+        self._refresh_lock = threading.Lock()
+        # Guards writes to _revoked (add, refresh and prune run on different threads)
+        self._lock = threading.Lock()
+        self.last_error: Optional[str] = None
+    
+    def add(self, session_id: str, expires_at: datetime):
+        """Record a revocation made in this process"""
+        with self._lock:
+            self._revoked[session_id] = epoch_seconds(expires_at)
+    
+    def is_revoked(self, session_id: str) -> bool:
+        return session_id in self._revoked
+    
+    def start(self):
+        """Start the background poller (once per process)"""
+        with self._lock:
+            if self._poller is not None:
+                return
+            self._poller = threading.Thread(target=self._poll, name="revocation-poller", daemon=True)
+        self._poller.start()
+    
+    def _poll(self):
+        next_prune = time.monotonic()
+        while True:
+            time.sleep(self.refresh_seconds)
+            self.refresh()
+            if time.monotonic() >= next_prune:
+                next_prune = time.monotonic() + self.prune_seconds
+                try:
+                    self.delete_expired()
+                except Exception as e:
+                    self.last_error = str(e)
+    
+    def delete_expired(self) -> int:
+        """Delete session rows and revocation log entries of expired tokens"""
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            deleted = db.query(models.UserSession).filter(
+                models.UserSession.expires_at <= now
+            ).delete(synchronize_session=False)
+            # Keep the newest log entry: SQLite can reuse the highest id once
+            # it is deleted, and every process reads the log past the last id
+            newest = db.query(func.max(models.SessionRevocation.id)).scalar()
+            if newest is not None:
+                deleted += db.query(models.SessionRevocation).filter(
+                    models.SessionRevocation.expires_at <= now,
+                    models.SessionRevocation.id < newest
+                ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+    
+    def refresh(self):
+        """Read revocations logged since the last refresh"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            db = self.session_factory()
+            try:
+                since = self._last_id
+                query = db.query(
+                    models.SessionRevocation.id,
+                    models.SessionRevocation.session_token,
+                    models.SessionRevocation.expires_at
+                ).filter(models.SessionRevocation.id > since)
+                if not self._loaded:
+                    # On the first load skip revocations of already-expired tokens,
+                    # but still move past them
+                    self._last_id = db.query(func.max(models.SessionRevocation.id)).scalar() or 0
+                    query = query.filter(models.SessionRevocation.expires_at > datetime.utcnow())
+                rows = query.order_by(models.SessionRevocation.id).all()
+            finally:
+                db.close()
+            with self._lock:
+                for revocation_id, session_id, expires_at in rows:
+                    self._revoked[session_id] = epoch_seconds(expires_at)
+                    self._last_id = max(self._last_id, revocation_id)
+                self._prune()
+            self._loaded = True
+            self.last_error = None
+        except Exception as e:
+            # Keep checking against what is already known
+            self.last_error = str(e)
+        finally:
+            self._refresh_lock.release()
+    
+    def _prune(self):
+        """Forget revocations of tokens that have expired anyway (call with _lock held)"""
+        now = time.time()
+        for session_id in [s for s, expires in self._revoked.items() if expires <= now]:
+            self._revoked.pop(session_id, None)
+    
+    def stats(self) -> Dict:
+        return {"revoked": len(self._revoked), "last_id": self._last_id, "last_error": self.last_error}
+
+revocations = RevocationList(SessionLocal, REVOCATION_REFRESH_SECONDS)
@@ -0,0 +1,80 @@
+"""
+In-process caches for the authentication hot path
+
+get_current_user runs on every authenticated request. Decoded tokens are
+cached until the token expires, and user profiles by username for a short
+TTL, so most requests skip both the JWT signature check and the database.
+crud invalidates user entries whenever a user is created, updated or
+deleted; the TTL bounds staleness across worker processes.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import os
+import threading
+import time
+
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire at a wall-clock time"""
+    
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        """Cache value until expires_at (epoch seconds), or for the TTL, whichever is sooner"""
+        if self.max_entries <= 0:
+            return
+        deadline = time.time() + self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        with self._lock:
+            self._entries[key] = (value, deadline)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+# username -> schemas.UserResponse
+user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+
+# token -> schemas.TokenData, kept until the token's own expiry
+token_cache = TTLCache(TOKEN_CACHE_SIZE)
+
+def invalidate_user(*usernames: Optional[str]):
+    """Drop cached profiles after a user is created, changed or deleted"""
+    for username in usernames:
+        if username:
+            user_cache.invalidate(username)
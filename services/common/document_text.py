@@ -0,0 +1,50 @@
+"""
+Text extraction from uploaded documents (PDF, DOCX, TXT)
+
+Lives outside the service directories so extraction can run in worker
+processes, which need to import it by name.
+"""
+from typing import Iterator, List
+from io import BytesIO
+from langchain.docstore.document import Document
+import pypdf
+import docx
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt")
+
+def iter_pdf_pages(file_content: bytes) -> Iterator[Document]:
+    """Yield the non-empty pages of a PDF file as documents"""
+    pdf_file = BytesIO(file_content)
+    pdf_reader = pypdf.PdfReader(pdf_file)
+    
+    for i, page in enumerate(pdf_reader.pages):
+        text = page.extract_text()
+        if text.strip():
+            yield Document(
+                page_content=text,
+                metadata={"page": i + 1, "source": "pdf"}
+            )
+
+def iter_document_pages(filename: str, file_content: bytes) -> Iterator[Document]:
+    """
+    Yield the raw (unchunked) text of an uploaded file: one document per PDF
+    page, or a single document for DOCX and TXT files
+    """
+    name = filename.lower()
+    if name.endswith('.pdf'):
+        yield from iter_pdf_pages(file_content)
+    elif name.endswith('.docx'):
+        doc = docx.Document(BytesIO(file_content))
+        text = "\n".join(p.text for p in doc.paragraphs if p.text.strip())
+        if text.strip():
+            yield Document(page_content=text, metadata={"source": "docx"})
+    elif name.endswith('.txt'):
+        text = file_content.decode('utf-8')
+        if text.strip():
+            yield Document(page_content=text, metadata={"source": "txt"})
+    else:
+        raise ValueError("Unsupported file type. Please upload PDF, DOCX, or TXT files.")
+
+def extract_document_pages(filename: str, file_content: bytes) -> List[Document]:
+    """Extract all pages of an uploaded file at once (for use in worker processes)"""
+    return list(iter_document_pages(filename, file_content))
@@ -0,0 +1,109 @@
+"""
+Embedding backends
+
+Backends are registered by name with a factory returning a LangChain
+Embeddings object. The built-in "hashing" backend needs no model weights
+or downloads: it hashes word unigrams, word bigrams and character
+trigrams into a fixed-size signed vector with sublinear term weighting,
+so it works on air-gapped and CI nodes and produces vectors any vector
+store can use.
+"""
+from typing import Callable, Dict, List, Optional
+from functools import lru_cache
+from langchain_core.embeddings import Embeddings
+import numpy as np
+import os
+import zlib
+from .text_ranking import tokenize
+
+EMBEDDING_BACKENDS: Dict[str, Callable[[], Embeddings]] = {}
+
+def register_embedding_backend(name: str, factory: Callable[[], Embeddings]):
+    """Register (or replace) a named embedding backend"""
+    EMBEDDING_BACKENDS[name] = factory
+
+def create_embeddings(name: str) -> Embeddings:
+    """Create embeddings from a registered backend"""
+    if name not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{name}'. Available: {', '.join(EMBEDDING_BACKENDS)}")
+    return EMBEDDING_BACKENDS[name]()
+
+def load_embeddings(names: List[str]) -> Optional[Embeddings]:
+    """Create embeddings from the first of the named backends that loads"""
+    for name in names:
+        try:
+            return create_embeddings(name)
+        except Exception:
+            continue
+    return None
+
+@lru_cache(maxsize=200000)
+def _feature_bucket(feature: str, dimensions: int) -> int:
+    """Stable signed bucket for a feature: the sign is carried in the sign of the result"""
+    digest = zlib.crc32(feature.encode("utf-8"))
+    bucket = (digest >> 1) % dimensions
+    return bucket if digest & 1 else -bucket - 1
+
+class HashingEmbeddings(Embeddings):
+    """Dependency-light embeddings built from hashed n-gram features"""
+    
+    def __init__(self, dimensions: int = 512, char_ngram_weight: float = 0.5):
+        self.dimensions = dimensions
+        self.char_ngram_weight = char_ngram_weight
+    
+    def _features(self, text: str) -> Dict[str, float]:
+        tokens = tokenize(text)
+        features: Dict[str, float] = {}
+        for token in tokens:
+            features["w:" + token] = features.get("w:" + token, 0.0) + 1.0
+            padded = f"<{token}>"
+            for i in range(len(padded) - 2):
+                gram = "c:" + padded[i:i + 3]
+                features[gram] = features.get(gram, 0.0) + self.char_ngram_weight
+        for first, second in zip(tokens, tokens[1:]):
+            gram = f"b:{first} {second}"
+            features[gram] = features.get(gram, 0.0) + 1.0
+        return features
+    
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """Embed texts into an (n, dimensions) float32 array of unit vectors"""
+        rows, columns, values = [], [], []
+        for row, text in enumerate(texts):
+            for feature, count in self._features(text).items():
+                bucket = _feature_bucket(feature, self.dimensions)
+                rows.append(row)
+                if bucket >= 0:
+                    columns.append(bucket)
+                    values.append(count)
+                else:
+                    columns.append(-bucket - 1)
+                    values.append(-count)
+        
+        values = np.asarray(values, dtype=np.float32)
+        # Sublinear term weighting, keeping the hash sign
+        values = np.sign(values) * (1.0 + np.log(np.abs(values) + 1e-12)).clip(min=0.0)
+        flat_index = np.asarray(rows, dtype=np.int64) * self.dimensions + np.asarray(columns, dtype=np.int64)
+        vectors = np.bincount(
+            flat_index, weights=values, minlength=len(texts) * self.dimensions
+        ).astype(np.float32).reshape(len(texts), self.dimensions)
+        
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        return self.embed_array(texts).tolist()
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
+
+def _huggingface_embeddings() -> Embeddings:
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2"))
+
+register_embedding_backend("huggingface", _huggingface_embeddings)
+register_embedding_backend(
+    "hashing",
+    lambda: HashingEmbeddings(dimensions=int(os.getenv("HASHING_EMBEDDING_DIMENSIONS", "512")))
+)
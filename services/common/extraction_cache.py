@@ -0,0 +1,162 @@
+"""
+On-disk cache of extracted document text, keyed by file content hash
+
+Shared by the summarization and Q&A services so a file that has already
+been parsed (by either service, or for another user) is not parsed again.
+Entries are zlib-compressed JSON and the directory is kept under a size
+limit by evicting the least recently used entries. Separate containers
+share it through the extraction-cache volume in docker-compose.yml; each
+process only evicts the entries it has written or read, so with several
+of them the directory can grow past the limit by what the others hold.
+"""
+from typing import Dict, Iterator, List, Optional, Tuple
+from langchain.docstore.document import Document
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import zlib
+from .document_text import iter_document_pages
+
+def file_hash(file_content: bytes) -> str:
+    """SHA-256 of a file's content"""
+    return hashlib.sha256(file_content).hexdigest()
+
+class ExtractionCache:
+    """Size-bounded on-disk cache of the pages extracted from uploaded files"""
+    
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> (size on disk, last used); loaded from the directory on first use
+        self._entries: Optional[Dict[str, Tuple[int, float]]] = None
+        self._total_bytes = 0
+    
+    def _key(self, filename: str, content_hash: str) -> str:
+        # The same bytes extract differently depending on the file type
+        extension = os.path.splitext(filename.lower())[1].lstrip(".") or "bin"
+        return f"{content_hash}.{extension}"
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".json.z")
+    
+    def _load_index(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        self._total_bytes = 0
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json.z"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            self._entries[name[:-len(".json.z")]] = (stat.st_size, stat.st_mtime)
+            self._total_bytes += stat.st_size
+    
+    def get(self, filename: str, content_hash: str) -> Optional[List[Document]]:
+        """Get the cached pages of a file, or None on a miss"""
+        key = self._key(filename, content_hash)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                pages = json.loads(zlib.decompress(f.read()))
+        except (OSError, ValueError, zlib.error):
+            return None
+        
+        now = time.time()
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        with self._lock:
+            self._load_index()
+            if key in self._entries:
+                size = self._entries[key][0]
+            else:
+                # Written by another process sharing the directory
+                try:
+                    size = os.path.getsize(path)
+                except OSError:
+                    size = 0
+                self._total_bytes += size
+            self._entries[key] = (size, now)
+        
+        return [Document(page_content=text, metadata=metadata) for text, metadata in pages]
+    
+    def put(self, filename: str, content_hash: str, pages: List[Document]):
+        """Store the pages extracted from a file, evicting old entries if needed"""
+        key = self._key(filename, content_hash)
+        data = zlib.compress(
+            json.dumps([[page.page_content, page.metadata] for page in pages]).encode("utf-8")
+        )
+        if len(data) > self.max_bytes:
+            return
+        
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        
+        with self._lock:
+            self._load_index()
+            previous = self._entries.get(key)
+            if previous:
+                self._total_bytes -= previous[0]
+            self._entries[key] = (len(data), time.time())
+            self._total_bytes += len(data)
+            self._evict()
+    
+    def _evict(self):
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, (size, _) in sorted(self._entries.items(), key=lambda entry: entry[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            del self._entries[key]
+            self._total_bytes -= size
+    
+    def iter_pages(self, filename: str, file_content: bytes, content_hash: Optional[str] = None) -> Iterator[Document]:
+        """
+        Yield a file's pages from the cache, or extract them (streaming
+        page by page) and cache the result once extraction completes
+        """
+        content_hash = content_hash or file_hash(file_content)
+        cached = self.get(filename, content_hash)
+        if cached is not None:
+            yield from cached
+            return
+        
+        pages = []
+        for page in iter_document_pages(filename, file_content):
+            pages.append(page)
+            yield page
+        self.put(filename, content_hash, pages)
+    
+    def get_pages(self, filename: str, file_content: bytes, content_hash: Optional[str] = None) -> List[Document]:
+        """Get all of a file's pages, extracting and caching them on a miss"""
+        return list(self.iter_pages(filename, file_content, content_hash))
+
+# Shared cache used by the services
+extraction_cache = ExtractionCache(
+    os.getenv("EXTRACTION_CACHE_DIR", "./extraction_cache"),
+    int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+)
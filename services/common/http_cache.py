@@ -0,0 +1,32 @@
+"""
+Strong ETags and conditional GETs for prebuilt response bodies
+"""
+from fastapi import Request
+from fastapi.responses import Response
+import hashlib
+
+class PrebuiltResponse:
+    """A response body serialized once, with its strong ETag"""
+    
+    __slots__ = ("body", "etag", "media_type")
+    
+    def __init__(self, body: bytes, media_type: str = "application/json"):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.media_type = media_type
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison, as RFC 9110 asks)"""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def conditional_response(request: Request, prebuilt: PrebuiltResponse) -> Response:
+    """The prebuilt body, or 304 Not Modified when the client already has it"""
+    headers = {"ETag": prebuilt.etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, prebuilt.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=prebuilt.body, media_type=prebuilt.media_type, headers=headers)
@@ -0,0 +1,35 @@
+"""
+JSON encoding with pre-serialized fragments
+
+Values that are sent over and over (e.g. catalog resources) subclass
+RawJSON and carry their JSON text, encoded once. dumps() emits that text
+verbatim wherever such a value appears instead of re-encoding it.
+"""
+from typing import Any, List
+import json
+import re
+
+_RAW_PLACEHOLDER = re.compile(r'"\\u0001(\d+)\\u0001"')
+
+class RawJSON:
+    """A value with its JSON encoding precomputed in .json"""
+    
+    __slots__ = ("json",)
+    
+    def __init__(self, json_text: str):
+        self.json = json_text
+
+def dumps(value: Any) -> str:
+    """json.dumps, with RawJSON values spliced in from their precomputed text"""
+    fragments: List[str] = []
+    
+    def default(item: Any) -> str:
+        if isinstance(item, RawJSON):
+            fragments.append(item.json)
+            return f"\x01{len(fragments) - 1}\x01"
+        raise TypeError(f"Object of type {type(item).__name__} is not JSON serializable")
+    
+    text = json.dumps(value, default=default)
+    if not fragments:
+        return text
+    return _RAW_PLACEHOLDER.sub(lambda match: fragments[int(match.group(1))], text)
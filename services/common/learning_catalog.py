@@ -0,0 +1,360 @@
+"""
+Learning resource catalog loaded from a JSON file or SQLite database
+
+The catalog is compiled into an immutable snapshot: the subject list, the
+alias table and a SubjectIndex are built up front, while each subject's
+resources (its "shard") are compiled on first use, so memory grows with
+the subjects actually requested. For SQLite catalogs shards are read from
+the database on demand; JSON catalogs are parsed whole but only compiled
+per subject.
+
+Catalog-wide indexes (the skill graph, semantic search) are built from a
+compact summary of each subject instead of its full shard: resource titles,
+skills and prerequisites by level plus the text describing the subject.
+SQLite catalogs store the summaries in their own table, so loading or
+reloading a catalog reads one small table rather than every shard.
+
+CatalogStore watches the source file and, when it changes, builds a new
+snapshot in the background and swaps it in with a single reference
+assignment. Requests hold on to the snapshot they started with, so none
+are dropped or see a half-loaded catalog.
+
+JSON layout:
+    {"aliases": {"ml": "machine learning"},
+     "subjects": {"machine learning": {"beginner": [{...resource...}]}}}
+
+Convert a JSON catalog to SQLite with:
+    python -m services.common.learning_catalog catalog.json catalog.db
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from .subject_index import SubjectIndex
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS subjects (name TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS aliases (alias TEXT PRIMARY KEY, subject TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS resources (
+    id INTEGER PRIMARY KEY,
+    subject TEXT NOT NULL,
+    level TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS resources_by_subject ON resources (subject, level, position);
+CREATE TABLE IF NOT EXISTS subject_summaries (subject TEXT PRIMARY KEY, data TEXT NOT NULL);
+"""
+
+def summarize_shard(shard: Dict[str, List[Dict]]) -> Dict[str, Any]:
+    """
+    A subject's summary: each resource's title, skills and prerequisites by
+    level, and its resources' titles, skills and descriptions as one text
+    """
+    parts: List[str] = []
+    for items in shard.values():
+        for item in items:
+            parts.append(item.get("title", ""))
+            parts.extend(item.get("skills_covered", []))
+            parts.append(item.get("description", ""))
+    return {
+        "levels": {
+            level: [
+                {
+                    "title": item.get("title", ""),
+                    "skills_covered": list(item.get("skills_covered", [])),
+                    "prerequisites": list(item.get("prerequisites", []))
+                }
+                for item in items
+            ]
+            for level, items in shard.items()
+        },
+        "text": ". ".join(part for part in parts if part)
+    }
+
+class Catalog:
+    """Immutable compiled snapshot of the learning catalog"""
+    
+    def __init__(
+        self,
+        subjects: List[str],
+        aliases: Dict[str, str],
+        load_shard: Callable[[str], Dict[str, List[Dict]]],
+        compile_resource: Callable[[Dict], Any],
+        version: str,
+        load_summaries: Optional[Callable[[], Dict[str, Dict[str, Any]]]] = None
+    ):
+        self.subjects: Tuple[str, ...] = tuple(subjects)
+        self.aliases = dict(aliases)
+        self.version = version
+        self.subject_index = SubjectIndex(self.subjects, self.aliases)
+        self._subject_set = frozenset(self.subjects)
+        self._load_shard = load_shard
+        self._compile_resource = compile_resource
+        self._load_summaries = load_summaries
+        self._summaries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._shards: Dict[str, Dict[str, Tuple[Any, ...]]] = {}
+        self._derived: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+    
+    def __contains__(self, subject: str) -> bool:
+        return subject in self._subject_set
+    
+    def __len__(self) -> int:
+        return len(self.subjects)
+    
+    @property
+    def loaded_subjects(self) -> int:
+        return len(self._shards)
+    
+    def resources(self, subject: str) -> Dict[str, Tuple[Any, ...]]:
+        """Compiled resources of a subject by level, loading its shard on first use"""
+        shard = self._shards.get(subject)
+        if shard is not None:
+            return shard
+        if subject not in self._subject_set:
+            return {}
+        with self._lock:
+            shard = self._shards.get(subject)
+            if shard is None:
+                raw = self._load_shard(subject)
+                shard = {
+                    level: tuple(self._compile_resource(item) for item in items)
+                    for level, items in raw.items()
+                }
+                self._shards[subject] = shard
+        return shard
+    
+    def summaries(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Every subject's summary (see summarize_shard), loaded once per
+        snapshot. Subjects without a stored summary (e.g. in SQLite catalogs
+        written before summaries were added) are summarized from their shard.
+        """
+        summaries = self._summaries
+        if summaries is not None:
+            return summaries
+        with self._lock:
+            if self._summaries is None:
+                stored = self._load_summaries() if self._load_summaries else {}
+                self._summaries = {
+                    subject: stored.get(subject) or summarize_shard(self._load_shard(subject))
+                    for subject in self.subjects
+                }
+            return self._summaries
+    
+    def get_derived(self, subject: str, name: str) -> Optional[Any]:
+        """A derived structure if it has been built, else None"""
+        return self._derived.get((subject, name))
+    
+    def derived(self, subject: str, name: str, build: Callable[[], Any]) -> Any:
+        """
+        A structure derived from a subject's resources (e.g. ranking
+        features), built once per snapshot on first use
+        """
+        key = (subject, name)
+        value = self._derived.get(key)
+        if value is None:
+            value = build()
+            with self._lock:
+                value = self._derived.setdefault(key, value)
+        return value
+
+def _version(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+def load_json_catalog(path: str, compile_resource: Callable[[Dict], Any]) -> Catalog:
+    """Load a catalog from a JSON file"""
+    with open(path, "rb") as f:
+        content = f.read()
+    data = json.loads(content)
+    subjects = data.get("subjects")
+    if not isinstance(subjects, dict):
+        raise ValueError(f"Catalog {path} has no 'subjects' object")
+    return Catalog(
+        list(subjects),
+        data.get("aliases", {}),
+        lambda subject: {level: list(items) for level, items in subjects[subject].items()},
+        compile_resource,
+        hashlib.sha256(content).hexdigest()[:16],
+        # Already parsed, so summaries are computed on first use
+        lambda: {subject: summarize_shard(levels) for subject, levels in subjects.items()}
+    )
+
+def _connect_readonly(path: str) -> sqlite3.Connection:
+    return sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True, check_same_thread=False)
+
+def load_sqlite_catalog(path: str, compile_resource: Callable[[Dict], Any]) -> Catalog:
+    """Load a catalog from a SQLite database, reading resources per subject on demand"""
+    connection = _connect_readonly(path)
+    try:
+        subjects = [row[0] for row in connection.execute("SELECT name FROM subjects ORDER BY rowid")]
+        aliases = dict(connection.execute("SELECT alias, subject FROM aliases"))
+        counts = connection.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM resources").fetchone()
+    finally:
+        connection.close()
+    
+    def load_shard(subject: str) -> Dict[str, List[Dict]]:
+        shard_connection = _connect_readonly(path)
+        try:
+            rows = shard_connection.execute(
+                "SELECT level, data FROM resources WHERE subject = ? ORDER BY level, position", (subject,)
+            ).fetchall()
+        finally:
+            shard_connection.close()
+        shard: Dict[str, List[Dict]] = {}
+        for level, data in rows:
+            shard.setdefault(level, []).append(json.loads(data))
+        return shard
+    
+    def load_summaries() -> Dict[str, Dict[str, Any]]:
+        summary_connection = _connect_readonly(path)
+        try:
+            rows = summary_connection.execute("SELECT subject, data FROM subject_summaries").fetchall()
+        except sqlite3.OperationalError:
+            # Written before summaries were stored
+            return {}
+        finally:
+            summary_connection.close()
+        return {subject: json.loads(data) for subject, data in rows}
+    
+    return Catalog(
+        subjects, aliases, load_shard, compile_resource,
+        _version(subjects, aliases, counts, file_signature(path)), load_summaries
+    )
+
+def load_catalog(path: str, compile_resource: Callable[[Dict], Any]) -> Catalog:
+    """Load a catalog from a JSON file or SQLite database, chosen by extension"""
+    if path.lower().endswith(SQLITE_SUFFIXES):
+        return load_sqlite_catalog(path, compile_resource)
+    return load_json_catalog(path, compile_resource)
+
+def write_sqlite_catalog(data: Dict, path: str):
+    """Write a JSON-layout catalog into a SQLite database"""
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.executescript(SQLITE_SCHEMA)
+        connection.executemany("INSERT INTO subjects (name) VALUES (?)", [(subject,) for subject in data["subjects"]])
+        connection.executemany("INSERT INTO aliases (alias, subject) VALUES (?, ?)", list(data.get("aliases", {}).items()))
+        connection.executemany(
+            "INSERT INTO resources (subject, level, position, data) VALUES (?, ?, ?, ?)",
+            [
+                (subject, level, position, json.dumps(item, ensure_ascii=False))
+                for subject, levels in data["subjects"].items()
+                for level, items in levels.items()
+                for position, item in enumerate(items)
+            ]
+        )
+        connection.executemany(
+            "INSERT INTO subject_summaries (subject, data) VALUES (?, ?)",
+            [
+                (subject, json.dumps(summarize_shard(levels), ensure_ascii=False))
+                for subject, levels in data["subjects"].items()
+            ]
+        )
+        connection.commit()
+    finally:
+        connection.close()
+    # Swap the finished database in so readers never see a partial one
+    os.replace(tmp_path, path)
+
+def file_signature(path: str) -> Tuple:
+    """Modification time and size of a catalog file (and its SQLite WAL)"""
+    signature = []
+    for candidate in (path, path + "-wal"):
+        try:
+            stat = os.stat(candidate)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+class CatalogStore:
+    """Holds the current catalog snapshot and hot-reloads it when the source changes"""
+    
+    def __init__(self, path: str, compile_resource: Callable[[Dict], Any], check_interval: float = 5.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._compile_resource = compile_resource
+        self._listeners: List[Callable[[Catalog], None]] = []
+        self._reload_lock = threading.Lock()
+        self._reloading = False
+        self.last_error: Optional[str] = None
+        self.loaded_at = time.time()
+        self._signature = file_signature(path)
+        self._catalog = load_catalog(path, compile_resource)
+        self._next_check = time.monotonic() + check_interval
+    
+    def add_listener(self, listener: Callable[[Catalog], None]):
+        """Call listener with each new catalog after it has been swapped in"""
+        self._listeners.append(listener)
+    
+    def current(self) -> Catalog:
+        """The current snapshot; starts a background reload if the source changed"""
+        if self.check_interval > 0 and time.monotonic() >= self._next_check:
+            self._next_check = time.monotonic() + self.check_interval
+            if file_signature(self.path) != self._signature:
+                self._start_reload()
+        return self._catalog
+    
+    def _start_reload(self):
+        with self._reload_lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(target=self._reload_in_background, daemon=True).start()
+    
+    def _reload_in_background(self):
+        try:
+            self.reload()
+        except Exception:
+            pass
+        finally:
+            with self._reload_lock:
+                self._reloading = False
+    
+    def reload(self) -> Catalog:
+        """Load the source now and swap it in; the old snapshot stays on error"""
+        signature = file_signature(self.path)
+        try:
+            catalog = load_catalog(self.path, self._compile_resource)
+        except Exception as e:
+            # Keep serving the old catalog, and don't retry until the file changes again
+            self._signature = signature
+            self.last_error = str(e)
+            raise
+        self._signature = signature
+        self.last_error = None
+        self.loaded_at = time.time()
+        self._catalog = catalog
+        for listener in self._listeners:
+            listener(catalog)
+        return catalog
+    
+    def status(self) -> Dict[str, Any]:
+        catalog = self._catalog
+        return {
+            "source": self.path,
+            "version": catalog.version,
+            "subjects": len(catalog),
+            "loaded_subjects": catalog.loaded_subjects,
+            "loaded_at": self.loaded_at,
+            "last_error": self.last_error
+        }
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python -m services.common.learning_catalog <catalog.json> <catalog.db>")
+        sys.exit(1)
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        write_sqlite_catalog(json.load(f), sys.argv[2])
+    print(f"Wrote {sys.argv[2]}")
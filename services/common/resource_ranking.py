@@ -0,0 +1,189 @@
+"""
+Preference-aware ranking of learning resources
+
+Each list of resources is compiled once into feature arrays: a combined
+(type, cost tier) profile id per resource and an inverted index of the
+tokens in each resource's skills and title. A request's preferences become
+one small table over the profiles, so scoring every resource is a single
+vectorized gather plus a sparse update for the resources matching the
+learner's interests. Outside the interest matches resources only differ by
+profile and position, so the top k are taken from a heap over the profile
+groups without scoring every resource; when most resources match the
+interests, everything is scored at once and partially sorted.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import heapq
+import numpy as np
+from .text_ranking import stem, tokenize
+
+BUDGET_TIERS = {"free": 0, "low": 1, "medium": 2, "high": 3}
+
+# How well each resource type suits a learning style (0.5 when not listed)
+STYLE_TYPE_AFFINITY = {
+    "visual": {"video": 1.0, "course": 0.7, "article": 0.4, "book": 0.3},
+    "auditory": {"video": 0.8, "course": 0.7, "podcast": 1.0, "book": 0.2},
+    "kinesthetic": {"practice": 1.0, "project": 1.0, "course": 0.7, "video": 0.4, "book": 0.3},
+    "reading": {"book": 1.0, "article": 1.0, "course": 0.5, "video": 0.2},
+}
+
+WEIGHTS = {"type": 1.0, "budget": 1.0, "style": 0.6, "interests": 1.5}
+
+def top_k(scores: np.ndarray, k: int) -> List[int]:
+    """Indexes of the k highest scores, best first (earliest index on ties)"""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable").tolist()
+    if k <= 8:
+        # A few linear argmax passes beat a partition for small k
+        scores = scores.copy()
+        top = []
+        for _ in range(k):
+            best = int(scores.argmax())
+            top.append(best)
+            scores[best] = -np.inf
+        return top
+    threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+    above = np.flatnonzero(scores > threshold)
+    ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+    top = np.concatenate([above, ties])
+    return top[np.lexsort((top, -scores[top]))].tolist()
+
+def normalize_resource_type(resource_type: str) -> str:
+    """Singular, lowercase resource type (e.g. "Courses" -> "course")"""
+    return stem(resource_type.strip().lower())
+
+class RankingPreferences:
+    """A learner's preferences, as used by ResourceFeatures.rank"""
+    
+    def __init__(
+        self,
+        resource_types: Iterable[str] = (),
+        budget: Optional[str] = None,
+        learning_style: Optional[str] = None,
+        interests: Iterable[str] = ()
+    ):
+        self.resource_types = {normalize_resource_type(t) for t in resource_types if t.strip()}
+        self.budget_tier = BUDGET_TIERS.get((budget or "").strip().lower())
+        self.learning_style = (learning_style or "").lower()
+        self.interest_tokens = {token for interest in interests for token in tokenize(interest)}
+
+class ResourceFeatures:
+    """Feature arrays compiled from a list of resources"""
+    
+    def __init__(self, resources: Sequence):
+        self.count = len(resources)
+        self.type_vocabulary: Dict[str, int] = {}
+        type_ids = np.array(
+            [self.type_vocabulary.setdefault(normalize_resource_type(r.type), len(self.type_vocabulary)) for r in resources],
+            dtype=np.int32
+        )
+        # Tier + 1, so 0 means the resource has no (known) cost
+        cost_slots = np.array(
+            [BUDGET_TIERS.get((getattr(r, "cost", None) or "").lower(), -1) + 1 for r in resources],
+            dtype=np.int32
+        )
+        # Type and cost combined, so the per-request preference table is one gather
+        self.profile_ids = type_ids * (len(BUDGET_TIERS) + 1) + cost_slots
+        profiles = len(self.type_vocabulary) * (len(BUDGET_TIERS) + 1)
+        self.profile_rows = np.argsort(self.profile_ids, kind="stable").astype(np.int32)
+        self.profile_offsets = np.zeros(profiles + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.profile_ids, minlength=profiles), out=self.profile_offsets[1:])
+        
+        # Inverted index over the tokens of each resource's skills and title
+        self.token_vocabulary: Dict[str, int] = {}
+        owners, token_ids, token_counts = [], [], []
+        for row, resource in enumerate(resources):
+            tokens = set(tokenize(" ".join(list(resource.skills_covered) + [resource.title])))
+            for token in tokens:
+                owners.append(row)
+                token_ids.append(self.token_vocabulary.setdefault(token, len(self.token_vocabulary)))
+            token_counts.append(len(tokens))
+        order = np.argsort(np.array(token_ids, dtype=np.int32), kind="stable")
+        self.posting_rows = np.array(owners, dtype=np.int32)[order]
+        self.posting_offsets = np.zeros(len(self.token_vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(np.array(token_ids, dtype=np.int32), minlength=len(self.token_vocabulary)),
+                  out=self.posting_offsets[1:])
+        self.token_counts = np.maximum(np.array(token_counts, dtype=np.float32), 1.0)
+    
+    def _profile_table(self, preferences: RankingPreferences) -> np.ndarray:
+        """Score of every (type, cost) combination for the preferences"""
+        slots = len(BUDGET_TIERS) + 1
+        table = np.zeros((len(self.type_vocabulary), slots), dtype=np.float32)
+        affinity = STYLE_TYPE_AFFINITY.get(preferences.learning_style)
+        for resource_type, type_id in self.type_vocabulary.items():
+            if resource_type in preferences.resource_types:
+                table[type_id] += WEIGHTS["type"]
+            if affinity:
+                table[type_id] += WEIGHTS["style"] * affinity.get(resource_type, 0.5)
+        if preferences.budget_tier is not None:
+            budget_fit = [0.5] + [
+                1.0 if tier <= preferences.budget_tier else -(tier - preferences.budget_tier) / 3
+                for tier in range(len(BUDGET_TIERS))
+            ]
+            table += WEIGHTS["budget"] * np.array(budget_fit, dtype=np.float32)
+        return table.ravel()
+    
+    def _interest_rows(self, preferences: RankingPreferences) -> np.ndarray:
+        """Rows of the resources sharing tokens with the learner's interests (with repeats)"""
+        interest_ids = [self.token_vocabulary[t] for t in preferences.interest_tokens if t in self.token_vocabulary]
+        if not interest_ids:
+            return np.zeros(0, dtype=np.int32)
+        return np.concatenate([
+            self.posting_rows[self.posting_offsets[i]:self.posting_offsets[i + 1]] for i in interest_ids
+        ])
+    
+    def _interest_bonus(self, preferences: RankingPreferences, overlap: np.ndarray, token_counts: np.ndarray) -> np.ndarray:
+        # Fraction of the interests covered, with a small bonus for focused resources
+        coverage = overlap / len(preferences.interest_tokens)
+        focus = overlap / token_counts
+        return (WEIGHTS["interests"] * (coverage + 0.25 * focus)).astype(np.float32)
+    
+    def scores(self, preferences: RankingPreferences) -> np.ndarray:
+        """Score every resource against the preferences"""
+        if self.count == 0:
+            return np.zeros(0, dtype=np.float32)
+        scores = self._profile_table(preferences)[self.profile_ids]
+        rows = self._interest_rows(preferences)
+        if len(rows):
+            overlap = np.bincount(rows, minlength=self.count)
+            scores += self._interest_bonus(preferences, overlap, self.token_counts)
+        return scores
+    
+    def rank(self, preferences: RankingPreferences, k: int) -> List[int]:
+        """Indexes of the k best resources, best first"""
+        if self.count == 0 or k <= 0:
+            return []
+        rows = self._interest_rows(preferences)
+        if k >= self.count or len(rows) * 4 > self.count:
+            # Many resources match the interests: score everything at once
+            return top_k(self.scores(preferences), k)
+        
+        matched, overlap = np.unique(rows, return_counts=True)
+        bonus = self._interest_bonus(preferences, overlap, self.token_counts[matched])
+        table = self._profile_table(preferences)
+        candidates: List[Tuple[float, int]] = []
+        is_matched = np.zeros(self.count, dtype=bool)
+        if len(matched):
+            is_matched[matched] = True
+            matched_scores = table[self.profile_ids[matched]] + bonus
+            for index in top_k(matched_scores, k):
+                candidates.append((float(matched_scores[index]), int(matched[index])))
+        
+        # The other resources score by profile alone: walk the profile groups
+        # (each in catalog order) best-first with a heap, ties in catalog order
+        heap = []
+        for profile in np.flatnonzero(self.profile_offsets[1:] > self.profile_offsets[:-1]).tolist():
+            start = int(self.profile_offsets[profile])
+            heap.append((-float(table[profile]), int(self.profile_rows[start]), profile, start))
+        heapq.heapify(heap)
+        unmatched = 0
+        while heap and unmatched < k:
+            negative_score, row, profile, position = heapq.heappop(heap)
+            if not is_matched[row]:
+                candidates.append((-negative_score, row))
+                unmatched += 1
+            position += 1
+            if position < self.profile_offsets[profile + 1]:
+                heapq.heappush(heap, (negative_score, int(self.profile_rows[position]), profile, position))
+        
+        candidates.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+        return [row for _, row in candidates[:k]]
@@ -0,0 +1,82 @@
+"""
+Nearest-neighbour search over short labeled texts with embeddings
+
+Used to match free-text subjects and interests to catalog subjects and
+skills. The label texts are embedded once into a normalized matrix; a
+query is one embedding (cached, since the same phrases repeat) and one
+matrix-vector product.
+"""
+from typing import Dict, List, Sequence, Tuple
+from collections import OrderedDict
+from langchain_core.embeddings import Embeddings
+import numpy as np
+import threading
+from .resource_ranking import top_k
+from .subject_index import normalize_subject
+from .vector_store import normalize
+
+class CachedQueryEmbeddings(Embeddings):
+    """Wrap an embeddings model with an LRU cache of query vectors"""
+    
+    def __init__(self, embeddings: Embeddings, max_entries: int = 10000):
+        self.embeddings = embeddings
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+    
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_subject(text)
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is not None:
+                self._cache.move_to_end(key)
+                return vector
+        vector = self.embeddings.embed_query(key)
+        with self._lock:
+            self._cache[key] = vector
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return vector
+
+class SemanticIndex:
+    """Embedding index over labeled texts"""
+    
+    def __init__(self, embeddings: Embeddings, labels: Sequence[str], texts: Sequence[str], batch_size: int = 256):
+        self.embeddings = embeddings
+        self.labels = list(labels)
+        dimension = None
+        blocks = []
+        for start in range(0, len(texts), batch_size):
+            block = np.asarray(embeddings.embed_documents(list(texts[start:start + batch_size])), dtype=np.float32)
+            dimension = block.shape[1]
+            blocks.append(block)
+        self.matrix = normalize(np.concatenate(blocks)) if blocks else np.zeros((0, dimension or 1), dtype=np.float32)
+    
+    def __len__(self) -> int:
+        return len(self.labels)
+    
+    def search(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
+        """The k labels nearest to the query, with cosine similarities"""
+        if not self.labels or not query.strip():
+            return []
+        vector = normalize(np.asarray([self.embeddings.embed_query(query)], dtype=np.float32))[0]
+        scores = self.matrix @ vector
+        return [(self.labels[i], float(scores[i])) for i in top_k(scores, k)]
+
+def subject_profiles(subjects: Sequence[str], aliases: Dict[str, str], texts: Sequence[str]) -> List[str]:
+    """
+    Text describing each subject for embedding: its name and aliases
+    (repeated, so they dominate), plus the subject's text from its catalog
+    summary (its resources' titles, skills and descriptions)
+    """
+    aliases_by_subject: Dict[str, List[str]] = {}
+    for alias, subject in aliases.items():
+        aliases_by_subject.setdefault(subject, []).append(alias)
+    profiles = []
+    for subject, text in zip(subjects, texts):
+        names = [subject] + aliases_by_subject.get(subject, [])
+        profiles.append(". ".join(part for part in names * 3 + [text] if part))
+    return profiles
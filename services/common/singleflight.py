@@ -0,0 +1,86 @@
+"""
+Request coalescing ("single-flight") for expensive blocking calls
+
+Concurrent callers using the same key share one execution of the call,
+run in the thread pool, and all receive its result (or exception). If every
+caller waiting on a call goes away (e.g. their clients disconnect), the
+call is forgotten so the next caller starts afresh. A call already running
+in a worker thread cannot be interrupted: it runs to completion and its
+result is discarded.
+"""
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi.concurrency import run_in_threadpool
+import asyncio
+import hashlib
+import json
+
+# How often waiters check whether their client has disconnected
+DISCONNECT_POLL_SECONDS = 0.5
+
+class ClientDisconnected(Exception):
+    """The client went away while waiting for a shared call"""
+
+def fingerprint(*parts: Any) -> str:
+    """Stable key for a call from its (JSON-serializable) inputs"""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+class _Flight:
+    def __init__(self, task: "asyncio.Future"):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution"""
+    
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.calls = 0
+        self.coalesced = 0
+    
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+    
+    async def run(
+        self,
+        key: str,
+        func: Callable[..., Any],
+        *args: Any,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> Any:
+        """
+        Run func(*args) in the thread pool, or join an identical call that is
+        already running. With is_disconnected, stop waiting (raising
+        ClientDisconnected) once the caller's client has gone away.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            self.calls += 1
+            flight = _Flight(asyncio.ensure_future(run_in_threadpool(func, *args)))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        else:
+            self.coalesced += 1
+        
+        flight.waiters += 1
+        try:
+            if is_disconnected is None:
+                return await asyncio.shield(flight.task)
+            while True:
+                done, _ = await asyncio.wait({flight.task}, timeout=DISCONNECT_POLL_SECONDS)
+                if done:
+                    return flight.task.result()
+                if await is_disconnected():
+                    raise ClientDisconnected()
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is waiting for the result any more. This only stops
+                # the call if it has not started; a running one finishes in
+                # its thread and the result is dropped.
+                flight.task.cancel()
+                self._forget(key, flight)
+    
+    def _forget(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -0,0 +1,205 @@
+"""
+Skill prerequisite graph compiled from the learning catalog
+
+Prerequisites come from each resource's optional "prerequisites" list (the
+skills it expects) and, failing that, from the catalog's levels: a skill
+first taught at one level of a subject depends on the skills first taught
+at the level below. Skills are numbered in topological order and each
+keeps the transitive closure of its prerequisites as an int bitset, so
+"what do I still need to reach X" is a few ORs and an AND-NOT, and the
+set bits of the answer read out already in learning order.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from .subject_index import normalize_subject
+
+LEVEL_ORDER = ("beginner", "intermediate", "advanced")
+
+def _bits(mask: int) -> Iterable[int]:
+    """Indexes of the set bits of mask, ascending"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+def _popcount(mask: int) -> int:
+    """Number of set bits (int.bit_count needs Python 3.10)"""
+    return bin(mask).count("1")
+
+class SkillGraph:
+    """Prerequisite DAG over skills with precomputed transitive closures"""
+    
+    def __init__(self, shards: Dict[str, Dict[str, List[Dict]]]):
+        names: Dict[str, str] = {}
+        prerequisites: Dict[str, Set[str]] = {}
+        # (subject, level, title, taught skills)
+        resources: List[Tuple[str, str, str, List[str]]] = []
+        
+        def key(skill: str) -> str:
+            normalized = normalize_subject(skill)
+            names.setdefault(normalized, skill)
+            prerequisites.setdefault(normalized, set())
+            return normalized
+        
+        for subject, shard in shards.items():
+            introduced: List[Set[str]] = []
+            seen: Set[str] = set()
+            for level in LEVEL_ORDER:
+                level_skills = set()
+                for item in shard.get(level, []):
+                    taught = [key(skill) for skill in item.get("skills_covered", [])]
+                    required = [key(skill) for skill in item.get("prerequisites", [])]
+                    for skill in taught:
+                        prerequisites[skill].update(r for r in required if r != skill)
+                    resources.append((subject, level, item.get("title", ""), taught))
+                    level_skills.update(skill for skill in taught if skill not in seen)
+                seen |= level_skills
+                introduced.append(level_skills)
+            # Skills new at a level build on the skills new at the level below
+            for lower, upper in zip(introduced, introduced[1:]):
+                for skill in upper:
+                    if not prerequisites[skill] and lower:
+                        prerequisites[skill].update(lower - {skill})
+        
+        order, self.dropped_edges = self._topological_order(prerequisites)
+        self.skills: List[str] = [names[skill] for skill in order]
+        self._index: Dict[str, int] = {skill: i for i, skill in enumerate(order)}
+        
+        # Closures in topological order: prerequisites are always done first
+        self._direct: List[int] = [0] * len(order)
+        self._closure: List[int] = [0] * len(order)
+        for i, skill in enumerate(order):
+            direct = 0
+            for prerequisite in prerequisites[skill]:
+                j = self._index[prerequisite]
+                if j < i:
+                    direct |= 1 << j
+            self._direct[i] = direct
+            closure = direct
+            for j in _bits(direct):
+                closure |= self._closure[j]
+            self._closure[i] = closure
+        
+        self.resources = [
+            {
+                "subject": subject,
+                "level": level,
+                "title": title,
+                "teaches": sum(1 << self._index[skill] for skill in set(taught))
+            }
+            for subject, level, title, taught in resources
+        ]
+        # Resources teaching each skill, for picking what covers a gap
+        self._teachers: List[List[int]] = [[] for _ in order]
+        for r, resource in enumerate(self.resources):
+            for i in _bits(resource["teaches"]):
+                self._teachers[i].append(r)
+    
+    @staticmethod
+    def _topological_order(prerequisites: Dict[str, Set[str]]) -> Tuple[List[str], int]:
+        """
+        Depth-first topological order (prerequisites first, ties in catalog
+        order). Edges closing a cycle are ignored and counted.
+        """
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1 = on the stack, 2 = done
+        dropped = 0
+        for root in prerequisites:
+            if root in state:
+                continue
+            stack = [(root, iter(sorted(prerequisites[root])))]
+            state[root] = 1
+            while stack:
+                node, children = stack[-1]
+                for child in children:
+                    if state.get(child) == 1:
+                        dropped += 1
+                    elif child not in state:
+                        state[child] = 1
+                        stack.append((child, iter(sorted(prerequisites[child]))))
+                        break
+                else:
+                    stack.pop()
+                    state[node] = 2
+                    order.append(node)
+        return order, dropped
+    
+    def __len__(self) -> int:
+        return len(self.skills)
+    
+    def index(self, skill: str) -> Optional[int]:
+        return self._index.get(normalize_subject(skill))
+    
+    def mask(self, skills: Iterable[str]) -> int:
+        """Bitset of the known skills among skills"""
+        mask = 0
+        for skill in skills:
+            i = self.index(skill)
+            if i is not None:
+                mask |= 1 << i
+        return mask
+    
+    def with_prerequisites(self, mask: int) -> int:
+        """The skills in mask plus everything they transitively depend on"""
+        result = mask
+        for i in _bits(mask):
+            result |= self._closure[i]
+        return result
+    
+    def names(self, mask: int) -> List[str]:
+        """Skill names in mask, in learning (topological) order"""
+        return [self.skills[i] for i in _bits(mask)]
+    
+    def prerequisites(self, skill: str, transitive: bool = True) -> List[str]:
+        i = self.index(skill)
+        if i is None:
+            return []
+        return self.names(self._closure[i] if transitive else self._direct[i])
+    
+    def order_key(self, skills: Iterable[str]) -> int:
+        """
+        Sort key placing a resource after those teaching its prerequisites:
+        the topological position of the earliest skill it teaches
+        """
+        positions = [i for i in (self.index(skill) for skill in skills) if i is not None]
+        return min(positions) if positions else len(self.skills)
+    
+    def skill_gap(self, targets: Sequence[str], known: Sequence[str]) -> Dict:
+        """
+        Skills still needed to reach the targets from the known skills (a
+        known skill implies its prerequisites), in learning order, and
+        resources covering them picked greedily
+        """
+        known_mask = self.with_prerequisites(self.mask(known))
+        needed = self.with_prerequisites(self.mask(targets)) & ~known_mask
+        
+        # Greedy set cover over the resources teaching any needed skill
+        candidates = sorted({r for i in _bits(needed) for r in self._teachers[i]})
+        remaining = needed
+        chosen = []
+        while remaining:
+            best, best_gain = None, 0
+            for r in candidates:
+                gain = _popcount(self.resources[r]["teaches"] & remaining)
+                if gain > best_gain:
+                    best, best_gain = self.resources[r], gain
+            if best is None:
+                break
+            chosen.append(best)
+            remaining &= ~best["teaches"]
+        # Take resources in the order of the earliest needed skill each one teaches
+        chosen.sort(key=lambda resource: ((resource["teaches"] & needed) & -(resource["teaches"] & needed)).bit_length())
+        
+        return {
+            "needed_skills": self.names(needed),
+            "resources": [
+                {
+                    "title": resource["title"],
+                    "subject": resource["subject"],
+                    "level": resource["level"],
+                    "teaches": self.names(resource["teaches"] & needed)
+                }
+                for resource in chosen
+            ],
+            "uncovered_skills": self.names(remaining),
+            "unknown_skills": [skill for skill in list(targets) + list(known) if self.index(skill) is None]
+        }
@@ -0,0 +1,240 @@
+"""
+Study time parsing and scheduling
+
+Free-text time commitments ("5 hours/week", "1 hour a day", "full-time"),
+timelines ("3 months", "1 year") and resource durations ("6 hours",
+"4-6 weeks", "8 months") are parsed into hours and weeks. The scheduler
+then picks the resources that fit the learner's total time budget, with an
+exact 0/1 knapsack over quarter hours when the table is small enough and a
+value-per-hour greedy pass otherwise, and lays them out week by week.
+Weekly hours are floored at MIN_WEEKLY_HOURS and capped at
+MAX_WEEKLY_HOURS (a commitment beyond the hours in a week is not
+recognized), and only the first MAX_PLANNED_WEEKS weeks are listed; the
+rest of the plan is summarized.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import math
+import re
+import numpy as np
+
+HOURS_PER_UNIT = {"minute": 1 / 60, "hour": 1.0, "day": 24.0}
+WEEKS_PER_UNIT = {"day": 1 / 7, "week": 1.0, "month": 52 / 12, "year": 52.0}
+PERIODS_PER_WEEK = {"day": 7.0, "week": 1.0, "month": 12 / 52, "year": 1 / 52}
+
+NAMED_COMMITMENTS = {"full time": 40.0, "fulltime": 40.0, "part time": 20.0, "parttime": 20.0, "weekends": 8.0}
+
+# Study hours per week assumed when a resource's duration is given in weeks/months
+RESOURCE_HOURS_PER_WEEK = 5.0
+
+# Knapsack time resolution (slots per hour), and the table size (items x
+# slots) above which the greedy pass is used instead
+DP_SLOTS_PER_HOUR = 4
+DP_MAX_CELLS = 2_000_000
+
+# Least and most weekly study time planned for, and the most weeks listed
+# one by one
+MIN_WEEKLY_HOURS = 0.5
+MAX_WEEKLY_HOURS = 80.0
+HOURS_IN_A_WEEK = 7 * 24.0
+MAX_PLANNED_WEEKS = 260
+
+_AMOUNT = r"(\d+(?:\.\d+)?)(?:\s*(?:-|to|–)\s*(\d+(?:\.\d+)?))?"
+_UNIT = r"(minute|min|hour|hr|h|day|week|wk|month|mo|year|yr)s?\b"
+_UNIT_ALIASES = {"min": "minute", "hr": "hour", "h": "hour", "wk": "week", "mo": "month", "yr": "year"}
+_QUANTITY = re.compile(_AMOUNT + r"\s*" + _UNIT)
+_PER_PERIOD = re.compile(r"(?:/|\bper\b|\ba\b|\beach\b|\bevery\b)\s*(day|week|wk|month|year)")
+_WORD_NUMBERS = {"a": "1", "an": "1", "one": "1", "two": "2", "three": "3", "four": "4", "six": "6", "twelve": "12"}
+
+def _normalize(text: str) -> str:
+    text = (text or "").lower().replace("-", " - ").replace("  ", " ")
+    return " ".join(_WORD_NUMBERS.get(word, word) for word in text.split())
+
+def _quantity(text: str) -> Optional[Tuple[float, str]]:
+    """The first "<amount> <unit>" in text, ranges averaged"""
+    match = _QUANTITY.search(text.replace(" - ", "-"))
+    if not match:
+        return None
+    low = float(match.group(1))
+    high = float(match.group(2)) if match.group(2) else low
+    return (low + high) / 2, _UNIT_ALIASES.get(match.group(3), match.group(3))
+
+def parse_weekly_hours(text: str) -> Optional[float]:
+    """
+    Weekly study hours from a time commitment, capped at MAX_WEEKLY_HOURS,
+    or None if unrecognized or longer than a week ("30 hours a day")
+    """
+    normalized = _normalize(text)
+    for name, hours in NAMED_COMMITMENTS.items():
+        if name in normalized.replace(" - ", " "):
+            return hours
+    quantity = _quantity(normalized)
+    if quantity is None:
+        return None
+    amount, unit = quantity
+    if unit not in HOURS_PER_UNIT:
+        return None
+    hours = amount * HOURS_PER_UNIT[unit]
+    # Matched before "a"/"an" became numbers, so "1 hour a day" keeps its period
+    period = _PER_PERIOD.search((text or "").lower())
+    per = _UNIT_ALIASES.get(period.group(1), period.group(1)) if period else "week"
+    weekly = hours * PERIODS_PER_WEEK[per]
+    if weekly > HOURS_IN_A_WEEK:
+        return None
+    return min(weekly, MAX_WEEKLY_HOURS)
+
+def parse_weeks(text: str) -> Optional[float]:
+    """Length of a timeline in weeks ("3 months" -> 13), or None if open-ended"""
+    quantity = _quantity(_normalize(text))
+    if quantity is None or quantity[1] not in WEEKS_PER_UNIT:
+        return None
+    amount, unit = quantity
+    return amount * WEEKS_PER_UNIT[unit]
+
+def parse_duration_hours(text: str, hours_per_week: float = RESOURCE_HOURS_PER_WEEK) -> Optional[float]:
+    """
+    Study hours needed for a resource: durations in minutes or hours are
+    taken as-is, longer ones at hours_per_week. None if open-ended
+    ("Ongoing") or unrecognized.
+    """
+    quantity = _quantity(_normalize(text))
+    if quantity is None:
+        return None
+    amount, unit = quantity
+    if unit in ("minute", "hour"):
+        return amount * HOURS_PER_UNIT[unit]
+    return amount * WEEKS_PER_UNIT[unit] * hours_per_week
+
+class ScheduleItem:
+    """
+    A resource to schedule: its hours, value, position in the path and
+    phase. build_schedule sets weeks to the (first, last) week the item is
+    planned in, or None if it was deferred.
+    """
+    
+    __slots__ = ("title", "hours", "value", "order", "phase", "weeks")
+    
+    def __init__(self, title: str, hours: float, value: float, order: int, phase: Optional[int] = None):
+        self.title = title
+        self.hours = hours
+        self.value = value
+        self.order = order
+        self.phase = phase
+        self.weeks: Optional[Tuple[int, int]] = None
+
+def select_knapsack(items: Sequence[ScheduleItem], capacity_hours: float) -> List[ScheduleItem]:
+    """
+    Exact 0/1 knapsack over quarter hours (item hours rounded up), one
+    vectorized row per item
+    """
+    capacity = int(capacity_hours * DP_SLOTS_PER_HOUR)
+    weights = [max(1, math.ceil(item.hours * DP_SLOTS_PER_HOUR - 1e-9)) for item in items]
+    best = np.zeros(capacity + 1, dtype=np.float64)
+    taken = np.zeros((len(items), capacity + 1), dtype=bool)
+    for i, (item, weight) in enumerate(zip(items, weights)):
+        if weight > capacity:
+            continue
+        candidate = best[:capacity + 1 - weight] + item.value
+        improved = candidate > best[weight:]
+        taken[i, weight:] = improved
+        best[weight:] = np.where(improved, candidate, best[weight:])
+    
+    chosen = []
+    c = capacity
+    for i in range(len(items) - 1, -1, -1):
+        if taken[i, c]:
+            chosen.append(items[i])
+            c -= weights[i]
+    return chosen
+
+def select_greedy(items: Sequence[ScheduleItem], capacity_hours: float) -> List[ScheduleItem]:
+    """Take items by value per hour while they fit"""
+    chosen = []
+    remaining = capacity_hours
+    for item in sorted(items, key=lambda item: (-item.value / max(item.hours, 0.25), item.order)):
+        if item.hours <= remaining:
+            chosen.append(item)
+            remaining -= item.hours
+    return chosen
+
+def plan_weeks(items: Sequence[ScheduleItem], weekly_hours: float, max_weeks: Optional[int] = None) -> List[Dict]:
+    """
+    Lay items out in order over weeks of weekly_hours, splitting across
+    weeks as needed and stopping after max_weeks weeks
+    """
+    weeks: List[Dict] = []
+    week = {"week": 1, "hours": 0.0, "resources": []}
+    
+    def fill() -> bool:
+        nonlocal week
+        for item in items:
+            remaining = item.hours
+            while remaining > 1e-9:
+                free = weekly_hours - week["hours"]
+                if free <= 1e-9:
+                    weeks.append(week)
+                    if max_weeks is not None and len(weeks) >= max_weeks:
+                        return False
+                    week = {"week": week["week"] + 1, "hours": 0.0, "resources": []}
+                    continue
+                hours = min(free, remaining)
+                entry = {"title": item.title, "hours": round(hours, 2)}
+                if item.phase is not None:
+                    entry["phase"] = item.phase
+                week["resources"].append(entry)
+                week["hours"] += hours
+                remaining -= hours
+        return True
+    
+    if fill() and week["resources"]:
+        weeks.append(week)
+    for week in weeks:
+        week["hours"] = round(week["hours"], 2)
+    return weeks
+
+def build_schedule(items: Sequence[ScheduleItem], weekly_hours: float,
+                   deadline_weeks: Optional[float], mode: str = "auto") -> Dict:
+    """
+    Choose the items that fit weekly_hours x deadline_weeks (everything if
+    there is no deadline) and plan them week by week, in path order.
+    mode is "dp", "greedy" or "auto" (dp when the table is small enough).
+    Weeks past MAX_PLANNED_WEEKS are summarized in beyond_horizon.
+    """
+    weekly_hours = max(weekly_hours, MIN_WEEKLY_HOURS)
+    capacity = weekly_hours * deadline_weeks if deadline_weeks else None
+    if capacity is None or sum(item.hours for item in items) <= capacity:
+        chosen, used = list(items), "all"
+    elif mode == "greedy" or (mode == "auto" and len(items) * capacity * DP_SLOTS_PER_HOUR > DP_MAX_CELLS):
+        chosen, used = select_greedy(items, capacity), "greedy"
+    else:
+        chosen, used = select_knapsack(items, capacity), "dp"
+    
+    chosen.sort(key=lambda item: item.order)
+    
+    # Weeks each item spans, from the running total of hours before it
+    for item in items:
+        item.weeks = None
+    start = 0.0
+    for item in chosen:
+        end = start + item.hours
+        item.weeks = (int(start / weekly_hours + 1e-9) + 1, max(1, math.ceil(end / weekly_hours - 1e-9)))
+        start = end
+    total_weeks = chosen[-1].weeks[1] if chosen else 0
+    
+    weeks = plan_weeks(chosen, weekly_hours, MAX_PLANNED_WEEKS)
+    beyond_horizon = None
+    if total_weeks > len(weeks):
+        beyond_horizon = {
+            "weeks": total_weeks - len(weeks),
+            "hours": round(start - weekly_hours * len(weeks), 2),
+            "resources": [item.title for item in chosen if item.weeks[1] > len(weeks)]
+        }
+    return {
+        "weekly_hours": round(weekly_hours, 2),
+        "deadline_weeks": round(deadline_weeks, 1) if deadline_weeks else None,
+        "total_hours": round(start, 2),
+        "total_weeks": total_weeks,
+        "selection": used,
+        "weeks": weeks,
+        "beyond_horizon": beyond_horizon,
+        "deferred": [item.title for item in items if item.weeks is None]
+    }
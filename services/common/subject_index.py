@@ -0,0 +1,166 @@
+"""
+Precompiled subject index with aliases, token lookup and fuzzy matching
+
+Subject names and aliases are normalized into an exact-match table, and
+their tokens into posting lists. Misspelled tokens are matched within a
+bounded edit distance through a deletion-neighbourhood table (every
+vocabulary token is stored under each variant with up to N characters
+deleted), so a lookup only generates the variants of the query's own
+tokens and its cost doesn't grow with the size of the catalog.
+"""
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import math
+import re
+from .text_ranking import tokenize
+
+_NON_WORD = re.compile(r"[^\w+#]+")
+
+def normalize_subject(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+def max_edits_for(token: str) -> int:
+    """Edit distance tolerated for a token: none for short tokens"""
+    if len(token) < 4:
+        return 0
+    return 1 if len(token) < 8 else 2
+
+def _deletes(token: str, distance: int) -> Set[str]:
+    """All variants of a token with up to `distance` characters deleted"""
+    variants = {token}
+    frontier = {token}
+    for _ in range(distance):
+        frontier = {word[:i] + word[i + 1:] for word in frontier for i in range(len(word))}
+        variants |= frontier
+    return variants
+
+def bounded_edit_distance(a: str, b: str, limit: int) -> Optional[int]:
+    """Levenshtein distance between a and b, or None if it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, start=1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            )
+        if min(current) > limit:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= limit else None
+
+class SubjectMatch:
+    """A candidate subject for a query"""
+    
+    __slots__ = ("subject", "score", "match_type")
+    
+    def __init__(self, subject: str, score: float, match_type: str):
+        self.subject = subject
+        self.score = score
+        self.match_type = match_type  # exact, alias, token, fuzzy
+    
+    def to_dict(self) -> Dict:
+        return {"subject": self.subject, "score": round(self.score, 3), "match_type": self.match_type}
+
+class SubjectIndex:
+    """Resolve free-text subjects to catalog subjects"""
+    
+    def __init__(self, subjects: Iterable[str], aliases: Optional[Dict[str, str]] = None):
+        self.subjects: List[str] = list(subjects)
+        subject_ids = {subject: i for i, subject in enumerate(self.subjects)}
+        
+        # Exact table: normalized name or alias -> (subject id, is alias)
+        self._exact: Dict[str, Tuple[int, bool]] = {}
+        for subject, i in subject_ids.items():
+            self._exact[normalize_subject(subject)] = (i, False)
+        for alias, subject in (aliases or {}).items():
+            if subject in subject_ids:
+                self._exact.setdefault(normalize_subject(alias), (subject_ids[subject], True))
+        
+        # Token postings over subject names and aliases
+        self._postings: Dict[str, Set[int]] = {}
+        for name, (i, _) in self._exact.items():
+            for token in tokenize(name):
+                self._postings.setdefault(token, set()).add(i)
+        self._subject_tokens: List[Set[str]] = [set(tokenize(subject)) for subject in self.subjects]
+        
+        count = max(len(self.subjects), 1)
+        self._idf = {
+            token: math.log(1 + count / len(ids))
+            for token, ids in self._postings.items()
+        }
+        
+        # Deletion neighbourhood: variant -> vocabulary tokens
+        self._variants: Dict[str, Set[str]] = {}
+        for token in self._postings:
+            for variant in _deletes(token, max_edits_for(token)):
+                self._variants.setdefault(variant, set()).add(token)
+    
+    def __len__(self) -> int:
+        return len(self.subjects)
+    
+    def _token_matches(self, token: str) -> List[Tuple[str, float]]:
+        """Vocabulary tokens matching a query token, with a similarity weight"""
+        if token in self._postings:
+            return [(token, 1.0)]
+        limit = max_edits_for(token)
+        if limit == 0:
+            return []
+        candidates: Set[str] = set()
+        for variant in _deletes(token, limit):
+            candidates |= self._variants.get(variant, set())
+        matches = []
+        for candidate in candidates:
+            distance = bounded_edit_distance(token, candidate, min(limit, max_edits_for(candidate)))
+            if distance is not None:
+                matches.append((candidate, 1.0 - distance / (len(candidate) + 1)))
+        return matches
+    
+    def resolve(self, query: str, limit: int = 5) -> List[SubjectMatch]:
+        """Rank the subjects matching a free-text query, best first"""
+        normalized = normalize_subject(query)
+        exact = self._exact.get(normalized)
+        if exact is not None:
+            subject_id, is_alias = exact
+            matches = [SubjectMatch(self.subjects[subject_id], 1.0, "alias" if is_alias else "exact")]
+            matches.extend(match for match in self._resolve_tokens(normalized, limit + 1) if match.subject != matches[0].subject)
+            return matches[:limit]
+        return self._resolve_tokens(normalized, limit)
+    
+    def _resolve_tokens(self, normalized: str, limit: int) -> List[SubjectMatch]:
+        query_tokens = list(dict.fromkeys(tokenize(normalized)))
+        if not query_tokens:
+            return []
+        
+        scores: Dict[int, float] = {}
+        fuzzy: Set[int] = set()
+        query_weight = 0.0
+        for token in query_tokens:
+            matches = self._token_matches(token)
+            best_idf = max((self._idf[match] for match, _ in matches), default=math.log(1 + len(self.subjects)))
+            query_weight += best_idf
+            # Each subject takes its best match for this query token
+            best: Dict[int, float] = {}
+            for match, similarity in matches:
+                weight = similarity * self._idf[match]
+                for subject_id in self._postings[match]:
+                    if weight > best.get(subject_id, 0.0):
+                        best[subject_id] = weight
+                    if similarity < 1.0:
+                        fuzzy.add(subject_id)
+            for subject_id, weight in best.items():
+                scores[subject_id] = scores.get(subject_id, 0.0) + weight
+        
+        ranked = []
+        for subject_id, score in scores.items():
+            # Blend query coverage with how much of the subject name was matched
+            query_coverage = score / query_weight
+            subject_weight = sum(self._idf[token] for token in self._subject_tokens[subject_id]) or score
+            subject_coverage = min(1.0, score / subject_weight)
+            final = 0.95 * (0.7 * query_coverage + 0.3 * subject_coverage)
+            ranked.append(SubjectMatch(self.subjects[subject_id], final, "fuzzy" if subject_id in fuzzy else "token"))
+        ranked.sort(key=lambda match: (-match.score, match.subject))
+        return ranked[:limit]
@@ -0,0 +1,90 @@
+"""
+Lightweight lexical ranking helpers: sentence splitting with offsets,
+tokenization and BM25 scoring
+"""
+from typing import Dict, List, Sequence, Tuple
+import math
+import re
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])[\"')\]]*\s+|\n\s*\n|\n(?=\s*[-*•\d])")
+_TOKEN = re.compile(r"\w+")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from had has have how i if in
+is it its of on or so that the their then there these this to was were what
+when where which who why will with you your
+""".split())
+
+def split_sentences(text: str) -> List[Tuple[int, int]]:
+    """
+    Split text into sentences, returning (start, end) character offsets
+    with surrounding whitespace trimmed
+    """
+    spans = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        spans.append((start, match.start()))
+        start = match.end()
+    spans.append((start, len(text)))
+    
+    trimmed = []
+    for start, end in spans:
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            trimmed.append((start, end))
+    return trimmed
+
+def stem(token: str) -> str:
+    """Strip common English inflections (e.g. returns -> return)"""
+    if len(token) > 4:
+        if token.endswith("ies"):
+            return token[:-3] + "y"
+        for suffix in ("ing", "ed", "es", "s"):
+            if token.endswith(suffix) and not token.endswith("ss"):
+                return token[:-len(suffix)]
+    return token
+
+def tokenize(text: str, drop_stopwords: bool = True) -> List[str]:
+    """Lowercase, lightly stemmed word tokens, optionally without common stopwords"""
+    tokens = _TOKEN.findall(text.lower())
+    if drop_stopwords:
+        tokens = [token for token in tokens if token not in STOPWORDS]
+    return [stem(token) for token in tokens]
+
+def bm25_scores(query_tokens: Sequence[str], documents: Sequence[Sequence[str]],
+                k1: float = 1.5, b: float = 0.75) -> List[float]:
+    """
+    Score tokenized documents against a tokenized query with Okapi BM25,
+    using document frequencies from the given documents
+    """
+    n = len(documents)
+    if n == 0:
+        return []
+    
+    avg_length = sum(len(doc) for doc in documents) / n or 1.0
+    document_frequency: Dict[str, int] = {}
+    for doc in documents:
+        for token in set(doc):
+            document_frequency[token] = document_frequency.get(token, 0) + 1
+    
+    query_terms = set(query_tokens)
+    idf = {
+        term: math.log(1 + (n - document_frequency.get(term, 0) + 0.5) / (document_frequency.get(term, 0) + 0.5))
+        for term in query_terms
+    }
+    
+    scores = []
+    for doc in documents:
+        term_frequency: Dict[str, int] = {}
+        for token in doc:
+            if token in query_terms:
+                term_frequency[token] = term_frequency.get(token, 0) + 1
+        norm = k1 * (1 - b + b * len(doc) / avg_length)
+        scores.append(sum(
+            idf[term] * tf * (k1 + 1) / (tf + norm)
+            for term, tf in term_frequency.items()
+        ))
+    return scores
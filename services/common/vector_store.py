@@ -0,0 +1,301 @@
+"""
+In-memory vector store with optional float16 / int8 scalar-quantized
+embedding storage
+
+Embeddings are normalized on insert so dot products are cosine
+similarities. With int8 storage each vector keeps its own scale
+(max |component| / 127), cutting memory per chunk about 4x compared to
+float32; float16 halves it. Queries are scored against the quantized
+vectors in blocks, and the best candidates can optionally be rescored
+exactly from full-precision copies kept in a memory-mapped file on disk,
+so they don't count against resident memory.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+import numpy as np
+import os
+import threading
+import uuid
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# Rows scored per block, bounding the temporary float32 copy of a block
+SCORE_BLOCK_ROWS = 65536
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize the rows of a 2-D array"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+def quantize(vectors: np.ndarray, precision: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Convert float32 rows to the storage precision, returning the stored
+    rows and (for int8) the per-row scales
+    """
+    if precision == "float32":
+        return vectors.astype(np.float32), None
+    if precision == "float16":
+        return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.round(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+def quantized_scores(stored: np.ndarray, scales: Optional[np.ndarray], query: np.ndarray) -> np.ndarray:
+    """Dot products of a float32 query with quantized rows, one block at a time"""
+    scores = np.empty(len(stored), dtype=np.float32)
+    for start in range(0, len(stored), SCORE_BLOCK_ROWS):
+        block = stored[start:start + SCORE_BLOCK_ROWS]
+        block_scores = block.astype(np.float32, copy=False) @ query
+        if scales is not None:
+            block_scores *= scales[start:start + SCORE_BLOCK_ROWS]
+        scores[start:start + len(block)] = block_scores
+    return scores
+
+def quantization_recall(vectors: np.ndarray, queries: np.ndarray, precision: str,
+                        k: int = 10, rescore_candidates: int = 0) -> float:
+    """
+    Measure recall@k of quantized search against exact float32 search for
+    the given vectors and queries (optionally with exact rescoring of
+    k * rescore_candidates candidates)
+    """
+    vectors = normalize(np.asarray(vectors, dtype=np.float32))
+    queries = normalize(np.asarray(queries, dtype=np.float32))
+    stored, scales = quantize(vectors, precision)
+    k = min(k, len(vectors))
+    
+    hits = 0
+    for query in queries:
+        exact_scores = vectors @ query
+        exact = set(np.argpartition(-exact_scores, k - 1)[:k].tolist())
+        scores = quantized_scores(stored, scales, query)
+        candidates = min(len(vectors), k * rescore_candidates) if rescore_candidates else k
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        if rescore_candidates:
+            top = top[np.argsort(-exact_scores[top])[:k]]
+        hits += len(exact & set(top.tolist()))
+    return hits / (k * len(queries)) if len(queries) else 1.0
+
+class QuantizedVectorStore(VectorStore):
+    """Vector store keeping embeddings as float32, float16 or int8 in memory"""
+    
+    def __init__(
+        self,
+        embedding: Embeddings,
+        precision: str = "int8",
+        rescore: bool = True,
+        rescore_candidates: int = 4,
+        persist_directory: Optional[str] = None
+    ):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision '{precision}', expected one of {PRECISIONS}")
+        self._embedding = embedding
+        self.precision = precision
+        self.rescore_candidates = rescore_candidates
+        # Exact rescoring needs the full-precision copies on disk
+        self.rescore = rescore and precision != "float32" and persist_directory is not None
+        self._exact_path = os.path.join(persist_directory, "embeddings.f32") if self.rescore else None
+        
+        self._lock = threading.RLock()
+        self._vectors: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._count = 0
+        self._deleted = 0
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict] = []
+        self._row_by_id: Dict[str, int] = {}
+    
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self._embedding
+    
+    def __len__(self) -> int:
+        return self._count - self._deleted
+    
+    def memory_bytes(self) -> int:
+        """Bytes used by the embeddings of live (not deleted) entries"""
+        if self._vectors is None:
+            return 0
+        row_bytes = self._vectors.itemsize * self._vectors.shape[1]
+        if self._scales is not None:
+            row_bytes += self._scales.itemsize
+        return len(self) * row_bytes
+    
+    def _reserve(self, rows: int, dimensions: int):
+        needed = self._count + rows
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 64)
+        dtype = np.int8 if self.precision == "int8" else np.dtype(self.precision)
+        vectors = np.zeros((capacity, dimensions), dtype=dtype)
+        alive = np.zeros(capacity, dtype=bool)
+        if self._vectors is not None:
+            vectors[:self._count] = self._vectors[:self._count]
+            alive[:self._count] = self._alive[:self._count]
+        self._vectors = vectors
+        self._alive = alive
+        if self.precision == "int8":
+            scales = np.ones(capacity, dtype=np.float32)
+            if self._scales is not None:
+                scales[:self._count] = self._scales[:self._count]
+            self._scales = scales
+    
+    def add_embeddings(
+        self,
+        texts: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[Dict]] = None,
+        ids: Optional[Sequence[str]] = None
+    ) -> List[str]:
+        """Add texts whose embeddings have already been computed"""
+        if not texts:
+            return []
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        metadatas = list(metadatas) if metadatas else [{} for _ in texts]
+        vectors = normalize(np.asarray(embeddings, dtype=np.float32))
+        
+        with self._lock:
+            # Re-adding an id replaces it
+            self.delete([id_ for id_ in ids if id_ in self._row_by_id])
+            self._reserve(len(texts), vectors.shape[1])
+            stored, scales = quantize(vectors, self.precision)
+            start, end = self._count, self._count + len(texts)
+            self._vectors[start:end] = stored
+            if scales is not None:
+                self._scales[start:end] = scales
+            self._alive[start:end] = True
+            if self._exact_path:
+                os.makedirs(os.path.dirname(self._exact_path), exist_ok=True)
+                with open(self._exact_path, "ab") as f:
+                    f.write(vectors.tobytes())
+            for offset, id_ in enumerate(ids):
+                self._row_by_id[id_] = start + offset
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._metadatas.extend(dict(metadata) for metadata in metadatas)
+            self._count = end
+        return ids
+    
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> List[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        return self.add_embeddings(texts, self._embedding.embed_documents(texts), metadatas, ids)
+    
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        if not ids:
+            return False
+        with self._lock:
+            for id_ in ids:
+                row = self._row_by_id.pop(id_, None)
+                if row is not None:
+                    self._alive[row] = False
+                    self._deleted += 1
+            # Compact once a quarter of the rows are dead, whatever the size,
+            # so a full re-ingest of a document does not keep both copies
+            if self._deleted * 4 > self._count:
+                self._compact()
+        return True
+    
+    def _compact(self):
+        """Drop deleted rows from the arrays and the full-precision file"""
+        keep = np.flatnonzero(self._alive[:self._count])
+        if self._exact_path and os.path.exists(self._exact_path):
+            exact = np.fromfile(self._exact_path, dtype=np.float32).reshape(self._count, -1)[keep]
+            tmp_path = self._exact_path + ".tmp"
+            exact.tofile(tmp_path)
+            os.replace(tmp_path, self._exact_path)
+        self._vectors = self._vectors[keep].copy()
+        if self._scales is not None:
+            self._scales = self._scales[keep].copy()
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._ids = [self._ids[row] for row in keep]
+        self._texts = [self._texts[row] for row in keep]
+        self._metadatas = [self._metadatas[row] for row in keep]
+        self._row_by_id = {id_: row for row, id_ in enumerate(self._ids)}
+        self._count = len(keep)
+        self._deleted = 0
+    
+    def update_metadatas(self, ids: Sequence[str], metadatas: Sequence[Dict]):
+        """Replace the metadata of stored entries"""
+        with self._lock:
+            for id_, metadata in zip(ids, metadatas):
+                row = self._row_by_id.get(id_)
+                if row is not None:
+                    self._metadatas[row] = dict(metadata)
+    
+    def get(self, ids: Optional[Sequence[str]] = None, include: Optional[Sequence[str]] = None) -> Dict[str, List]:
+        """Get stored entries (all, or by id) in the same shape as Chroma.get()"""
+        include = include or ["documents", "metadatas"]
+        with self._lock:
+            if ids is None:
+                rows = np.flatnonzero(self._alive[:self._count]).tolist()
+            else:
+                rows = [self._row_by_id[id_] for id_ in ids if id_ in self._row_by_id]
+            result = {"ids": [self._ids[row] for row in rows]}
+            if "documents" in include:
+                result["documents"] = [self._texts[row] for row in rows]
+            if "metadatas" in include:
+                result["metadatas"] = [dict(self._metadatas[row]) for row in rows]
+        return result
+    
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        """Search by query embedding, returning documents with cosine similarity scores"""
+        query = normalize(np.asarray([embedding], dtype=np.float32))[0]
+        with self._lock:
+            alive = len(self)
+            if alive == 0:
+                return []
+            k = min(k, alive)
+            count = self._count
+            scores = quantized_scores(self._vectors[:count], None if self._scales is None else self._scales[:count], query)
+            scores[~self._alive[:count]] = -np.inf
+            
+            candidates = min(alive, k * self.rescore_candidates) if self.rescore else k
+            top = np.argpartition(-scores, candidates - 1)[:candidates]
+            if self.rescore:
+                exact = np.memmap(self._exact_path, dtype=np.float32, mode="r", shape=(count, len(query)))
+                scores = np.full(count, -np.inf, dtype=np.float32)
+                scores[top] = np.asarray(exact[top]) @ query
+            top = top[np.argsort(-scores[top])][:k]
+            
+            return [
+                (Document(page_content=self._texts[row], metadata=dict(self._metadatas[row])), float(scores[row]))
+                for row in top
+            ]
+    
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+    
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k)
+    
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+    
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+    
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any
+    ) -> "QuantizedVectorStore":
+        store = cls(embedding, **kwargs)
+        store.add_texts(texts, metadatas, ids)
+        return store
@@ -1,11 +1,32 @@
 """
 Dynamic Learning Path Suggestion Service API
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import Callable, Iterator, List, Optional, Dict, Any, Tuple
+from collections import OrderedDict
 from enum import Enum
 import json
+import os
+import re
+import threading
+from services.common.learning_catalog import Catalog, CatalogStore
+from services.common.embeddings import load_embeddings
+from services.common.http_cache import PrebuiltResponse, conditional_response
+from services.common.json_fragments import RawJSON, dumps
+from services.common.resource_ranking import RankingPreferences, ResourceFeatures
+from services.common.study_schedule import (
+    ScheduleItem,
+    build_schedule,
+    parse_duration_hours,
+    parse_weekly_hours,
+    parse_weeks,
+)
+from services.common.semantic_index import CachedQueryEmbeddings, SemanticIndex, subject_profiles
+from services.common.skill_graph import SkillGraph
+from services.common.subject_index import SubjectMatch, normalize_subject
 
 router = APIRouter(prefix="/learning", tags=["learning-path"])
 
@@ -37,6 +58,25 @@ class Resource(BaseModel):
     url: Optional[str] = None
     description: str
     skills_covered: List[str]
+    prerequisites: Optional[List[str]] = []  # skills expected beforehand
+    cost: Optional[str] = None  # free, low, medium, high
+
+class CatalogResource(RawJSON):
+    """
+    Compact catalog record: the fields path generation reads, plus the
+    resource's validated JSON, serialized once when the catalog is loaded
+    """
+    
+    __slots__ = ("title", "type", "duration", "skills_covered", "cost")
+    
+    def __init__(self, data: Dict[str, Any]):
+        resource = Resource.parse_obj(data)
+        super().__init__(json.dumps(resource.dict()))
+        self.title = resource.title
+        self.type = resource.type
+        self.duration = resource.duration
+        self.skills_covered = tuple(resource.skills_covered)
+        self.cost = resource.cost
 
 class LearningPathRequest(BaseModel):
     subject: str
@@ -49,6 +89,8 @@ class LearningPathRequest(BaseModel):
     preferred_resource_types: List[str]  # courses, books, videos, etc.
     budget: Optional[str] = "free"  # free, low, medium, high
     specific_interests: Optional[List[str]] = []
+    current_skills: Optional[List[str]] = []  # skills already known
+    target_skills: Optional[List[str]] = []  # specific skills to reach
 
 class LearningPathResponse(BaseModel):
     success: bool
@@ -58,161 +100,221 @@ class LearningPathResponse(BaseModel):
     total_resources: int
     phases: List[Dict[str, Any]]
 
-# Sample learning resources database
-LEARNING_RESOURCES = {
-    "python": {
-        "beginner": [
-            Resource(
-                title="Python for Everybody Specialization",
-                type="course",
-                provider="Coursera",
-                duration="8 months",
-                difficulty=SkillLevel.BEGINNER,
-                url="https://coursera.org/specializations/python",
-                description="Complete Python programming specialization covering basics to data structures",
-                skills_covered=["Python basics", "Data structures", "Web scraping", "Databases"]
-            ),
-            Resource(
-                title="Automate the Boring Stuff with Python",
-                type="book",
-                provider="No Starch Press",
-                duration="4-6 weeks",
-                difficulty=SkillLevel.BEGINNER,
-                url="https://automatetheboringstuff.com/",
-                description="Practical Python programming book with real-world projects",
-                skills_covered=["Python basics", "File handling", "Web scraping", "GUI automation"]
-            ),
-            Resource(
-                title="Python Tutorial for Beginners",
-                type="video",
-                provider="YouTube - Programming with Mosh",
-                duration="6 hours",
-                difficulty=SkillLevel.BEGINNER,
-                description="Comprehensive Python tutorial covering fundamentals",
-                skills_covered=["Python syntax", "Variables", "Functions", "Classes"]
-            )
-        ],
-        "intermediate": [
-            Resource(
-                title="Python Data Science Handbook",
-                type="book",
-                provider="O'Reilly",
-                duration="8-10 weeks",
-                difficulty=SkillLevel.INTERMEDIATE,
-                description="Essential tools for working with data in Python",
-                skills_covered=["NumPy", "Pandas", "Matplotlib", "Scikit-learn"]
-            ),
-            Resource(
-                title="Real Python Tutorials",
-                type="course",
-                provider="Real Python",
-                duration="Ongoing",
-                difficulty=SkillLevel.INTERMEDIATE,
-                url="https://realpython.com/",
-                description="In-depth Python tutorials and courses",
-                skills_covered=["Advanced Python", "Web development", "Testing", "Deployment"]
-            )
-        ],
-        "advanced": [
-            Resource(
-                title="Effective Python",
-                type="book",
-                provider="Addison-Wesley",
-                duration="6-8 weeks",
-                difficulty=SkillLevel.ADVANCED,
-                description="90 specific ways to write better Python",
-                skills_covered=["Python best practices", "Performance optimization", "Advanced patterns"]
-            )
-        ]
-    },
-    "web development": {
-        "beginner": [
-            Resource(
-                title="The Complete Web Developer Course",
-                type="course",
-                provider="Udemy",
-                duration="12 weeks",
-                difficulty=SkillLevel.BEGINNER,
-                description="Full-stack web development from scratch",
-                skills_covered=["HTML", "CSS", "JavaScript", "React", "Node.js", "MongoDB"]
-            ),
-            Resource(
-                title="MDN Web Docs",
-                type="article",
-                provider="Mozilla",
-                duration="Ongoing",
-                difficulty=SkillLevel.BEGINNER,
-                url="https://developer.mozilla.org/",
-                description="Comprehensive web development documentation",
-                skills_covered=["HTML", "CSS", "JavaScript", "Web APIs"]
-            )
-        ],
-        "intermediate": [
-            Resource(
-                title="React - The Complete Guide",
-                type="course",
-                provider="Udemy",
-                duration="10 weeks",
-                difficulty=SkillLevel.INTERMEDIATE,
-                description="Master React with hooks, context, and advanced patterns",
-                skills_covered=["React", "Redux", "Testing", "Performance optimization"]
-            )
+# Learning resource catalog (JSON file or SQLite database), hot-reloaded on change
+LEARNING_CATALOG_PATH = os.getenv(
+    "LEARNING_CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.json")
+)
+LEARNING_CATALOG_RELOAD_SECONDS = float(os.getenv("LEARNING_CATALOG_RELOAD_SECONDS", "5"))
+
+catalog_store = CatalogStore(LEARNING_CATALOG_PATH, CatalogResource, LEARNING_CATALOG_RELOAD_SECONDS)
+
+DEFAULT_SUBJECT = "python"
+
+# Below this score a match is only offered as an alternative
+MIN_SUBJECT_MATCH_SCORE = 0.45
+
+# Semantic matching of subjects and interests. The hashing backend needs no
+# model download; "huggingface" gives better matches where it is available
+LEARNING_EMBEDDING_BACKEND = os.getenv("LEARNING_EMBEDDING_BACKEND", "hashing")
+
+# Lexical matches at least this good are kept over semantic ones
+STRONG_SUBJECT_MATCH_SCORE = 0.75
+
+# Cosine similarity needed for a semantic subject or skill match
+MIN_SEMANTIC_SUBJECT_SCORE = float(os.getenv("LEARNING_SEMANTIC_MIN_SCORE", "0.12"))
+MIN_SEMANTIC_SKILL_SCORE = 0.5
+
+_learning_embeddings = None
+
+def get_learning_embeddings():
+    """Embeddings for semantic matching (loaded once, query vectors cached)"""
+    global _learning_embeddings
+    if _learning_embeddings is None:
+        embeddings = load_embeddings([LEARNING_EMBEDDING_BACKEND, "hashing"])
+        _learning_embeddings = CachedQueryEmbeddings(embeddings)
+    return _learning_embeddings
+
+def build_semantic_indexes(catalog: Catalog) -> Dict[str, SemanticIndex]:
+    """Embedding indexes over the catalog's subjects and skills"""
+    embeddings = get_learning_embeddings()
+    summaries = catalog.summaries()
+    skills = sorted({
+        skill
+        for summary in summaries.values()
+        for items in summary["levels"].values()
+        for item in items
+        for skill in item["skills_covered"]
+    })
+    texts = [summaries[subject]["text"] for subject in catalog.subjects]
+    return {
+        "subjects": SemanticIndex(embeddings, catalog.subjects, subject_profiles(catalog.subjects, catalog.aliases, texts)),
+        "skills": SemanticIndex(embeddings, skills, skills)
+    }
+
+def get_skill_graph(catalog: Catalog) -> SkillGraph:
+    """
+    The catalog's skill prerequisite graph (built once per catalog version
+    from the subject summaries, without loading any shard)
+    """
+    return catalog.derived("", "skills", lambda: SkillGraph({
+        subject: summary["levels"] for subject, summary in catalog.summaries().items()
+    }))
+
+def warm_catalog_indexes(catalog: Catalog):
+    """Build a catalog's skill graph and semantic indexes in the background"""
+    def build():
+        try:
+            get_skill_graph(catalog)
+        except Exception as e:
+            print(f"Warning: Could not build skill graph: {e}")
+        try:
+            catalog.derived("", "semantic", lambda: build_semantic_indexes(catalog))
+        except Exception as e:
+            print(f"Warning: Could not build semantic index: {e}")
+    threading.Thread(target=build, daemon=True).start()
+
+def get_semantic_indexes(catalog: Catalog) -> Optional[Dict[str, SemanticIndex]]:
+    """The catalog's semantic indexes, or None while they are being built"""
+    return catalog.get_derived("", "semantic")
+
+catalog_store.add_listener(warm_catalog_indexes)
+warm_catalog_indexes(catalog_store.current())
+
+def resolve_subject(catalog: Catalog, subject: str) -> Dict[str, Any]:
+    """
+    Resolve a free-text subject to a catalog subject, with ranked
+    alternatives. Exact, alias and strong lexical matches win; otherwise
+    the nearest subject by embedding is used when it is close enough.
+    Falls back to the default subject when nothing matches.
+    """
+    matches = catalog.subject_index.resolve(subject, limit=5)
+    best = matches[0] if matches and matches[0].score >= MIN_SUBJECT_MATCH_SCORE else None
+    
+    semantic = get_semantic_indexes(catalog)
+    if semantic is not None and not (best and best.score >= STRONG_SUBJECT_MATCH_SCORE):
+        nearest = [
+            SubjectMatch(label, score, "semantic")
+            for label, score in semantic["subjects"].search(subject, k=5)
+            if score >= MIN_SEMANTIC_SUBJECT_SCORE
         ]
-    },
-    "machine learning": {
-        "beginner": [
-            Resource(
-                title="Machine Learning Course",
-                type="course",
-                provider="Coursera - Andrew Ng",
-                duration="11 weeks",
-                difficulty=SkillLevel.BEGINNER,
-                url="https://coursera.org/learn/machine-learning",
-                description="Comprehensive introduction to machine learning",
-                skills_covered=["Supervised learning", "Unsupervised learning", "Neural networks"]
-            ),
-            Resource(
-                title="Hands-On Machine Learning",
-                type="book",
-                provider="O'Reilly",
-                duration="12-16 weeks",
-                difficulty=SkillLevel.BEGINNER,
-                description="Practical ML with Scikit-Learn and TensorFlow",
-                skills_covered=["ML algorithms", "Deep learning", "Python ML libraries"]
-            )
-        ],
-        "intermediate": [
-            Resource(
-                title="Deep Learning Specialization",
-                type="course",
-                provider="Coursera - deeplearning.ai",
-                duration="16 weeks",
-                difficulty=SkillLevel.INTERMEDIATE,
-                description="Deep learning and neural networks specialization",
-                skills_covered=["Deep learning", "CNN", "RNN", "TensorFlow"]
-            )
+        if nearest:
+            best = nearest[0]
+        seen = {match.subject for match in matches}
+        matches = sorted(matches + [match for match in nearest if match.subject not in seen],
+                         key=lambda match: -match.score)
+    
+    default_subject = DEFAULT_SUBJECT if DEFAULT_SUBJECT in catalog or not catalog.subjects else catalog.subjects[0]
+    return {
+        "query": subject,
+        "matched_subject": best.subject if best else default_subject,
+        "match_type": best.match_type if best else "default",
+        "score": round(best.score, 3) if best else 0.0,
+        "alternatives": [match.to_dict() for match in matches if match.subject != (best.subject if best else None)][:5]
+    }
+
+def match_interests(catalog: Catalog, interests: List[str]) -> Dict[str, List[str]]:
+    """Catalog skills nearest to each of the learner's interests"""
+    semantic = get_semantic_indexes(catalog)
+    if semantic is None:
+        return {}
+    return {
+        interest: [
+            skill for skill, score in semantic["skills"].search(interest, k=3)
+            if score >= MIN_SEMANTIC_SKILL_SCORE
         ]
+        for interest in interests
     }
-}
 
-def generate_learning_path(request: LearningPathRequest) -> Dict[str, Any]:
+def select_resources(catalog: Catalog, subject: str, level: str,
+                     preferences: RankingPreferences, k: int, known_skills: int = 0) -> List[CatalogResource]:
+    """
+    The k resources of a subject and level that best fit the learner's
+    preferences, skipping those whose skills are all in the known_skills
+    bitset (resources listing no skills the graph knows are always kept),
+    in prerequisite order
+    """
+    resources = catalog.resources(subject).get(level, ())
+    features = catalog.derived(subject, f"features:{level}", lambda: ResourceFeatures(resources))
+    graph = get_skill_graph(catalog)
+    
+    def covers_only_known(i: int) -> bool:
+        taught = graph.mask(resources[i].skills_covered)
+        return bool(known_skills and taught) and not taught & ~known_skills
+    
+    wanted = k
+    while True:
+        ranked = features.rank(preferences, wanted)
+        selected = [resources[i] for i in ranked if not covers_only_known(i)][:k]
+        if len(selected) == k or len(ranked) < wanted:
+            break
+        wanted *= 2
+    # Resources teaching prerequisites come before those building on them
+    return sorted(selected, key=lambda resource: graph.order_key(resource.skills_covered))
+
+# Weekly hours assumed when time_commitment can't be parsed
+DEFAULT_WEEKLY_HOURS = 4.0
+
+def schedule_phases(phases: List[Dict[str, Any]], weekly_hours: float, deadline_weeks: Optional[float]) -> Dict[str, Any]:
+    """
+    Fit the phases' resources into the learner's time budget and plan them
+    week by week. Earlier phases, and better-ranked resources within a
+    phase, are worth more when not everything fits. Each phase's duration
+    becomes the number of weeks its scheduled resources span, or says it was
+    deferred or only runs alongside the plan.
+    """
+    items, ongoing = [], []
+    for phase in phases:
+        for rank, resource in enumerate(phase["resources"]):
+            hours = parse_duration_hours(resource.duration)
+            if hours is None:
+                # Open-ended references (e.g. documentation) run alongside the plan
+                ongoing.append(resource.title)
+                continue
+            value = 1.0 / phase["phase"] + 0.5 / (rank + 1)
+            items.append(ScheduleItem(resource.title, hours, value, len(items), phase["phase"]))
+    
+    schedule = build_schedule(items, weekly_hours, deadline_weeks)
+    schedule["ongoing"] = ongoing
+    
+    for phase in phases:
+        phase_items = [item for item in items if item.phase == phase["phase"]]
+        spans = [item.weeks for item in phase_items if item.weeks is not None]
+        if spans:
+            weeks = max(last for _, last in spans) - min(first for first, _ in spans) + 1
+            phase["duration"] = f"{weeks} week{'s' if weeks != 1 else ''}"
+        elif phase_items:
+            phase["duration"] = "Deferred (does not fit the timeline)"
+        else:
+            phase["duration"] = "Ongoing"
+    return schedule
+
+def generate_learning_path(request: LearningPathRequest, catalog: Optional[Catalog] = None) -> Dict[str, Any]:
     """
     Generate a personalized learning path based on user requirements
     """
-    subject_lower = request.subject.lower()
+    # One catalog snapshot for the whole request, even if a reload swaps it meanwhile
+    catalog = catalog or catalog_store.current()
     
     # Find matching subject or closest match
-    matching_subject = None
-    for subject_key in LEARNING_RESOURCES.keys():
-        if subject_lower in subject_key or subject_key in subject_lower:
-            matching_subject = subject_key
-            break
+    subject_resolution = resolve_subject(catalog, request.subject)
+    matching_subject = subject_resolution["matched_subject"]
     
-    if not matching_subject:
-        # Default to general programming path
-        matching_subject = "python"
+    # Interests also count the catalog skills they are semantically close to.
+    # They are normalized like the cache key, so requests sharing a cached
+    # response share its matches; each sees them under its own wording.
+    interests = sorted({normalize_subject(interest) for interest in request.specific_interests or []})
+    interest_matches = match_interests(catalog, interests)
+    preferences = RankingPreferences(
+        resource_types=request.preferred_resource_types,
+        budget=request.budget,
+        learning_style=request.learning_style.value,
+        interests=interests + [skill for skills in interest_matches.values() for skill in skills]
+    )
     
-    resources = LEARNING_RESOURCES.get(matching_subject, LEARNING_RESOURCES["python"])
+    # Known skills imply their prerequisites; resources covering only those are skipped
+    graph = get_skill_graph(catalog)
+    known_skills = graph.with_prerequisites(graph.mask(request.current_skills or []))
     
     # Create learning phases
     phases = []
@@ -220,14 +322,14 @@ def generate_learning_path(request: LearningPathRequest) -> Dict[str, Any]:
     
     # Phase 1: Foundation (if starting from beginner)
     if request.current_skill_level == SkillLevel.BEGINNER:
-        foundation_resources = resources.get("beginner", [])
+        foundation_resources = select_resources(catalog, matching_subject, "beginner", preferences, 3, known_skills)
         if foundation_resources:
             phases.append({
                 "phase": current_phase,
                 "title": "Foundation Phase",
                 "description": f"Build strong fundamentals in {matching_subject}",
                 "duration": "4-8 weeks",
-                "resources": [resource.dict() for resource in foundation_resources[:3]],
+                "resources": foundation_resources,
                 "learning_objectives": [
                     f"Understand basic {matching_subject} concepts",
                     "Complete hands-on exercises",
@@ -238,14 +340,14 @@ def generate_learning_path(request: LearningPathRequest) -> Dict[str, Any]:
     
     # Phase 2: Intermediate skills
     if request.target_skill_level in [SkillLevel.INTERMEDIATE, SkillLevel.ADVANCED]:
-        intermediate_resources = resources.get("intermediate", [])
+        intermediate_resources = select_resources(catalog, matching_subject, "intermediate", preferences, 3, known_skills)
         if intermediate_resources:
             phases.append({
                 "phase": current_phase,
                 "title": "Skill Development Phase",
                 "description": f"Develop intermediate {matching_subject} skills",
                 "duration": "6-12 weeks",
-                "resources": [resource.dict() for resource in intermediate_resources[:3]],
+                "resources": intermediate_resources,
                 "learning_objectives": [
                     f"Master intermediate {matching_subject} concepts",
                     "Work on real-world projects",
@@ -256,14 +358,14 @@ def generate_learning_path(request: LearningPathRequest) -> Dict[str, Any]:
     
     # Phase 3: Advanced/Specialization
     if request.target_skill_level == SkillLevel.ADVANCED:
-        advanced_resources = resources.get("advanced", [])
+        advanced_resources = select_resources(catalog, matching_subject, "advanced", preferences, 2, known_skills)
         if advanced_resources:
             phases.append({
                 "phase": current_phase,
                 "title": "Mastery Phase",
                 "description": f"Achieve advanced proficiency in {matching_subject}",
                 "duration": "8-16 weeks",
-                "resources": [resource.dict() for resource in advanced_resources[:2]],
+                "resources": advanced_resources,
                 "learning_objectives": [
                     f"Master advanced {matching_subject} concepts",
                     "Contribute to open source projects",
@@ -274,6 +376,9 @@ def generate_learning_path(request: LearningPathRequest) -> Dict[str, Any]:
     # Calculate total resources
     total_resources = sum(len(phase["resources"]) for phase in phases)
     
+    weekly_hours = parse_weekly_hours(request.time_commitment) or DEFAULT_WEEKLY_HOURS
+    schedule = schedule_phases(phases, weekly_hours, parse_weeks(request.timeline))
+    
     # Generate personalized recommendations
     personalization_notes = []
     
@@ -292,13 +397,20 @@ def generate_learning_path(request: LearningPathRequest) -> Dict[str, Any]:
     
     return {
         "subject": matching_subject,
+        "subject_resolution": subject_resolution,
+        "interest_matches": interest_matches,
+        "skill_gap": graph.skill_gap(
+            sorted({normalize_subject(skill) for skill in request.target_skills}),
+            sorted({normalize_subject(skill) for skill in request.current_skills or []})
+        ) if request.target_skills else None,
         "skill_progression": f"{request.current_skill_level.value} → {request.target_skill_level.value}",
         "learning_style_accommodations": personalization_notes,
         "phases": phases,
         "study_schedule": {
             "time_commitment": request.time_commitment,
             "timeline": request.timeline,
-            "recommended_pace": "3-4 hours per week for steady progress"
+            "recommended_pace": "3-4 hours per week for steady progress",
+            **schedule
         },
         "success_metrics": [
             "Complete all phase objectives",
@@ -308,35 +420,207 @@ def generate_learning_path(request: LearningPathRequest) -> Dict[str, Any]:
         ]
     }
 
+# Serialized responses keyed by catalog version and normalized request
+LEARNING_PATH_CACHE_SIZE = int(os.getenv("LEARNING_PATH_CACHE_SIZE", "4096"))
+LEARNING_PATH_PRECOMPUTE = os.getenv("LEARNING_PATH_PRECOMPUTE", "false").lower() == "true"
+learning_path_cache: "OrderedDict[Tuple, List[bytes]]" = OrderedDict()
+learning_path_cache_lock = threading.Lock()
+
+# Free-text request fields echoed back verbatim; cached responses hold a
+# placeholder for each and the request's own value is spliced in. Interest
+# matches are cached by normalized interest and re-keyed by the request's
+# own interests.
+ECHOED_FIELDS = ("subject", "time_commitment", "timeline")
+_ECHO_PLACEHOLDER = re.compile(r'"\\u0000(\w+)\\u0000"')
+
+def _echo(field: str) -> str:
+    return f"\x00{field}\x00"
+
+def _rounded(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 2)
+
+def normalize_learning_path_request(request: LearningPathRequest) -> Tuple:
+    """Cache key for a request: case, whitespace and list order don't matter"""
+    return (
+        normalize_subject(request.subject),
+        request.current_skill_level.value,
+        request.target_skill_level.value,
+        tuple(sorted({goal.value for goal in request.learning_goals})),
+        request.learning_style.value,
+        # Parsed, so "5 hours/week" and "5 hrs per week" share a key
+        _rounded(parse_weekly_hours(request.time_commitment)),
+        _rounded(parse_weeks(request.timeline)),
+        tuple(sorted({normalize_subject(t) for t in request.preferred_resource_types})),
+        normalize_subject(request.budget or "free"),
+        tuple(sorted({normalize_subject(i) for i in request.specific_interests or []})),
+        tuple(sorted({normalize_subject(s) for s in request.current_skills or []})),
+        tuple(sorted({normalize_subject(s) for s in request.target_skills or []}))
+    )
+
+def build_learning_path_response(request: LearningPathRequest, catalog: Catalog) -> List[bytes]:
+    """
+    Generate and serialize the response for a request, returned as UTF-8
+    JSON fragments split around the echoed fields. Resources are spliced
+    in from their catalog-load serialization.
+    """
+    personalized_path = generate_learning_path(request, catalog)
+    phases = personalized_path["phases"]
+    
+    # Calculate estimated timeline
+    total_weeks = personalized_path["study_schedule"]["total_weeks"]
+    estimated_timeline = f"{total_weeks} weeks ({total_weeks // 4} months)"
+    
+    personalized_path["subject_resolution"]["query"] = _echo("subject")
+    personalized_path["study_schedule"]["time_commitment"] = _echo("time_commitment")
+    personalized_path["study_schedule"]["timeline"] = _echo("timeline")
+    interest_matches = personalized_path["interest_matches"]
+    personalized_path["interest_matches"] = _echo("interest_matches")
+    # Same shape as LearningPathResponse
+    response = {
+        "success": True,
+        "subject": _echo("subject"),
+        "personalized_path": personalized_path,
+        "estimated_timeline": estimated_timeline,
+        "total_resources": sum(len(phase["resources"]) for phase in phases),
+        "phases": phases
+    }
+    return [
+        part.encode("utf-8") if i % 2 == 0 else interest_matches if part == "interest_matches" else part
+        for i, part in enumerate(_ECHO_PLACEHOLDER.split(dumps(response)))
+    ]
+
+def _echoed_value(part: Any, request: LearningPathRequest) -> Any:
+    if isinstance(part, dict):
+        # Interest matches by normalized interest
+        return {
+            interest: part[normalize_subject(interest)]
+            for interest in request.specific_interests or []
+            if normalize_subject(interest) in part
+        }
+    return getattr(request, part)
+
+def render_learning_path(parts: List[Any], request: LearningPathRequest) -> bytes:
+    """Splice a request's echoed fields into cached response fragments"""
+    return b"".join(
+        part if i % 2 == 0 else json.dumps(_echoed_value(part, request)).encode("utf-8")
+        for i, part in enumerate(parts)
+    )
+
+def learning_path_cache_key(request: LearningPathRequest, catalog: Catalog) -> Tuple:
+    # Responses built before the semantic index was ready aren't reused after
+    return (catalog.version, get_semantic_indexes(catalog) is not None, normalize_learning_path_request(request))
+
+def get_learning_path_parts(request: LearningPathRequest, catalog: Optional[Catalog] = None) -> List[bytes]:
+    """Cached response fragments for a request, generating them on a miss"""
+    catalog = catalog or catalog_store.current()
+    key = learning_path_cache_key(request, catalog)
+    with learning_path_cache_lock:
+        parts = learning_path_cache.get(key)
+        if parts is not None:
+            learning_path_cache.move_to_end(key)
+            return parts
+    
+    parts = build_learning_path_response(request, catalog)
+    with learning_path_cache_lock:
+        learning_path_cache[key] = parts
+        learning_path_cache.move_to_end(key)
+        while len(learning_path_cache) > LEARNING_PATH_CACHE_SIZE:
+            learning_path_cache.popitem(last=False)
+    return parts
+
+def invalidate_learning_paths(catalog: Catalog):
+    """Drop cached responses built from an older catalog"""
+    with learning_path_cache_lock:
+        learning_path_cache.clear()
+    if LEARNING_PATH_PRECOMPUTE:
+        threading.Thread(target=precompute_learning_paths, daemon=True).start()
+
+catalog_store.add_listener(invalidate_learning_paths)
+
+def precompute_learning_paths() -> int:
+    """
+    Fill the cache with every subject, skill level pair, learning style and
+    single learning goal, using the /suggest-simple defaults for the
+    free-text fields. Returns the number of responses computed.
+    """
+    catalog = catalog_store.current()
+    computed = 0
+    for subject in catalog.subjects:
+        for current_level in SkillLevel:
+            for target_level in SkillLevel:
+                for style in LearningStyle:
+                    for goal in LearningGoal:
+                        if catalog_store.current() is not catalog:
+                            # A reload started its own precompute
+                            return computed
+                        get_learning_path_parts(LearningPathRequest(
+                            subject=subject,
+                            current_skill_level=current_level,
+                            target_skill_level=target_level,
+                            learning_goals=[goal],
+                            learning_style=style,
+                            time_commitment="5 hours/week",
+                            timeline="3 months",
+                            preferred_resource_types=["course", "book", "video"]
+                        ))
+                        computed += 1
+    return computed
+
+if LEARNING_PATH_PRECOMPUTE:
+    threading.Thread(target=precompute_learning_paths, daemon=True).start()
+
 @router.post("/suggest", response_model=LearningPathResponse)
 async def suggest_learning_path(request: LearningPathRequest):
     """
     Generate personalized learning path suggestions
     """
     try:
-        personalized_path = generate_learning_path(request)
-        phases = personalized_path["phases"]
-        
-        # Calculate estimated timeline
-        total_weeks = sum(
-            int(phase["duration"].split("-")[0]) 
-            for phase in phases 
-            if "-" in phase["duration"]
-        )
-        estimated_timeline = f"{total_weeks} weeks ({total_weeks // 4} months)"
-        
-        return LearningPathResponse(
-            success=True,
-            subject=request.subject,
-            personalized_path=personalized_path,
-            estimated_timeline=estimated_timeline,
-            total_resources=sum(len(phase["resources"]) for phase in phases),
-            phases=phases
-        )
+        parts = await run_in_threadpool(get_learning_path_parts, request)
+        return Response(content=render_learning_path(parts, request), media_type="application/json")
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate learning path: {str(e)}")
 
+# Largest number of requests accepted by /learning/suggest-batch
+MAX_BATCH_SIZE = int(os.getenv("LEARNING_PATH_MAX_BATCH_SIZE", "10000"))
+
+class LearningPathBatchRequest(BaseModel):
+    requests: List[LearningPathRequest]
+
+def iter_learning_path_batch(requests: List[LearningPathRequest]) -> Iterator[bytes]:
+    """
+    Yield one NDJSON line per request, in input order. Requests with the
+    same normalized key share one computed path, and the whole batch uses
+    one catalog snapshot.
+    """
+    catalog = catalog_store.current()
+    parts_by_key: Dict[Tuple, List[bytes]] = {}
+    for index, request in enumerate(requests):
+        try:
+            key = learning_path_cache_key(request, catalog)
+            parts = parts_by_key.get(key)
+            if parts is None:
+                parts = parts_by_key[key] = get_learning_path_parts(request, catalog)
+            body = render_learning_path(parts, request)
+            # Prefix each response object with its position in the batch
+            yield b'{"index": %d, ' % index + body[1:] + b"\n"
+        except Exception as e:
+            yield json.dumps({"index": index, "success": False, "error": str(e)}).encode("utf-8") + b"\n"
+
+def suggest_learning_paths(requests: List[LearningPathRequest]) -> List[Dict[str, Any]]:
+    """Python API for batch suggestions: one response dict per request, in order"""
+    return [json.loads(line) for line in iter_learning_path_batch(requests)]
+
+@router.post("/suggest-batch")
+async def suggest_learning_path_batch(batch: LearningPathBatchRequest):
+    """
+    Generate learning paths for many learners at once, streamed as NDJSON
+    in input order
+    """
+    if len(batch.requests) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch too large. Maximum is {MAX_BATCH_SIZE} requests.")
+    return StreamingResponse(iter_learning_path_batch(batch.requests), media_type="application/x-ndjson")
+
 @router.post("/suggest-simple")
 async def suggest_simple_path(subject: str, skill_level: str = "beginner"):
     """
@@ -360,38 +644,75 @@ async def suggest_simple_path(subject: str, skill_level: str = "beginner"):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate simple learning path: {str(e)}")
 
-@router.get("/subjects")
-async def list_available_subjects():
+class SkillGapRequest(BaseModel):
+    target_skills: List[str]
+    current_skills: Optional[List[str]] = []
+
+@router.post("/skill-gap")
+async def skill_gap(request: SkillGapRequest):
     """
-    List available subjects for learning paths
+    Skills needed to reach the target skills from the current ones, in
+    learning order, with resources covering them
     """
+    if not request.target_skills:
+        raise HTTPException(status_code=400, detail="At least one target skill is required")
+    graph = get_skill_graph(catalog_store.current())
     return {
         "success": True,
-        "subjects": list(LEARNING_RESOURCES.keys()),
-        "total_subjects": len(LEARNING_RESOURCES)
+        "target_skills": request.target_skills,
+        "current_skills": request.current_skills,
+        **graph.skill_gap(request.target_skills, request.current_skills or [])
     }
 
+def prebuilt_json(catalog: Catalog, name: str, build: Callable[[Catalog], Dict[str, Any]]) -> PrebuiltResponse:
+    """A catalog-derived GET response, serialized once per catalog version"""
+    return catalog.derived("", f"response:{name}", lambda: PrebuiltResponse(json.dumps(build(catalog)).encode("utf-8")))
+
+def subjects_payload(catalog: Catalog) -> Dict[str, Any]:
+    return {
+        "success": True,
+        "subjects": list(catalog.subjects),
+        "total_subjects": len(catalog)
+    }
+
+@router.get("/subjects")
+async def list_available_subjects(http_request: Request):
+    """
+    List available subjects for learning paths
+    """
+    return conditional_response(http_request, prebuilt_json(catalog_store.current(), "subjects", subjects_payload))
+
 @router.get("/health")
 async def health_check():
     """
     Health check endpoint
     """
-    return {"status": "healthy", "service": "learning-path"}
+    return {
+        "status": "healthy",
+        "service": "learning-path",
+        "catalog": catalog_store.status(),
+        "cached_paths": len(learning_path_cache)
+    }
 
-@router.get("/")
-async def service_info():
-    """
-    Service information
-    """
+def service_info_payload(catalog: Catalog) -> Dict[str, Any]:
     return {
         "service": "Dynamic Learning Path Suggestion Service",
         "description": "Generate personalized learning paths based on user goals and preferences",
-        "available_subjects": list(LEARNING_RESOURCES.keys()),
+        "available_subjects": list(catalog.subjects),
         "skill_levels": ["beginner", "intermediate", "advanced"],
         "endpoints": [
             "/learning/suggest - Generate detailed learning path",
             "/learning/suggest-simple - Generate simple learning path",
+            "/learning/suggest-batch - Generate learning paths for many learners (NDJSON)",
+            "/learning/skill-gap - Skills and resources needed to reach target skills",
             "/learning/subjects - List available subjects",
             "/learning/health - Health check"
         ]
-    }
\ No newline at end of file
+    }
+
+@router.get("/")
+async def service_info(http_request: Request):
+    """
+    Service information
+    """
+    return conditional_response(http_request, prebuilt_json(catalog_store.current(), "info", service_info_payload))
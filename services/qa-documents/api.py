@@ -1,26 +1,91 @@
 """
 Q&A over Documents Service API
 """
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
+from fastapi import APIRouter, HTTPException, UploadFile, File, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import Any, Iterable, List, Optional, Dict, Tuple
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+import hashlib
+import json
+import multiprocessing
 import os
-import tempfile
+import queue
+import shutil
+import tarfile
+import threading
+import time
+import zipfile
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.vectorstores import Chroma
 from langchain.chains import RetrievalQA
 from langchain_community.llms import Ollama
 from langchain.docstore.document import Document
-import pypdf
-import docx
-from io import BytesIO
+from langchain_core.prompts import format_document
+from langchain_core.vectorstores import VectorStore
+import numpy as np
 import uuid
+from services.common.embeddings import load_embeddings
+from services.common.document_text import (
+    SUPPORTED_EXTENSIONS,
+    extract_document_pages,
+)
+from services.common.extraction_cache import extraction_cache, file_hash
+from services.common.singleflight import ClientDisconnected, SingleFlight, fingerprint
+from services.common.text_ranking import bm25_scores, split_sentences, tokenize
+from services.common.vector_store import PRECISIONS, QuantizedVectorStore
 
 router = APIRouter(prefix="/qa", tags=["qa-documents"])
 
 # Global storage for document stores
-document_stores: Dict[str, Chroma] = {}
+document_stores: Dict[str, VectorStore] = {}
+# Bumped each time a document's content is updated in place
+document_versions: Dict[str, int] = {}
+
+# Vector layer: "chroma", or an in-memory store keeping embeddings as
+# "float32", "float16" or "int8" (with optional exact rescoring of the top
+# candidates from full-precision copies on disk)
+QA_VECTOR_STORE = os.getenv("QA_VECTOR_STORE", "chroma")
+QA_VECTOR_RESCORE = os.getenv("QA_VECTOR_RESCORE", "true").lower() == "true"
+if QA_VECTOR_STORE not in ("chroma",) + PRECISIONS:
+    raise ValueError(f"QA_VECTOR_STORE must be one of {', '.join(('chroma',) + PRECISIONS)}, got {QA_VECTOR_STORE!r}")
+
+# Embedding backend: "auto" tries the HuggingFace model, then falls back to
+# the built-in hashing embedder, which needs no downloads
+QA_EMBEDDING_BACKEND = os.getenv("QA_EMBEDDING_BACKEND", "auto")
+
+# Ready-to-use QA chains (each holding its retriever) keyed by (document_id, k)
+QA_CHAIN_CACHE_SIZE = int(os.getenv("QA_CHAIN_CACHE_SIZE", "128"))
+qa_chain_cache: "OrderedDict[Tuple[str, int], RetrievalQA]" = OrderedDict()
+qa_chain_cache_lock = threading.Lock()
+
+# Identical questions that arrive while one is being answered share its LLM call
+qa_flights = SingleFlight()
+
+# Shared LLM client and embeddings model, created on first use
+_llm = None
+_embeddings = None
+
+# Extractive answers: cap on sentences scored per question and span length
+EXTRACTIVE_MAX_SENTENCES = 400
+EXTRACTIVE_MAX_SPAN_CHARS = 600
+
+# Background ingestion: bounded queues between the extract, chunk, embed and
+# index stages, and a small pool running the pipelines themselves
+INGEST_QUEUE_SIZE = int(os.getenv("QA_INGEST_QUEUE_SIZE", "64"))
+EMBED_BATCH_SIZE = int(os.getenv("QA_EMBED_BATCH_SIZE", "32"))
+ingestion_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("QA_INGEST_WORKERS", "2")),
+    thread_name_prefix="qa-ingest"
+)
+
+# Bulk uploads extract files in parallel worker processes
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2")
+MAX_FILE_SIZE = int(os.getenv("MAX_FILE_SIZE", str(50 * 1024 * 1024)))
+EXTRACT_PROCESSES = int(os.getenv("QA_EXTRACT_PROCESSES", str(os.cpu_count() or 2)))
+_extraction_pool: Optional[ProcessPoolExecutor] = None
 
 class DocumentUploadResponse(BaseModel):
     success: bool
@@ -28,11 +93,50 @@ class DocumentUploadResponse(BaseModel):
     document_id: str
     filename: str
     pages_processed: int
+    status: str = "ready"
+    duplicate: bool = False
+
+class BulkUploadItem(BaseModel):
+    filename: str
+    document_id: Optional[str] = None
+    status: str  # queued, processing, ready, failed
+    pages_processed: int = 0
+    error: Optional[str] = None
+    duplicate: bool = False
+
+class BulkUploadResponse(BaseModel):
+    success: bool
+    message: str
+    documents: List[BulkUploadItem]
+    succeeded: int
+    failed: int
+
+class DocumentUpdateResponse(BaseModel):
+    success: bool
+    message: str
+    document_id: str
+    filename: str
+    chunks_total: int
+    chunks_added: int
+    chunks_removed: int
+    chunks_unchanged: int
+
+class DocumentStatusResponse(BaseModel):
+    success: bool
+    document_id: str
+    filename: str
+    status: str  # queued, processing, ready, failed
+    ready: bool
+    progress: Dict[str, int]
+    error: Optional[str] = None
+    elapsed_seconds: float
+    index: Optional[Dict[str, Any]] = None
 
 class QuestionRequest(BaseModel):
     document_id: str
     question: str
     max_results: Optional[int] = 3
+    answer_mode: Optional[str] = "auto"  # auto, generative, extractive
 
 class QuestionResponse(BaseModel):
     success: bool
@@ -40,88 +144,67 @@ class QuestionResponse(BaseModel):
     confidence: float
     source_documents: List[Dict]
     document_id: str
+    answer_span: Optional[Dict] = None
 
 def get_llm():
-    """Get LLM instance"""
-    try:
-        return Ollama(model="llama2", temperature=0.1)
-    except Exception:
-        return None
+    """Get LLM instance (created once and shared across requests)"""
+    global _llm
+    if _llm is None:
+        try:
+            _llm = Ollama(model="llama2", temperature=0.1)
+        except Exception:
+            return None
+    return _llm
 
 def get_embeddings():
-    """Get embeddings model"""
-    try:
-        return HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    except Exception:
-        # Fallback to a simple embedding
-        return None
+    """Get embeddings model (loaded once and shared across requests)"""
+    global _embeddings
+    if _embeddings is None:
+        backends = ["huggingface", "hashing"] if QA_EMBEDDING_BACKEND == "auto" else [QA_EMBEDDING_BACKEND]
+        # None falls back to keyword search
+        _embeddings = load_embeddings(backends)
+    return _embeddings
 
-def extract_text_from_pdf(file_content: bytes) -> List[Document]:
-    """Extract text from PDF file and return as documents"""
-    pdf_file = BytesIO(file_content)
-    pdf_reader = pypdf.PdfReader(pdf_file)
-    documents = []
-    
-    for i, page in enumerate(pdf_reader.pages):
-        text = page.extract_text()
-        if text.strip():
-            doc = Document(
-                page_content=text,
-                metadata={"page": i + 1, "source": "pdf"}
-            )
-            documents.append(doc)
+def get_qa_chain(document_id: str, store: VectorStore, k: int) -> Optional[RetrievalQA]:
+    """
+    Get a cached retrieval QA chain for a document, building it on first use.
     
-    return documents
-
-def extract_text_from_docx(file_content: bytes) -> List[Document]:
-    """Extract text from DOCX file and return as documents"""
-    docx_file = BytesIO(file_content)
-    doc = docx.Document(docx_file)
-    documents = []
+    Chains are kept in an LRU cache bounded by QA_CHAIN_CACHE_SIZE and are
+    dropped when their document is removed from the registry.
+    """
+    key = (document_id, k)
+    with qa_chain_cache_lock:
+        qa = qa_chain_cache.get(key)
+        if qa is not None:
+            qa_chain_cache.move_to_end(key)
+            return qa
     
-    full_text = []
-    for paragraph in doc.paragraphs:
-        if paragraph.text.strip():
-            full_text.append(paragraph.text)
+    llm = get_llm()
+    if llm is None:
+        return None
     
-    # Split into chunks for better retrieval
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200
+    qa = RetrievalQA.from_chain_type(
+        llm=llm,
+        chain_type="stuff",
+        retriever=store.as_retriever(search_kwargs={"k": k}),
+        return_source_documents=True
     )
     
-    text = "\n".join(full_text)
-    chunks = text_splitter.split_text(text)
+    with qa_chain_cache_lock:
+        # Don't cache chains for documents deleted while we were building
+        if document_stores.get(document_id) is store:
+            qa_chain_cache[key] = qa
+            qa_chain_cache.move_to_end(key)
+            while len(qa_chain_cache) > QA_CHAIN_CACHE_SIZE:
+                qa_chain_cache.popitem(last=False)
     
-    for i, chunk in enumerate(chunks):
-        doc = Document(
-            page_content=chunk,
-            metadata={"chunk": i + 1, "source": "docx"}
-        )
-        documents.append(doc)
-    
-    return documents
+    return qa
 
-def extract_text_from_txt(file_content: bytes) -> List[Document]:
-    """Extract text from TXT file and return as documents"""
-    text = file_content.decode('utf-8')
-    
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=1000,
-        chunk_overlap=200
-    )
-    
-    chunks = text_splitter.split_text(text)
-    documents = []
-    
-    for i, chunk in enumerate(chunks):
-        doc = Document(
-            page_content=chunk,
-            metadata={"chunk": i + 1, "source": "txt"}
-        )
-        documents.append(doc)
-    
-    return documents
+def invalidate_qa_chains(document_id: str):
+    """Drop all cached QA chains for a document"""
+    with qa_chain_cache_lock:
+        for key in [key for key in qa_chain_cache if key[0] == document_id]:
+            del qa_chain_cache[key]
 
 def simple_keyword_search(documents: List[Document], question: str, max_results: int = 3) -> List[Document]:
     """
@@ -154,51 +237,693 @@ def generate_simple_answer(relevant_docs: List[Document], question: str) -> str:
     # Simple template-based response
     return f"Based on the document content, here's what I found:\n\n{context[:800]}..."
 
-@router.post("/upload", response_model=DocumentUploadResponse)
-async def upload_document(file: UploadFile = File(...)):
+def retrieve_documents(store, question: str, max_results: int) -> List[Document]:
+    """Retrieve the chunks most relevant to a question from a document store"""
+    if isinstance(store, list):
+        return simple_keyword_search(store, question, max_results)
+    return store.similarity_search(question, k=max_results)
+
+def extractive_answer(relevant_docs: List[Document], question: str, embeddings=None) -> Optional[Dict]:
     """
-    Upload and process a document for Q&A
+    Answer a question without an LLM by extracting the best-matching span
+    from the retrieved chunks.
+    
+    Sentences are scored against the question with BM25, blended with the
+    cosine similarity of batched sentence embeddings when an embeddings
+    model is available. The best sentence is widened with adjacent
+    sentences from the same chunk that also score well. Returns the span
+    text, its character offsets within the source chunk and its score, or
+    None if nothing matches.
     """
+    sentences = []
+    for doc_index, doc in enumerate(relevant_docs):
+        for start, end in split_sentences(doc.page_content):
+            sentences.append((doc_index, start, end))
+    sentences = sentences[:EXTRACTIVE_MAX_SENTENCES]
+    if not sentences:
+        return None
+    
+    texts = [relevant_docs[doc_index].page_content[start:end] for doc_index, start, end in sentences]
+    query_tokens = tokenize(question)
+    scores = np.array(bm25_scores(query_tokens, [tokenize(text) for text in texts]))
+    if scores.max() > 0:
+        scores /= scores.max()
+    
+    if embeddings:
+        try:
+            query_vector = np.asarray(embeddings.embed_query(question))
+            vectors = np.asarray(embeddings.embed_documents(texts))
+            norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query_vector)
+            similarity = vectors @ query_vector / np.where(norms == 0, 1, norms)
+            scores = 0.5 * scores + 0.5 * np.clip(similarity, 0, 1)
+        except Exception:
+            pass  # Keep the lexical scores
+    
+    best = int(np.argmax(scores))
+    if scores[best] <= 0:
+        return None
+    
+    def joinable(neighbour: int, first: int, last: int) -> bool:
+        return (
+            0 <= neighbour < len(sentences)
+            and sentences[neighbour][0] == sentences[best][0]
+            and scores[neighbour] >= 0.6 * scores[best]
+            and max(sentences[last][2], sentences[neighbour][2]) - min(sentences[first][1], sentences[neighbour][1])
+                <= EXTRACTIVE_MAX_SPAN_CHARS
+        )
+    
+    first = last = best
+    while joinable(first - 1, first, last):
+        first -= 1
+    while joinable(last + 1, first, last):
+        last += 1
+    
+    doc_index, start, _ = sentences[first]
+    end = sentences[last][2]
+    doc = relevant_docs[doc_index]
+    text = doc.page_content[start:end]
+    
+    question_terms = set(query_tokens)
+    coverage = len(question_terms & set(tokenize(text))) / len(question_terms) if question_terms else 0.0
+    
+    return {
+        "text": text,
+        "source_index": doc_index,
+        "start": start,
+        "end": end,
+        "metadata": doc.metadata,
+        "score": round(float(scores[best]), 4),
+        "coverage": round(coverage, 4)
+    }
+
+class IngestionJob:
+    """Progress of one document moving through the ingestion pipeline"""
+    
+    def __init__(self, document_id: str, filename: str, file_hash: Optional[str] = None):
+        self.document_id = document_id
+        self.filename = filename
+        self.file_hash = file_hash
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.cancelled = False
+        self.pages_extracted = 0
+        self.chunks_created = 0
+        self.chunks_embedded = 0
+        self.chunks_indexed = 0
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.store: Any = None
+        self.done = threading.Event()
+    
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+    
+    def fail(self, error: str):
+        if self.error is None:
+            self.error = error
+            self.status = "failed"
+    
+    def to_response(self) -> DocumentStatusResponse:
+        end = self.finished_at or time.time()
+        return DocumentStatusResponse(
+            success=self.status != "failed",
+            document_id=self.document_id,
+            filename=self.filename,
+            status=self.status,
+            ready=self.ready,
+            progress={
+                "pages_extracted": self.pages_extracted,
+                "chunks_created": self.chunks_created,
+                "chunks_embedded": self.chunks_embedded,
+                "chunks_indexed": self.chunks_indexed
+            },
+            error=self.error,
+            elapsed_seconds=round(end - self.started_at, 3),
+            index=describe_store(document_stores[self.document_id]) if self.ready and self.document_id in document_stores else None
+        )
+
+# Ingestion progress by document id, kept after completion for status lookups:
+# a ready document's job until the document is deleted, a failed one for
+# INGESTION_JOB_TTL_SECONDS
+ingestion_jobs: Dict[str, IngestionJob] = {}
+INGESTION_JOB_TTL_SECONDS = float(os.getenv("INGESTION_JOB_TTL_SECONDS", "3600"))
+# Failed jobs in the order they finished, for expiring them
+finished_failed_jobs: "deque[IngestionJob]" = deque()
+# Content hash of each uploaded file -> the document id it is indexed under
+documents_by_file_hash: Dict[str, str] = {}
+# Serializes registering documents against deleting them
+ingestion_lock = threading.Lock()
+
+# Marks the end of one job's items on a stage queue
+_END_OF_JOB = object()
+# Marks the end of all input on a stage queue
+_END_OF_INPUT = object()
+
+def get_text_splitter() -> RecursiveCharacterTextSplitter:
+    """Get the splitter used to chunk documents for indexing"""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=1000,
+        chunk_overlap=200
+    )
+
+def chunk_pages(pages: Iterable[Document]) -> List[Document]:
+    """Split extracted pages into numbered chunks, as the ingestion pipeline does"""
+    text_splitter = get_text_splitter()
+    chunks = []
+    for page in pages:
+        for text in text_splitter.split_text(page.page_content):
+            metadata = dict(page.metadata, chunk=len(chunks) + 1)
+            chunks.append(Document(page_content=text, metadata=metadata))
+    return chunks
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def create_vector_store(document_id: str, embeddings):
+    """Create an empty vector store for a document"""
+    if QA_VECTOR_STORE != "chroma":
+        return QuantizedVectorStore(
+            embeddings,
+            precision=QA_VECTOR_STORE,
+            rescore=QA_VECTOR_RESCORE,
+            persist_directory=f"./chroma_db_{document_id}"
+        )
     try:
-        # Generate unique document ID
-        document_id = str(uuid.uuid4())
+        return Chroma(
+            embedding_function=embeddings,
+            persist_directory=f"./chroma_db_{document_id}"
+        )
+    except ImportError:
+        # chromadb isn't installed; keep full-precision vectors in memory instead
+        return QuantizedVectorStore(embeddings, precision="float32")
+
+def chroma_collection(store: Chroma):
+    """
+    The chromadb collection behind a langchain Chroma store. Chroma's public
+    add_texts and update_documents re-embed every chunk, so writing
+    precomputed vectors or metadata alone needs the collection itself, which
+    langchain-community 0.2.0 (pinned in requirements.txt) only exposes as
+    the private _collection attribute. Re-check this on upgrades.
+    """
+    return store._collection
+
+def add_embedded_chunks(store, chunks: List[Document], vectors: List[List[float]], ids: List[str]):
+    """Add chunks whose embeddings have already been computed to a vector store"""
+    if isinstance(store, QuantizedVectorStore):
+        store.add_embeddings(
+            [chunk.page_content for chunk in chunks],
+            vectors,
+            [chunk.metadata for chunk in chunks],
+            ids
+        )
+        return
+    chroma_collection(store).upsert(
+        ids=ids,
+        embeddings=vectors,
+        documents=[chunk.page_content for chunk in chunks],
+        metadatas=[chunk.metadata for chunk in chunks]
+    )
+
+def update_chunk_metadatas(store, ids: List[str], metadatas: List[Dict]):
+    """Replace the metadata of stored chunks without re-embedding them"""
+    if isinstance(store, QuantizedVectorStore):
+        store.update_metadatas(ids, metadatas)
+    else:
+        chroma_collection(store).update(ids=ids, metadatas=metadatas)
+
+def describe_store(store) -> Dict[str, Any]:
+    """Index type, size and embedding memory of a document store"""
+    if isinstance(store, list):
+        return {"type": "keyword", "chunks": len(store)}
+    if isinstance(store, QuantizedVectorStore):
+        return {
+            "type": store.precision,
+            "chunks": len(store),
+            "embedding_bytes": store.memory_bytes(),
+            "rescore": store.rescore
+        }
+    return {"type": "chroma", "chunks": len(store.get(include=[])["ids"])}
+
+def remove_vector_store_files(document_id: str):
+    """Remove a document's persisted vector store, if any"""
+    try:
+        chroma_dir = f"./chroma_db_{document_id}"
+        if os.path.exists(chroma_dir):
+            shutil.rmtree(chroma_dir)
+    except Exception:
+        pass  # Ignore cleanup errors
+
+def get_extraction_pool() -> ProcessPoolExecutor:
+    """Get the worker process pool used for parallel text extraction"""
+    global _extraction_pool
+    if _extraction_pool is None:
+        _extraction_pool = ProcessPoolExecutor(
+            max_workers=EXTRACT_PROCESSES,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _extraction_pool
+
+def run_ingestion_pipeline(files: Iterable[Tuple[IngestionJob, bytes]], parallel_extraction: bool = False):
+    """
+    Ingest files through four overlapping stages connected by bounded queues:
+    extract pages -> chunk -> embed in batches -> index.
+    
+    With parallel_extraction, files are extracted concurrently in worker
+    processes; otherwise pages stream from one file at a time. Embedding
+    batches are shared across all files in the run. Each job is registered
+    in document_stores once its last chunk has been indexed.
+    """
+    embeddings = get_embeddings()
+    page_queue: "queue.Queue" = queue.Queue(maxsize=INGEST_QUEUE_SIZE)
+    chunk_queue: "queue.Queue" = queue.Queue(maxsize=INGEST_QUEUE_SIZE)
+    index_queue: "queue.Queue" = queue.Queue(maxsize=INGEST_QUEUE_SIZE)
+    # Every job taken from files, so jobs stranded by a failed stage can
+    # still be failed and finished
+    started: List[IngestionJob] = []
+    stage_errors: List[str] = []
+    
+    def abort(error: str):
+        """Fail every job of the run that has not finished yet"""
+        stage_errors.append(error)
+        with ingestion_lock:
+            for job in started:
+                if job.finished_at is None:
+                    job.fail(error)
+    
+    def drain(stage_queue: "queue.Queue"):
+        """Consume a stage queue up to its end-of-input marker"""
+        while stage_queue.get()[1] is not _END_OF_INPUT:
+            pass
+    
+    def run_stage(name: str, body, upstream, downstream: Optional["queue.Queue"]):
+        """
+        Run a stage and always end its output with the end-of-input marker.
+        If the stage fails, the run's unfinished jobs fail with its error and
+        the rest of its input is drained so earlier stages never block.
+        """
+        try:
+            body()
+        except Exception as e:
+            abort(f"Ingestion failed in the {name} stage: {str(e)}")
+            upstream()
+        finally:
+            if downstream is not None:
+                downstream.put((None, _END_OF_INPUT))
+    
+    def drain_files():
+        for job, _ in files:
+            started.append(job)
+            job.fail("Ingestion failed in the extract stage")
+    
+    def emit_pages(job: IngestionJob, pages: Iterable[Document]):
+        try:
+            for page in pages:
+                if job.cancelled:
+                    break
+                page_queue.put((job, page))
+                job.pages_extracted += 1
+            if job.pages_extracted == 0:
+                job.fail("No text content found in the document.")
+        except Exception as e:
+            job.fail(f"Text extraction failed: {str(e)}")
+        page_queue.put((job, _END_OF_JOB))
+    
+    def extract():
+        if not parallel_extraction:
+            for job, file_content in files:
+                started.append(job)
+                job.status = "processing"
+                emit_pages(job, extraction_cache.iter_pages(job.filename, file_content, job.file_hash))
+            return
         
-        # Read file content
-        file_content = await file.read()
+        # Keep a bounded number of files in flight in the worker processes
+        in_flight: "queue.Queue" = queue.Queue(maxsize=EXTRACT_PROCESSES * 2)
         
-        # Extract text based on file type
-        documents = []
-        if file.filename.lower().endswith('.pdf'):
-            documents = extract_text_from_pdf(file_content)
-        elif file.filename.lower().endswith('.docx'):
-            documents = extract_text_from_docx(file_content)
-        elif file.filename.lower().endswith('.txt'):
-            documents = extract_text_from_txt(file_content)
+        def collect():
+            while True:
+                entry = in_flight.get()
+                if entry is _END_OF_INPUT:
+                    return
+                job, result = entry
+                try:
+                    if isinstance(result, Future):
+                        pages = result.result()
+                        extraction_cache.put(job.filename, job.file_hash, pages)
+                    else:
+                        pages = result
+                except Exception as e:
+                    job.fail(f"Text extraction failed: {str(e)}")
+                    pages = []
+                emit_pages(job, pages)
+        
+        def drain_in_flight():
+            while in_flight.get() is not _END_OF_INPUT:
+                pass
+        
+        collector = threading.Thread(
+            target=run_stage, args=("collect", collect, drain_in_flight, None),
+            name="qa-ingest-collect", daemon=True
+        )
+        collector.start()
+        try:
+            for job, file_content in files:
+                started.append(job)
+                job.status = "processing"
+                try:
+                    result = extraction_cache.get(job.filename, job.file_hash)
+                    if result is None:
+                        try:
+                            result = get_extraction_pool().submit(extract_document_pages, job.filename, file_content)
+                        except Exception:
+                            # No worker processes available here; extract in this thread
+                            result = extraction_cache.iter_pages(job.filename, file_content, job.file_hash)
+                except Exception as e:
+                    job.fail(f"Text extraction failed: {str(e)}")
+                    result = []
+                in_flight.put((job, result))
+        finally:
+            in_flight.put(_END_OF_INPUT)
+            collector.join()
+    
+    def chunk():
+        text_splitter = get_text_splitter()
+        while True:
+            job, item = page_queue.get()
+            if item is _END_OF_INPUT:
+                return
+            if item is _END_OF_JOB:
+                chunk_queue.put((job, item))
+                continue
+            if job.error or job.cancelled:
+                continue
+            try:
+                texts = text_splitter.split_text(item.page_content)
+            except Exception as e:
+                job.fail(f"Chunking failed: {str(e)}")
+                continue
+            for text in texts:
+                job.chunks_created += 1
+                metadata = dict(item.metadata, chunk=job.chunks_created)
+                chunk_queue.put((job, Document(page_content=text, metadata=metadata)))
+    
+    def embed():
+        # Chunks and end-of-job markers in arrival order; markers are passed
+        # on after the chunks before them so batches can span documents
+        batch: List[Tuple[IngestionJob, Any]] = []
+        batch_chunks = 0
+        
+        def flush():
+            nonlocal batch_chunks
+            chunks = [(job, item) for job, item in batch if isinstance(item, Document)]
+            vectors = None
+            failed = set()
+            if embeddings and chunks:
+                try:
+                    vectors = embeddings.embed_documents([doc.page_content for _, doc in chunks])
+                except Exception as e:
+                    for job, _ in chunks:
+                        job.fail(f"Embedding failed: {str(e)}")
+                        failed.add(job.document_id)
+            position = 0
+            for job, item in batch:
+                if not isinstance(item, Document):
+                    index_queue.put((job, item))
+                    continue
+                if job.document_id not in failed:
+                    job.chunks_embedded += 1
+                    index_queue.put((job, (item, vectors[position] if vectors else None)))
+                position += 1
+            batch.clear()
+            batch_chunks = 0
+        
+        while True:
+            job, item = chunk_queue.get()
+            if item is _END_OF_INPUT:
+                flush()
+                return
+            if item is not _END_OF_JOB:
+                if job.error or job.cancelled:
+                    continue
+                batch_chunks += 1
+            batch.append((job, item))
+            # Embed once the batch is full, or whenever the upstream stages
+            # have nothing more ready so the index stage never waits on us
+            if batch_chunks >= EMBED_BATCH_SIZE or chunk_queue.empty():
+                flush()
+    
+    def index_pending(job: IngestionJob, pending: List[Tuple[Document, Any]]):
+        chunks = [doc for doc, _ in pending]
+        try:
+            if embeddings:
+                if job.store is None:
+                    job.store = create_vector_store(job.document_id, embeddings)
+                ids = [f"{job.document_id}-{job.chunks_indexed + i}" for i in range(len(chunks))]
+                add_embedded_chunks(job.store, chunks, [vector for _, vector in pending], ids)
+            else:
+                # Store documents directly for keyword search fallback
+                if job.store is None:
+                    job.store = []
+                job.store.extend(chunks)
+        except Exception as e:
+            job.fail(f"Indexing failed: {str(e)}")
+            return
+        job.chunks_indexed += len(chunks)
+        pending.clear()
+    
+    def finish(job: IngestionJob):
+        with ingestion_lock:
+            job.finished_at = time.time()
+            registered = not job.cancelled and job.error is None
+            if registered:
+                document_stores[job.document_id] = job.store
+                job.status = "ready"
+            else:
+                if documents_by_file_hash.get(job.file_hash) == job.document_id:
+                    del documents_by_file_hash[job.file_hash]
+                finished_failed_jobs.append(job)
+        # The registry owns the store from here on
+        job.store = None
+        if not registered:
+            remove_vector_store_files(job.document_id)
+        job.done.set()
+    
+    stages = [
+        threading.Thread(target=run_stage, args=(name, body, upstream, downstream), name=f"qa-ingest-{name}", daemon=True)
+        for name, body, upstream, downstream in (
+            ("extract", extract, drain_files, page_queue),
+            ("chunk", chunk, lambda: drain(page_queue), chunk_queue),
+            ("embed", embed, lambda: drain(chunk_queue), index_queue)
+        )
+    ]
+    for stage in stages:
+        stage.start()
+    
+    # Index on this thread, writing each job's embedded chunks in batches
+    pending: Dict[str, List[Tuple[Document, Any]]] = {}
+    try:
+        while True:
+            job, item = index_queue.get()
+            if item is _END_OF_INPUT:
+                break
+            if item is _END_OF_JOB:
+                job_pending = pending.pop(job.document_id, [])
+                if job.error is None and not job.cancelled and job_pending:
+                    index_pending(job, job_pending)
+                finish(job)
+                continue
+            if job.error or job.cancelled:
+                continue
+            job_pending = pending.setdefault(job.document_id, [])
+            job_pending.append(item)
+            if len(job_pending) >= EMBED_BATCH_SIZE:
+                index_pending(job, job_pending)
+    except Exception as e:
+        abort(f"Ingestion failed in the index stage: {str(e)}")
+        drain(index_queue)
+    finally:
+        for stage in stages:
+            stage.join()
+        # Jobs whose end-of-job marker was dropped by a failed stage
+        for job in started:
+            if job.finished_at is None:
+                job.fail(stage_errors[0] if stage_errors else "Ingestion stopped before the document was indexed")
+                finish(job)
+
+def expire_ingestion_jobs():
+    """Forget failed jobs that finished over the TTL ago (call with ingestion_lock held)"""
+    cutoff = time.time() - INGESTION_JOB_TTL_SECONDS
+    while finished_failed_jobs and finished_failed_jobs[0].finished_at < cutoff:
+        job = finished_failed_jobs.popleft()
+        if ingestion_jobs.get(job.document_id) is job:
+            del ingestion_jobs[job.document_id]
+
+def get_or_create_ingestion_job(filename: str, file_content: bytes) -> Tuple[IngestionJob, bool]:
+    """
+    Register a new ingestion job under a fresh document id, unless a
+    byte-identical file is already indexed (or being indexed), in which case
+    that document's job is returned. The flag is True for a new job.
+    """
+    content_hash = file_hash(file_content)
+    with ingestion_lock:
+        expire_ingestion_jobs()
+        existing = ingestion_jobs.get(documents_by_file_hash.get(content_hash, ""))
+        if existing is not None and existing.status != "failed":
+            return existing, False
+        job = IngestionJob(str(uuid.uuid4()), filename, content_hash)
+        ingestion_jobs[job.document_id] = job
+        documents_by_file_hash[content_hash] = job.document_id
+        return job, True
+
+def start_ingestion(files: List[Tuple[str, bytes]]) -> List[Tuple[IngestionJob, bool]]:
+    """
+    Register ingestion jobs for (filename, content) pairs and run the new
+    ones in the background, returning each job with its is-new flag
+    """
+    jobs = [(get_or_create_ingestion_job(filename, file_content), file_content) for filename, file_content in files]
+    new_jobs = [(job, file_content) for (job, created), file_content in jobs if created]
+    if new_jobs:
+        ingestion_executor.submit(run_ingestion_pipeline, new_jobs)
+    return [entry for entry, _ in jobs]
+
+def iter_feed(feed: "queue.Queue") -> Iterable[Tuple[IngestionJob, bytes]]:
+    """Iterate over files put on a feed queue until the end-of-input marker"""
+    while True:
+        entry = feed.get()
+        if entry is _END_OF_INPUT:
+            return
+        yield entry
+
+def is_archive(filename: str) -> bool:
+    return filename.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def iter_archive_members(upload: UploadFile) -> Iterable[Tuple[str, Optional[bytes], Optional[str]]]:
+    """
+    Yield (member name, content, error) for each file in a zip or tar
+    archive, reading one member at a time from the uploaded file
+    """
+    if upload.filename.lower().endswith(".zip"):
+        with zipfile.ZipFile(upload.file) as archive:
+            for info in archive.infolist():
+                if info.is_dir() or os.path.basename(info.filename).startswith("."):
+                    continue
+                if info.filename.startswith("__MACOSX/"):
+                    continue
+                if not info.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                    yield info.filename, None, "Unsupported file type"
+                elif info.file_size > MAX_FILE_SIZE:
+                    yield info.filename, None, "File too large"
+                else:
+                    with archive.open(info) as member:
+                        yield info.filename, member.read(), None
+    else:
+        # Stream mode reads the tar sequentially without seeking
+        with tarfile.open(fileobj=upload.file, mode="r|*") as archive:
+            for member in archive:
+                if not member.isfile() or os.path.basename(member.name).startswith("."):
+                    continue
+                if not member.name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    yield member.name, None, "Unsupported file type"
+                elif member.size > MAX_FILE_SIZE:
+                    yield member.name, None, "File too large"
+                else:
+                    yield member.name, archive.extractfile(member).read(), None
+
+def feed_bulk_uploads(files: List[UploadFile], feed: "queue.Queue", items: List[Tuple[BulkUploadItem, Optional[IngestionJob]]]):
+    """
+    Put every document from the uploaded files and archives on the
+    ingestion feed, recording an item (with its job, if any) for each
+    """
+    def add(filename: str, file_content: Optional[bytes], error: Optional[str]):
+        if error:
+            items.append((BulkUploadItem(filename=filename, status="failed", error=error), None))
+            return
+        job, created = get_or_create_ingestion_job(os.path.basename(filename), file_content)
+        items.append((
+            BulkUploadItem(filename=filename, document_id=job.document_id, status=job.status, duplicate=not created),
+            job
+        ))
+        if created:
+            # Blocks while the pipeline is busy, bounding how much is held in memory
+            feed.put((job, file_content))
+    
+    try:
+        for upload in files:
+            feed_upload(upload, add)
+    finally:
+        feed.put(_END_OF_INPUT)
+
+def feed_upload(upload: UploadFile, add):
+    """Pass each document in one uploaded file or archive to add()"""
+    try:
+        if is_archive(upload.filename):
+            for name, file_content, error in iter_archive_members(upload):
+                add(name, file_content, error)
+        elif upload.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            file_content = upload.file.read(MAX_FILE_SIZE + 1)
+            if len(file_content) > MAX_FILE_SIZE:
+                add(upload.filename, None, "File too large")
+            else:
+                add(upload.filename, file_content, None)
         else:
+            add(upload.filename, None, "Unsupported file type")
+    except (zipfile.BadZipFile, tarfile.TarError) as e:
+        add(upload.filename, None, f"Could not read archive: {str(e)}")
+
+def get_ready_store(document_id: str):
+    """
+    Get a document's store, raising a clean HTTP error if the document is
+    unknown, still being indexed, or failed to ingest
+    """
+    if document_id in document_stores:
+        return document_stores[document_id]
+    
+    job = ingestion_jobs.get(document_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Document not found. Please upload the document first.")
+    if job.status == "failed":
+        raise HTTPException(status_code=422, detail=f"Document processing failed: {job.error}")
+    raise HTTPException(
+        status_code=409,
+        detail=f"Document is still indexing ({job.chunks_indexed} chunks indexed so far). Please try again shortly."
+    )
+
+@router.post("/upload", response_model=DocumentUploadResponse)
+async def upload_document(file: UploadFile = File(...), wait: bool = False):
+    """
+    Upload a document for Q&A.
+    
+    Processing runs in the background and the document id is returned
+    immediately; poll /qa/documents/{id}/status until it is ready, or pass
+    wait=true to return only once processing has finished.
+    """
+    try:
+        if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
             raise HTTPException(status_code=400, detail="Unsupported file type. Please upload PDF, DOCX, or TXT files.")
         
-        if not documents:
-            raise HTTPException(status_code=400, detail="No text content found in the document.")
+        # Read file content
+        file_content = await file.read()
         
-        # Create vector store
-        embeddings = get_embeddings()
-        if embeddings:
-            vectorstore = Chroma.from_documents(
-                documents=documents,
-                embedding=embeddings,
-                persist_directory=f"./chroma_db_{document_id}"
-            )
-            document_stores[document_id] = vectorstore
-        else:
-            # Store documents directly for keyword search fallback
-            document_stores[document_id] = documents
+        job, created = start_ingestion([(file.filename, file_content)])[0]
+        
+        if wait:
+            await run_in_threadpool(job.done.wait)
+            if job.status == "failed":
+                status_code = 400 if job.pages_extracted == 0 else 500
+                raise HTTPException(status_code=status_code, detail=job.error)
         
         return DocumentUploadResponse(
             success=True,
-            message="Document uploaded and processed successfully",
-            document_id=document_id,
+            message=(
+                "Document already uploaded" if not created
+                else "Document uploaded and processed successfully" if job.ready
+                else "Document uploaded; processing in background"
+            ),
+            document_id=job.document_id,
             filename=file.filename,
-            pages_processed=len(documents)
+            pages_processed=job.pages_extracted,
+            status=job.status,
+            duplicate=not created
         )
     
     except HTTPException:
@@ -206,28 +931,94 @@ async def upload_document(file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Document upload failed: {str(e)}")
 
+@router.post("/upload-bulk", response_model=BulkUploadResponse)
+async def upload_documents_bulk(files: List[UploadFile] = File(...), wait: bool = True):
+    """
+    Upload many documents at once, as individual files and/or zip and tar
+    archives. All documents go through one ingestion run with parallel
+    extraction and shared embedding batches.
+    
+    By default the response is returned once everything is processed, with
+    a document id or error per file; pass wait=false to return as soon as
+    every file has been queued.
+    """
+    try:
+        feed: "queue.Queue" = queue.Queue(maxsize=EXTRACT_PROCESSES)
+        items: List[Tuple[BulkUploadItem, Optional[IngestionJob]]] = []
+        pipeline = ingestion_executor.submit(run_ingestion_pipeline, iter_feed(feed), True)
+        await run_in_threadpool(feed_bulk_uploads, files, feed, items)
+        
+        if wait:
+            await run_in_threadpool(pipeline.result)
+        
+        documents = []
+        for item, job in items:
+            if job is not None:
+                item.status = job.status
+                item.pages_processed = job.pages_extracted
+                item.error = job.error
+                if job.status == "failed":
+                    item.document_id = None
+            documents.append(item)
+        
+        failed = sum(1 for item in documents if item.status == "failed")
+        return BulkUploadResponse(
+            success=failed == 0,
+            message=(
+                f"Processed {len(documents) - failed} of {len(documents)} documents" if wait
+                else f"Queued {len(documents) - failed} of {len(documents)} documents for processing"
+            ),
+            documents=documents,
+            succeeded=len(documents) - failed,
+            failed=failed
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk upload failed: {str(e)}")
+
+@router.get("/documents/{document_id}/status", response_model=DocumentStatusResponse)
+async def document_status(document_id: str):
+    """
+    Get per-stage ingestion progress and readiness for a document
+    """
+    job = ingestion_jobs.get(document_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return job.to_response()
+
 @router.post("/ask", response_model=QuestionResponse)
-async def ask_question(request: QuestionRequest):
+async def ask_question(request: QuestionRequest, http_request: Request):
     """
     Ask a question about an uploaded document
     """
     try:
-        if request.document_id not in document_stores:
-            raise HTTPException(status_code=404, detail="Document not found. Please upload the document first.")
+        store = get_ready_store(request.document_id)
+        qa = None
+        answer_span = None
+        if isinstance(store, VectorStore) and request.answer_mode != "extractive":
+            qa = get_qa_chain(request.document_id, store, request.max_results)
         
-        store = document_stores[request.document_id]
-        llm = get_llm()
+        result = None
+        if qa:
+            try:
+                # Identical questions in flight against the same version of a
+                # document share one LLM call
+                version = document_versions.get(request.document_id, 0)
+                key = fingerprint("qa", request.document_id, version, request.max_results, request.question)
+                result = await qa_flights.run(
+                    key, qa, {"query": request.question}, is_disconnected=http_request.is_disconnected
+                )
+            except ClientDisconnected:
+                raise
+            except Exception:
+                if request.answer_mode == "generative":
+                    raise
+                # LLM unavailable (e.g. Ollama not running); answer extractively
         
-        if isinstance(store, Chroma) and llm:
+        if result is not None:
             # Use vector search with LLM
-            qa = RetrievalQA.from_chain_type(
-                llm=llm,
-                chain_type="stuff",
-                retriever=store.as_retriever(search_kwargs={"k": request.max_results}),
-                return_source_documents=True
-            )
-            
-            result = qa({"query": request.question})
             answer = result["result"]
             source_docs = [
                 {
@@ -239,10 +1030,18 @@ async def ask_question(request: QuestionRequest):
             confidence = 0.8  # Placeholder confidence score
         
         else:
-            # Fallback to simple keyword search
-            documents = store if isinstance(store, list) else list(store.get())
-            relevant_docs = simple_keyword_search(documents, request.question, request.max_results)
-            answer = generate_simple_answer(relevant_docs, request.question)
+            # No LLM (or extractive mode requested): extract the best span
+            relevant_docs = retrieve_documents(store, request.question, request.max_results)
+            answer_span = extractive_answer(
+                relevant_docs, request.question,
+                embeddings=None if isinstance(store, list) else store.embeddings
+            )
+            if answer_span:
+                answer = answer_span["text"]
+                confidence = round(0.3 + 0.5 * answer_span["coverage"], 2)
+            else:
+                answer = generate_simple_answer(relevant_docs, request.question)
+                confidence = 0.3
             source_docs = [
                 {
                     "content": doc.page_content[:200] + "...",
@@ -250,21 +1049,110 @@ async def ask_question(request: QuestionRequest):
                 }
                 for doc in relevant_docs
             ]
-            confidence = 0.6  # Lower confidence for simple search
         
         return QuestionResponse(
             success=True,
             answer=answer,
             confidence=confidence,
             source_documents=source_docs,
-            document_id=request.document_id
+            document_id=request.document_id,
+            answer_span=answer_span
         )
     
     except HTTPException:
         raise
+    except ClientDisconnected:
+        raise HTTPException(status_code=499, detail="Client disconnected")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Question answering failed: {str(e)}")
 
+def format_sse(event: str, data: Dict) -> str:
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def stream_answer(document_id: str, store, question: str, max_results: int, answer_mode: str = "auto"):
+    """
+    Yield server-sent events for a question: the retrieved sources first,
+    then the answer tokens as the LLM produces them, then a final summary.
+    """
+    qa = None
+    if isinstance(store, VectorStore) and answer_mode != "extractive":
+        qa = get_qa_chain(document_id, store, max_results)
+    
+    try:
+        if qa:
+            relevant_docs = qa.retriever.invoke(question)
+        else:
+            relevant_docs = retrieve_documents(store, question, max_results)
+    except Exception as e:
+        yield format_sse("error", {"detail": f"Retrieval failed: {str(e)}"})
+        return
+    
+    yield format_sse("sources", {
+        "document_id": document_id,
+        "source_documents": [
+            {
+                "content": doc.page_content[:200] + "...",
+                "metadata": doc.metadata
+            }
+            for doc in relevant_docs
+        ]
+    })
+    
+    answer = ""
+    confidence = 0.3
+    answer_span = None
+    if qa:
+        # Render the same prompt the "stuff" chain would send, then stream it
+        stuff_chain = qa.combine_documents_chain
+        context = stuff_chain.document_separator.join(
+            format_document(doc, stuff_chain.document_prompt) for doc in relevant_docs
+        )
+        prompt = stuff_chain.llm_chain.prompt.format(context=context, question=question)
+        try:
+            for token in stuff_chain.llm_chain.llm.stream(prompt):
+                answer += token
+                yield format_sse("token", {"token": token})
+            confidence = 0.8
+        except Exception as e:
+            if answer:
+                yield format_sse("error", {"detail": f"Answer generation failed: {str(e)}"})
+                return
+            # Nothing streamed yet, so fall back to an extractive answer
+    
+    if not answer:
+        answer_span = extractive_answer(
+            relevant_docs, question,
+            embeddings=None if isinstance(store, list) else store.embeddings
+        )
+        if answer_span:
+            answer = answer_span["text"]
+            confidence = round(0.3 + 0.5 * answer_span["coverage"], 2)
+        else:
+            answer = generate_simple_answer(relevant_docs, question)
+        yield format_sse("token", {"token": answer})
+    
+    yield format_sse("done", {
+        "success": True,
+        "answer": answer,
+        "confidence": confidence,
+        "document_id": document_id,
+        "answer_span": answer_span
+    })
+
+@router.post("/ask-stream")
+async def ask_question_stream(request: QuestionRequest):
+    """
+    Ask a question about an uploaded document and stream the answer as
+    server-sent events (sources, token..., done)
+    """
+    store = get_ready_store(request.document_id)
+    return StreamingResponse(
+        stream_answer(request.document_id, store, request.question, request.max_results, request.answer_mode),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/documents")
 async def list_documents():
     """
@@ -273,27 +1161,158 @@ async def list_documents():
     return {
         "success": True,
         "documents": list(document_stores.keys()),
-        "count": len(document_stores)
+        "count": len(document_stores),
+        "indexing": [
+            document_id for document_id, job in ingestion_jobs.items()
+            if job.status in ("queued", "processing")
+        ]
     }
 
+# Serializes in-place updates of the same document
+document_update_locks: Dict[str, threading.Lock] = {}
+
+def check_file_hash_owner(document_id: str, new_hash: str):
+    """Refuse an update whose file is already uploaded as another document (call with ingestion_lock held)"""
+    owner = documents_by_file_hash.get(new_hash)
+    if owner is not None and owner != document_id:
+        raise HTTPException(status_code=409, detail=f"This file is already uploaded as document {owner}")
+
+def update_document_chunks(document_id: str, filename: str, file_content: bytes) -> DocumentUpdateResponse:
+    """
+    Re-index a document in place from a new version of its file.
+    
+    New chunks are matched against the stored ones by content hash; only
+    chunks that are not already stored get embedded and inserted, and
+    stored chunks no longer present are deleted. Embedding happens before
+    taking ingestion_lock; the store and registry are changed under it so
+    a concurrent delete either wins outright or waits for the update.
+    """
+    get_ready_store(document_id)
+    with ingestion_lock:
+        # Only registered documents get a lock; delete_document removes it
+        if document_id not in document_stores:
+            raise HTTPException(status_code=404, detail="Document not found. Please upload the document first.")
+        lock = document_update_locks.setdefault(document_id, threading.Lock())
+    with lock:
+        # Read again: an update that ran while we waited may have replaced it
+        store = get_ready_store(document_id)
+        
+        new_hash = file_hash(file_content)
+        with ingestion_lock:
+            check_file_hash_owner(document_id, new_hash)
+        new_chunks = chunk_pages(extraction_cache.iter_pages(filename, file_content, new_hash))
+        if not new_chunks:
+            raise HTTPException(status_code=400, detail="No text content found in the document.")
+        
+        if isinstance(store, list):
+            stored = [(None, doc.page_content) for doc in store]
+        else:
+            existing = store.get(include=["documents"])
+            stored = list(zip(existing["ids"], existing["documents"]))
+        
+        # Match each new chunk to a stored chunk with the same content, if any
+        stored_by_hash: Dict[str, List[int]] = {}
+        for position, (_, text) in enumerate(stored):
+            stored_by_hash.setdefault(content_hash(text), []).append(position)
+        
+        kept: List[Tuple[int, Document]] = []
+        added: List[Document] = []
+        for chunk in new_chunks:
+            matches = stored_by_hash.get(content_hash(chunk.page_content))
+            if matches:
+                kept.append((matches.pop(), chunk))
+            else:
+                added.append(chunk)
+        removed = [position for positions in stored_by_hash.values() for position in positions]
+        
+        vectors: List[List[float]] = []
+        if not isinstance(store, list):
+            for start in range(0, len(added), EMBED_BATCH_SIZE):
+                batch = added[start:start + EMBED_BATCH_SIZE]
+                vectors.extend(store.embeddings.embed_documents([doc.page_content for doc in batch]))
+        
+        with ingestion_lock:
+            if document_stores.get(document_id) is not store:
+                raise HTTPException(status_code=404, detail="Document was deleted during the update")
+            check_file_hash_owner(document_id, new_hash)
+            
+            if isinstance(store, list):
+                # Keyword-search stores are plain lists, so just swap in the new chunks
+                document_stores[document_id] = new_chunks
+            else:
+                if added:
+                    add_embedded_chunks(store, added, vectors, [f"{document_id}-{uuid.uuid4().hex}" for _ in added])
+                if removed:
+                    store.delete(ids=[stored[position][0] for position in removed])
+                if kept:
+                    # Unchanged chunks may have moved; refresh their page/chunk numbers
+                    update_chunk_metadatas(
+                        store,
+                        [stored[position][0] for position, _ in kept],
+                        [chunk.metadata for _, chunk in kept]
+                    )
+            
+            job = ingestion_jobs.get(document_id)
+            if job is not None:
+                if documents_by_file_hash.get(job.file_hash) == document_id:
+                    del documents_by_file_hash[job.file_hash]
+                job.filename = filename
+                job.file_hash = new_hash
+            documents_by_file_hash[new_hash] = document_id
+            document_versions[document_id] = document_versions.get(document_id, 0) + 1
+        
+        return DocumentUpdateResponse(
+            success=True,
+            message="Document updated successfully",
+            document_id=document_id,
+            filename=filename,
+            chunks_total=len(new_chunks),
+            chunks_added=len(added),
+            chunks_removed=len(removed),
+            chunks_unchanged=len(kept)
+        )
+
+@router.put("/documents/{document_id}", response_model=DocumentUpdateResponse)
+async def update_document(document_id: str, file: UploadFile = File(...)):
+    """
+    Replace an uploaded document with a new version, keeping its document id.
+    Only chunks whose content changed are re-embedded.
+    """
+    try:
+        if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            raise HTTPException(status_code=400, detail="Unsupported file type. Please upload PDF, DOCX, or TXT files.")
+        
+        file_content = await file.read()
+        return await run_in_threadpool(update_document_chunks, document_id, file.filename, file_content)
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Document update failed: {str(e)}")
+
 @router.delete("/documents/{document_id}")
 async def delete_document(document_id: str):
     """
     Delete an uploaded document
     """
-    if document_id not in document_stores:
-        raise HTTPException(status_code=404, detail="Document not found")
-    
-    del document_stores[document_id]
+    with ingestion_lock:
+        job = ingestion_jobs.pop(document_id, None)
+        if document_id not in document_stores and job is None:
+            raise HTTPException(status_code=404, detail="Document not found")
+        
+        if job is not None:
+            # A pipeline still working on it drops the rest and cleans up
+            job.cancelled = True
+            if documents_by_file_hash.get(job.file_hash) == document_id:
+                del documents_by_file_hash[job.file_hash]
+        
+        document_stores.pop(document_id, None)
+        document_versions.pop(document_id, None)
+        document_update_locks.pop(document_id, None)
+    invalidate_qa_chains(document_id)
     
     # Clean up vector store files if they exist
-    try:
-        import shutil
-        chroma_dir = f"./chroma_db_{document_id}"
-        if os.path.exists(chroma_dir):
-            shutil.rmtree(chroma_dir)
-    except Exception:
-        pass  # Ignore cleanup errors
+    remove_vector_store_files(document_id)
     
     return {"success": True, "message": "Document deleted successfully"}
 
@@ -315,9 +1334,12 @@ async def service_info():
         "supported_formats": ["txt", "pdf", "docx"],
         "endpoints": [
             "/qa/upload - Upload document for Q&A",
+            "/qa/upload-bulk - Upload many documents or a zip/tar archive",
             "/qa/ask - Ask question about uploaded document",
+            "/qa/ask-stream - Ask question and stream the answer (SSE)",
             "/qa/documents - List uploaded documents",
-            "/qa/documents/{id} - Delete document",
+            "/qa/documents/{id}/status - Document processing status",
+            "/qa/documents/{id} - Update (PUT) or delete (DELETE) document",
             "/qa/health - Health check"
         ]
     }
\ No newline at end of file
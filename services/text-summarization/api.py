@@ -1,7 +1,8 @@
 """
 Text Summarization Service API
 """
-from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
+from fastapi import APIRouter, HTTPException, UploadFile, File, Depends, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional
 import os
@@ -10,12 +11,15 @@ from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.chains.summarize import load_summarize_chain
 from langchain.docstore.document import Document
 from langchain_community.llms import Ollama
-import pypdf
-import docx
-from io import BytesIO
+from services.common.document_text import SUPPORTED_EXTENSIONS
+from services.common.extraction_cache import extraction_cache
+from services.common.singleflight import ClientDisconnected, SingleFlight, fingerprint
 
 router = APIRouter(prefix="/summarize", tags=["text-summarization"])
 
+# Identical summarization requests that arrive while one is running share its result
+summary_flights = SingleFlight()
+
 class SummarizeRequest(BaseModel):
     text: str
     summary_type: Optional[str] = "concise"  # concise, detailed, bullet_points
@@ -62,53 +66,43 @@ def simple_extractive_summary(text: str, max_sentences: int = 3) -> str:
     
     return '. '.join([sentence[2] for sentence in top_sentences]) + '.'
 
-def extract_text_from_pdf(file_content: bytes) -> str:
-    """Extract text from PDF file"""
-    pdf_file = BytesIO(file_content)
-    pdf_reader = pypdf.PdfReader(pdf_file)
-    text = ""
-    for page in pdf_reader.pages:
-        text += page.extract_text() + "\n"
-    return text
-
-def extract_text_from_docx(file_content: bytes) -> str:
-    """Extract text from DOCX file"""
-    docx_file = BytesIO(file_content)
-    doc = docx.Document(docx_file)
-    text = ""
-    for paragraph in doc.paragraphs:
-        text += paragraph.text + "\n"
-    return text
+def generate_summary(request: SummarizeRequest) -> str:
+    """Produce the summary text for a request (blocking)"""
+    llm = get_llm()
+    
+    if llm:
+        # Use LangChain for summarization
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=1000,
+            chunk_overlap=200
+        )
+        docs = [Document(page_content=request.text)]
+        texts = text_splitter.split_documents(docs)
+        
+        chain = load_summarize_chain(llm, chain_type="map_reduce")
+        return chain.run(texts)
+    
+    # Fallback to simple summarization
+    max_sentences = 3 if request.summary_type == "concise" else 5
+    if request.summary_type == "bullet_points":
+        max_sentences = 4
+    summary = simple_extractive_summary(request.text, max_sentences)
+    
+    if request.summary_type == "bullet_points":
+        sentences = summary.split('. ')
+        summary = '\n'.join([f"• {sentence.strip()}" for sentence in sentences if sentence.strip()])
+    return summary
 
 @router.post("/text", response_model=SummarizeResponse)
-async def summarize_text(request: SummarizeRequest):
+async def summarize_text(request: SummarizeRequest, http_request: Request):
     """
     Summarize plain text
     """
     try:
-        llm = get_llm()
-        
-        if llm:
-            # Use LangChain for summarization
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,
-                chunk_overlap=200
-            )
-            docs = [Document(page_content=request.text)]
-            texts = text_splitter.split_documents(docs)
-            
-            chain = load_summarize_chain(llm, chain_type="map_reduce")
-            summary = chain.run(texts)
-        else:
-            # Fallback to simple summarization
-            max_sentences = 3 if request.summary_type == "concise" else 5
-            if request.summary_type == "bullet_points":
-                max_sentences = 4
-            summary = simple_extractive_summary(request.text, max_sentences)
-            
-            if request.summary_type == "bullet_points":
-                sentences = summary.split('. ')
-                summary = '\n'.join([f"• {sentence.strip()}" for sentence in sentences if sentence.strip()])
+        key = fingerprint("summarize", request.text, request.summary_type, request.max_length)
+        summary = await summary_flights.run(
+            key, generate_summary, request, is_disconnected=http_request.is_disconnected
+        )
         
         original_length = len(request.text)
         summary_length = len(summary)
@@ -122,11 +116,14 @@ async def summarize_text(request: SummarizeRequest):
             compression_ratio=compression_ratio
         )
     
+    except ClientDisconnected:
+        raise HTTPException(status_code=499, detail="Client disconnected")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
 
 @router.post("/document", response_model=SummarizeResponse)
 async def summarize_document(
+    http_request: Request,
     file: UploadFile = File(...),
     summary_type: str = "concise",
     max_length: int = 200
@@ -138,15 +135,11 @@ async def summarize_document(
         # Read file content
         file_content = await file.read()
         
-        # Extract text based on file type
-        if file.filename.lower().endswith('.pdf'):
-            text = extract_text_from_pdf(file_content)
-        elif file.filename.lower().endswith('.docx'):
-            text = extract_text_from_docx(file_content)
-        elif file.filename.lower().endswith('.txt'):
-            text = file_content.decode('utf-8')
-        else:
+        # Extract text based on file type (shared with the Q&A service's cache)
+        if not file.filename.lower().endswith(SUPPORTED_EXTENSIONS):
             raise HTTPException(status_code=400, detail="Unsupported file type. Please upload PDF, DOCX, or TXT files.")
+        pages = await run_in_threadpool(extraction_cache.get_pages, file.filename, file_content)
+        text = "\n".join(page.page_content for page in pages)
         
         if not text.strip():
             raise HTTPException(status_code=400, detail="No text content found in the document.")
@@ -158,7 +151,7 @@ async def summarize_document(
             max_length=max_length
         )
         
-        return await summarize_text(request)
+        return await summarize_text(request, http_request)
     
     except HTTPException:
         raise
@@ -0,0 +1,93 @@
+"""
+Tests for the skill prerequisite graph
+"""
+from services.common.skill_graph import SkillGraph, _bits, _popcount
+
+PYTHON = {
+    "python": {
+        "beginner": [{"title": "Intro", "skills_covered": ["Variables", "Loops"]}],
+        "intermediate": [
+            {"title": "Functions 101", "skills_covered": ["Functions", "Loops"]},
+            {"title": "Closures", "skills_covered": ["Closures"], "prerequisites": ["Functions"]}
+        ],
+        "advanced": [{"title": "Decorators", "skills_covered": ["Decorators"], "prerequisites": ["Closures"]}]
+    }
+}
+
+def resource(title, skills, prerequisites=()):
+    return {"title": title, "skills_covered": list(skills), "prerequisites": list(prerequisites)}
+
+def test_bit_helpers():
+    assert list(_bits(0)) == []
+    assert list(_bits(0b101001)) == [0, 3, 5]
+    assert _popcount(0) == 0
+    assert _popcount((1 << 100) | 0b111) == 4
+
+def test_topological_order():
+    graph = SkillGraph(PYTHON)
+    assert graph.skills == ["Variables", "Loops", "Functions", "Closures", "Decorators"]
+    assert graph.dropped_edges == 0
+
+def test_prerequisite_closure():
+    """Explicit prerequisites chain through levels to the skills introduced below"""
+    graph = SkillGraph(PYTHON)
+    assert graph.prerequisites("Decorators", transitive=False) == ["Closures"]
+    assert graph.prerequisites("Decorators") == ["Variables", "Loops", "Functions", "Closures"]
+    # Functions is new at intermediate, so it builds on what beginner introduced
+    assert graph.prerequisites("Functions") == ["Variables", "Loops"]
+    assert graph.prerequisites("Variables") == []
+    assert graph.prerequisites("decorators!") == graph.prerequisites("Decorators")
+    assert graph.prerequisites("Unknown") == []
+
+def test_self_prerequisite_ignored():
+    graph = SkillGraph({"x": {"beginner": [resource("A", ["a"], ["a"])]}})
+    assert graph.prerequisites("a") == []
+    assert graph.dropped_edges == 0
+
+def test_two_cycle_dropped():
+    graph = SkillGraph({"x": {"beginner": [resource("A", ["a"], ["b"]), resource("B", ["b"], ["a"])]}})
+    assert graph.dropped_edges == 1
+    assert graph.skills == ["b", "a"]
+    assert graph.prerequisites("a") == ["b"]
+    assert graph.prerequisites("b") == []
+
+def test_longer_cycle_dropped():
+    """One edge of the cycle is ignored; the remaining chain still closes transitively"""
+    graph = SkillGraph({"x": {"beginner": [
+        resource("A", ["a"], ["b"]),
+        resource("B", ["b"], ["c"]),
+        resource("C", ["c"], ["a"])
+    ]}})
+    assert graph.dropped_edges == 1
+    assert graph.skills == ["c", "b", "a"]
+    assert graph.prerequisites("a") == ["c", "b"]
+    assert graph.prerequisites("c") == []
+
+def test_closure_across_subjects():
+    graph = SkillGraph({
+        "math": {"beginner": [resource("Algebra", ["Algebra"])], "intermediate": [resource("Calculus", ["Calculus"])]},
+        "ml": {"beginner": [resource("Gradient Descent", ["Gradient Descent"], ["Calculus"])]}
+    })
+    assert graph.prerequisites("Gradient Descent") == ["Algebra", "Calculus"]
+
+def test_skill_gap():
+    graph = SkillGraph(PYTHON)
+    gap = graph.skill_gap(["Decorators"], ["Functions"])
+    # Knowing Functions implies its prerequisites as well
+    assert gap["needed_skills"] == ["Closures", "Decorators"]
+    assert [r["title"] for r in gap["resources"]] == ["Closures", "Decorators"]
+    assert gap["uncovered_skills"] == []
+    assert gap["unknown_skills"] == []
+
+def test_skill_gap_unknown_and_known():
+    graph = SkillGraph(PYTHON)
+    assert graph.skill_gap(["Decorators"], ["Decorators"])["needed_skills"] == []
+    gap = graph.skill_gap(["Loops", "Rust"], [])
+    assert gap["needed_skills"] == ["Loops"]
+    assert [r["title"] for r in gap["resources"]] == ["Intro"]
+    assert gap["unknown_skills"] == ["Rust"]
+
+def test_order_key():
+    graph = SkillGraph(PYTHON)
+    assert graph.order_key(["Decorators", "Loops"]) == 1
+    assert graph.order_key(["Unknown"]) == len(graph)
@@ -0,0 +1,113 @@
+"""
+Tests for study time parsing and scheduling
+"""
+import pytest
+from services.common.study_schedule import (
+    MAX_PLANNED_WEEKS,
+    MAX_WEEKLY_HOURS,
+    MIN_WEEKLY_HOURS,
+    ScheduleItem,
+    build_schedule,
+    parse_duration_hours,
+    parse_weekly_hours,
+    parse_weeks,
+    select_greedy,
+    select_knapsack,
+)
+
+@pytest.mark.parametrize("text, hours", [
+    ("5 hours/week", 5.0),
+    ("5 hours per week", 5.0),
+    ("1 hour a day", 7.0),
+    ("an hour a day", 7.0),
+    ("30 minutes every day", 3.5),
+    ("2-4 hours a week", 3.0),
+    ("full-time", 40.0),
+    ("Part time", 20.0),
+    ("weekends", 8.0),
+    ("10 hours", 10.0),
+])
+def test_parse_weekly_hours(text, hours):
+    assert parse_weekly_hours(text) == pytest.approx(hours)
+
+@pytest.mark.parametrize("text", ["", None, "whenever I can", "3 weeks", "2 months"])
+def test_parse_weekly_hours_unrecognized(text):
+    assert parse_weekly_hours(text) is None
+
+def test_parse_weekly_hours_ceiling():
+    """Commitments are capped at MAX_WEEKLY_HOURS; more than a week holds is unrecognized"""
+    assert parse_weekly_hours("12 hours a day") == MAX_WEEKLY_HOURS
+    assert parse_weekly_hours("24 hours a day") == MAX_WEEKLY_HOURS
+    assert parse_weekly_hours("25 hours a day") is None
+    assert parse_weekly_hours("1000000 hours per week") is None
+
+@pytest.mark.parametrize("text, weeks", [
+    ("3 weeks", 3.0),
+    ("3 months", 13.0),
+    ("1 year", 52.0),
+    ("two years", 104.0),
+    ("6-8 weeks", 7.0),
+    ("14 days", 2.0),
+])
+def test_parse_weeks(text, weeks):
+    assert parse_weeks(text) == pytest.approx(weeks)
+
+@pytest.mark.parametrize("text", ["", None, "no deadline", "ongoing", "10 hours"])
+def test_parse_weeks_open_ended(text):
+    assert parse_weeks(text) is None
+
+def test_parse_duration_hours():
+    assert parse_duration_hours("6 hours") == 6.0
+    assert parse_duration_hours("90 minutes") == pytest.approx(1.5)
+    assert parse_duration_hours("4-6 weeks") == pytest.approx(25.0)
+    assert parse_duration_hours("2 weeks", hours_per_week=10) == pytest.approx(20.0)
+    assert parse_duration_hours("Ongoing") is None
+
+def items(*specs):
+    return [ScheduleItem(title, hours, value, order) for order, (title, hours, value) in enumerate(specs)]
+
+def test_knapsack_beats_greedy():
+    """Greedy takes the densest item first and strands the rest of the budget"""
+    resources = items(("a", 6, 7), ("b", 5, 5), ("c", 5, 5))
+    assert [item.title for item in select_greedy(resources, 10)] == ["a"]
+    assert sorted(item.title for item in select_knapsack(resources, 10)) == ["b", "c"]
+
+def test_knapsack_rounds_hours_up():
+    """Item hours are rounded up to quarter hours, so they never overfill the budget"""
+    resources = items(("a", 1.1, 1), ("b", 1.1, 1))
+    assert len(select_knapsack(resources, 2.25)) == 1
+    assert len(select_knapsack(resources, 2.5)) == 2
+
+def test_build_schedule_modes():
+    resources = items(("a", 6, 7), ("b", 5, 5), ("c", 5, 5))
+    dp = build_schedule(resources, weekly_hours=5, deadline_weeks=2, mode="dp")
+    assert dp["selection"] == "dp"
+    assert dp["total_hours"] == 10
+    assert dp["deferred"] == ["a"]
+    assert [week["hours"] for week in dp["weeks"]] == [5, 5]
+    
+    greedy = build_schedule(resources, weekly_hours=5, deadline_weeks=2, mode="greedy")
+    assert greedy["selection"] == "greedy"
+    assert greedy["deferred"] == ["b", "c"]
+    
+    everything = build_schedule(resources, weekly_hours=5, deadline_weeks=None)
+    assert everything["selection"] == "all"
+    assert everything["deferred"] == []
+    assert everything["total_weeks"] == 4
+
+def test_build_schedule_splits_items_across_weeks():
+    resources = items(("a", 3, 1), ("b", 4, 1))
+    schedule = build_schedule(resources, weekly_hours=5, deadline_weeks=None)
+    assert [item.weeks for item in resources] == [(1, 1), (1, 2)]
+    assert schedule["weeks"][0]["resources"] == [{"title": "a", "hours": 3}, {"title": "b", "hours": 2}]
+    assert schedule["weeks"][1]["resources"] == [{"title": "b", "hours": 2}]
+
+def test_build_schedule_bounds():
+    """Weekly hours are floored, and weeks past the horizon are only summarized"""
+    resources = items(("long", 1000, 1))
+    schedule = build_schedule(resources, weekly_hours=0, deadline_weeks=None)
+    assert schedule["weekly_hours"] == MIN_WEEKLY_HOURS
+    assert schedule["total_weeks"] == 2000
+    assert len(schedule["weeks"]) == MAX_PLANNED_WEEKS
+    assert schedule["beyond_horizon"]["weeks"] == 2000 - MAX_PLANNED_WEEKS
+    assert schedule["beyond_horizon"]["resources"] == ["long"]
@@ -0,0 +1,149 @@
+"""
+Tests for the quantized vector store
+"""
+import hashlib
+import os
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+from services.common.vector_store import (
+    PRECISIONS,
+    QuantizedVectorStore,
+    normalize,
+    quantization_recall,
+    quantize,
+)
+
+DIMENSIONS = 64
+
+class SeededEmbeddings(Embeddings):
+    """Deterministic random vectors per text, so searching a stored text finds it"""
+    
+    def _embed(self, text: str):
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        return np.random.default_rng(seed).standard_normal(DIMENSIONS).tolist()
+    
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+    
+    def embed_query(self, text):
+        return self._embed(text)
+
+def random_vectors(rows: int, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((rows, DIMENSIONS)).astype(np.float32)
+
+@pytest.mark.parametrize("precision, dtype, tolerance", [
+    ("float32", np.float32, 1e-7),
+    ("float16", np.float16, 1e-3),
+    ("int8", np.int8, 1e-2),
+])
+def test_quantize_round_trip(precision, dtype, tolerance):
+    vectors = normalize(random_vectors(100))
+    stored, scales = quantize(vectors, precision)
+    assert stored.dtype == dtype
+    restored = stored.astype(np.float32)
+    if precision == "int8":
+        assert scales.shape == (100,)
+        restored *= scales[:, None]
+    else:
+        assert scales is None
+    assert np.abs(restored - vectors).max() < tolerance
+
+def test_quantize_zero_row():
+    stored, scales = quantize(np.zeros((1, DIMENSIONS), dtype=np.float32), "int8")
+    assert not stored.any()
+    assert scales[0] == 1.0
+
+def test_quantization_recall():
+    vectors, queries = random_vectors(2000), random_vectors(20, seed=1)
+    assert quantization_recall(vectors, queries, "float32") == 1.0
+    assert quantization_recall(vectors, queries, "float16") > 0.95
+    int8 = quantization_recall(vectors, queries, "int8")
+    assert int8 > 0.8
+    assert quantization_recall(vectors, queries, "int8", rescore_candidates=4) >= int8
+    assert quantization_recall(vectors, queries[:0], "int8") == 1.0
+
+def make_store(tmp_path, precision="int8", rescore=True):
+    return QuantizedVectorStore(SeededEmbeddings(), precision=precision, rescore=rescore, persist_directory=str(tmp_path))
+
+def test_unsupported_precision(tmp_path):
+    with pytest.raises(ValueError):
+        make_store(tmp_path, precision="int4")
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_search_finds_stored_text(tmp_path, precision):
+    store = make_store(tmp_path, precision)
+    texts = [f"chunk {i}" for i in range(50)]
+    store.add_texts(texts, metadatas=[{"chunk": i} for i in range(50)])
+    doc, score = store.similarity_search_with_score("chunk 17", k=1)[0]
+    assert doc.page_content == "chunk 17"
+    assert doc.metadata == {"chunk": 17}
+    # float32 is stored exactly and the others are rescored from exact copies
+    assert score == pytest.approx(1.0, abs=1e-5)
+
+def test_rescore_uses_exact_scores(tmp_path):
+    """With rescoring, reported scores are the exact float32 cosine similarities"""
+    store = make_store(tmp_path / "exact")
+    plain = make_store(tmp_path / "plain", rescore=False)
+    texts = [f"text {i}" for i in range(30)]
+    store.add_texts(texts)
+    plain.add_texts(texts)
+    query = SeededEmbeddings().embed_query("text 3")
+    vectors = normalize(np.asarray(SeededEmbeddings().embed_documents(texts), dtype=np.float32))
+    expected = vectors @ normalize(np.asarray([query], dtype=np.float32))[0]
+    for doc, score in store.similarity_search_by_vector_with_score(query, k=5):
+        assert score == pytest.approx(expected[texts.index(doc.page_content)], abs=1e-5)
+    assert plain.similarity_search_by_vector(query, k=1)[0].page_content == "text 3"
+    assert not os.path.exists(tmp_path / "plain" / "embeddings.f32")
+
+def test_delete_and_replace(tmp_path):
+    store = make_store(tmp_path)
+    ids = store.add_texts(["a", "b", "c", "d", "e"], ids=["1", "2", "3", "4", "5"])
+    assert ids == ["1", "2", "3", "4", "5"]
+    assert store.delete(["2"])
+    assert not store.delete([])
+    assert len(store) == 4
+    assert store.get()["ids"] == ["1", "3", "4", "5"]
+    assert all(doc.page_content != "b" for doc in store.similarity_search("b", k=4))
+    
+    # Re-adding an id replaces the entry
+    store.add_texts(["C"], ids=["3"])
+    assert len(store) == 4
+    assert store.get(["3"])["documents"] == ["C"]
+    assert store.similarity_search("C", k=1)[0].page_content == "C"
+
+def test_compaction_keeps_search_consistent(tmp_path):
+    """Deleting a quarter of the rows compacts the arrays and the exact file together"""
+    store = make_store(tmp_path)
+    old = store.add_texts([f"old {i}" for i in range(40)])
+    full = store.memory_bytes()
+    new = store.add_texts([f"new {i}" for i in range(40)], metadatas=[{"i": i} for i in range(40)])
+    store.delete(old)
+    
+    assert store._deleted == 0
+    assert store._count == 40
+    assert store.memory_bytes() == full
+    assert os.path.getsize(tmp_path / "embeddings.f32") == 40 * DIMENSIONS * 4
+    assert store.get()["ids"] == new
+    for i in (0, 17, 39):
+        doc, score = store.similarity_search_with_score(f"new {i}", k=1)[0]
+        assert (doc.page_content, doc.metadata) == (f"new {i}", {"i": i})
+        assert score == pytest.approx(1.0, abs=1e-5)
+    
+    store.add_texts(["later"])
+    assert store.similarity_search("later", k=1)[0].page_content == "later"
+    assert len(store) == 41
+
+def test_memory_counts_live_rows_only(tmp_path):
+    store = make_store(tmp_path)
+    assert store.memory_bytes() == 0
+    ids = store.add_texts([f"t{i}" for i in range(20)])
+    per_row = store.memory_bytes() / 20
+    assert per_row == DIMENSIONS + 4
+    store.delete(ids[:3])
+    assert store._deleted == 3
+    assert store.memory_bytes() == 17 * per_row
+    store.delete(ids[3:])
+    assert len(store) == 0
+    assert store.memory_bytes() == 0
+    assert store.similarity_search("t1") == []